@@ -0,0 +1,134 @@
+"""Нагрузочный тест HTTP/JSON-сервиса задач на локальной машине.
+
+    python bench_api.py --clients 20 --seconds 10
+
+Сервис запускается отдельным процессом на временной базе из datagen.py
+(10 пользователей по 1000 задач). Клиенты входят под разными
+пользователями и без пауз шлют смесь запросов: 70% чтение страницы списка,
+по 10% добавление, правка и переключение статуса. В конце печатаются
+запросы в секунду и перцентили задержки по видам запросов.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(os.path.dirname(BENCH_DIR), "smart_todo_list")
+sys.path.insert(0, APP_DIR)
+
+import datagen  # noqa: E402
+from api_client import ApiClient  # noqa: E402
+from api_server import MAX_PAGE_SIZE  # noqa: E402
+
+USERS = 10
+TASKS_PER_USER = 1000
+
+# Доли видов запросов в нагрузке
+MIX = (("list", 70), ("add", 10), ("update", 10), ("toggle", 10))
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, len(sorted_values) * p // 100)]
+
+
+async def prepare_client(client, user_number):
+    await client.login(datagen.login(user_number), datagen.PASSWORD)
+    _, page = await client.request("GET", f"/tasks?limit={MAX_PAGE_SIZE}")
+    return [task["id"] for task in page["tasks"]]
+
+
+async def run_client(client, task_ids, deadline, rng, timings):
+    kinds = [kind for kind, weight in MIX for _ in range(weight)]
+    while time.perf_counter() < deadline:
+        kind = rng.choice(kinds)
+        task_id = rng.choice(task_ids)
+        start = time.perf_counter()
+        if kind == "list":
+            status, _ = await client.request("GET", f"/tasks?limit=50&after={task_id}")
+        elif kind == "add":
+            status, _ = await client.request("POST", "/tasks", {"title": "Нагрузка"})
+        elif kind == "update":
+            status, _ = await client.request("PATCH", f"/tasks/{task_id}", {"title": "Правка"})
+        else:
+            status, _ = await client.request("POST", f"/tasks/{task_id}/toggle")
+        timings.setdefault(kind, []).append(time.perf_counter() - start)
+        if status != 200:
+            raise RuntimeError(f"{kind}: ответ {status}")
+
+
+async def load(host, port, clients, seconds, seed):
+    """Возвращает ({вид запроса: [задержки]}, длительность нагрузки)"""
+    rng = random.Random(seed)
+    connections = [ApiClient(host, port) for _ in range(clients)]
+    # Входы (bcrypt) идут до замера
+    task_ids = await asyncio.gather(
+        *(prepare_client(client, i % USERS + 1) for i, client in enumerate(connections))
+    )
+    timings = {}
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(
+            run_client(client, ids, start + seconds, random.Random(rng.random()), timings)
+            for client, ids in zip(connections, task_ids)
+        )
+    )
+    elapsed = time.perf_counter() - start
+    for client in connections:
+        await client.close()
+    return timings, elapsed
+
+
+def start_server(db_path):
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(APP_DIR, "api_server.py"), "--port", "0", "--db", db_path],
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    line = process.stdout.readline()  # «Сервис задач слушает http://host:port»
+    host, port = line.rsplit("/", 1)[1].strip().rsplit(":", 1)
+    return process, host, int(port)
+
+
+def run_benchmark(clients, seconds, seed=datagen.DEFAULT_SEED):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "api.sqlite")
+        datagen.generate_db(db_path, USERS, TASKS_PER_USER, seed)
+        process, host, port = start_server(db_path)
+        try:
+            timings, elapsed = asyncio.run(load(host, port, clients, seconds, seed))
+        finally:
+            process.terminate()
+            process.wait()
+
+    total = sum(len(values) for values in timings.values())
+    print(f"Клиентов: {clients}, запросов: {total}, в секунду: {total / elapsed:.0f}")
+    print(f"{'запрос':<10}{'число':>8}{'p50, мс':>10}{'p99, мс':>10}{'max, мс':>10}")
+    for kind, _ in MIX:
+        values = sorted(timings.get(kind, [0.0]))
+        print(
+            f"{kind:<10}{len(values):>8}{percentile(values, 50) * 1000:>10.2f}"
+            f"{percentile(values, 99) * 1000:>10.2f}{values[-1] * 1000:>10.2f}"
+        )
+    values = sorted(value for kind_values in timings.values() for value in kind_values)
+    print(
+        f"{'все':<10}{len(values):>8}{percentile(values, 50) * 1000:>10.2f}"
+        f"{percentile(values, 99) * 1000:>10.2f}{values[-1] * 1000:>10.2f}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочный тест сервиса задач")
+    parser.add_argument("--clients", type=int, default=20)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args(argv)
+    run_benchmark(args.clients, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
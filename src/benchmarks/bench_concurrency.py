@@ -0,0 +1,118 @@
+"""Чтение и запись одной базы из нескольких процессов.
+
+    python bench_concurrency.py --readers 1 2 4 --seconds 5
+
+Для каждого числа читателей на базе из datagen.py (10 пользователей по
+1000 задач) запускаются процессы-читатели (keyset-страницы по 50 задач
+случайного пользователя) и процессы-писатели (добавление задачи и
+переключение статуса). Печатаются чтения и записи в секунду и число
+ошибок «database is locked». Чтения масштабируются с числом процессов,
+пока хватает ядер процессора: WAL не даёт записи блокировать чтение.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "smart_todo_list"))
+
+import datagen  # noqa: E402
+from database import Database  # noqa: E402
+
+USERS = 10
+TASKS_PER_USER = 1000
+PAGE_SIZE = 50
+
+mp = multiprocessing.get_context("spawn")
+
+
+def reader(db_path, seed, start, stop, counters):
+    rng = random.Random(seed)
+    reads = errors = 0
+    start.wait()
+    with Database(db_path) as db:
+        while not stop.is_set():
+            after_id = rng.randint(0, USERS * TASKS_PER_USER)
+            try:
+                list(db.iter_tasks(rng.randint(1, USERS), after_id, PAGE_SIZE))
+                reads += 1
+            except sqlite3.OperationalError:
+                errors += 1
+    counters.put(("read", reads, errors))
+
+
+def writer(db_path, seed, start, stop, counters):
+    rng = random.Random(seed)
+    writes = errors = 0
+    start.wait()
+    with Database(db_path) as db:
+        while not stop.is_set():
+            try:
+                db.add_task(rng.randint(1, USERS), "Нагрузка", "")
+                db.toggle_task_status(rng.randint(1, USERS * TASKS_PER_USER))
+                writes += 2
+            except sqlite3.OperationalError:
+                errors += 1
+    counters.put(("write", writes, errors))
+
+
+def run_round(db_path, readers, writers, seconds, seed):
+    """Возвращает {"read"/"write": (операций, ошибок)} за один прогон"""
+    start, stop = mp.Event(), mp.Event()
+    counters = mp.Queue()
+    processes = [
+        mp.Process(target=reader, args=(db_path, seed + i, start, stop, counters))
+        for i in range(readers)
+    ] + [
+        mp.Process(target=writer, args=(db_path, seed - i - 1, start, stop, counters))
+        for i in range(writers)
+    ]
+    for process in processes:
+        process.start()
+    time.sleep(0.5)  # процессы успевают импортировать модули до старта
+    start.set()
+    time.sleep(seconds)
+    stop.set()
+    totals = {"read": [0, 0], "write": [0, 0]}
+    for _ in processes:
+        kind, done, errors = counters.get()
+        totals[kind][0] += done
+        totals[kind][1] += errors
+    for process in processes:
+        process.join()
+    return {kind: tuple(values) for kind, values in totals.items()}
+
+
+def run_benchmark(reader_counts, writers, seconds, seed=datagen.DEFAULT_SEED):
+    print(f"Ядер процессора: {os.cpu_count()}, писателей: {writers}")
+    print(f"{'читателей':<10}{'чтений/с':>10}{'записей/с':>11}{'ошибок':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "concurrency.sqlite")
+        datagen.generate_db(db_path, USERS, TASKS_PER_USER, seed)
+        for readers in reader_counts:
+            totals = run_round(db_path, readers, writers, seconds, seed)
+            reads, read_errors = totals["read"]
+            writes, write_errors = totals["write"]
+            print(
+                f"{readers:<10}{reads / seconds:>10.0f}{writes / seconds:>11.0f}"
+                f"{read_errors + write_errors:>8}"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Параллельная работа процессов с базой")
+    parser.add_argument("--readers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--writers", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=5)
+    args = parser.parse_args(argv)
+    run_benchmark(args.readers, args.writers, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from database import Database  # noqa: E402
+
+CALLS = 2000
+
+
+def get_tasks_connect_per_call(db_path, user_id):
+    # Старый вариант: новое соединение и курсор на каждый вызов
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT id, title, description, is_done FROM tasks WHERE user_id = ?",
+            (user_id,),
+        )
+        return cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def update_title_connect_per_call(db_path, task_id, new_title):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("UPDATE tasks SET title = ? WHERE id = ?", (new_title, task_id))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def measure(func, calls=CALLS):
+    start = time.perf_counter()
+    for i in range(calls):
+        func(i)
+    return (time.perf_counter() - start) / calls * 1e6  # мкс на вызов
+
+
+def run_benchmark():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.sqlite")
+        with Database(db_path) as db:
+            conn = db._get_connection()
+            with conn:
+                conn.execute(
+                    "INSERT INTO users (login, email, password_hash) VALUES ('bench', 'bench@example.com', '-')"
+                )
+                conn.executemany(
+                    "INSERT INTO tasks (user_id, title, description) VALUES (1, ?, ?)",
+                    ((f"Задача {i}", f"Описание {i}") for i in range(20)),
+                )
+
+            results = [
+                (
+                    "get_tasks",
+                    measure(lambda i: get_tasks_connect_per_call(db_path, 1)),
+                    measure(lambda i: db.get_tasks(1)),
+                ),
+                (
+                    "update_task_title",
+                    measure(
+                        lambda i: update_title_connect_per_call(db_path, 1, f"t{i}"),
+                        calls=CALLS // 4,
+                    ),
+                    measure(lambda i: db.update_task_title(1, f"t{i}"), calls=CALLS // 4),
+                ),
+            ]
+
+    print(f"{'метод':<20}{'до, мкс':>12}{'после, мкс':>14}")
+    for name, before, after in results:
+        print(f"{name:<20}{before:>12.1f}{after:>14.1f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
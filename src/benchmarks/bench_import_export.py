@@ -0,0 +1,113 @@
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+import task_io  # noqa: E402
+from database import Database  # noqa: E402
+
+ROWS = 1_000_000
+# Цель по скорости, строк в секунду: миллион задач - примерно за полминуты
+TARGET_ROWS_PER_SEC = 30_000
+# Размеры импорта для проверки памяти: пик не должен расти вместе с объёмом
+MEMORY_ROWS = (20_000, 200_000)
+
+
+def generate_tasks(rows=ROWS):
+    for i in range(rows):
+        yield (
+            f"Задача {i}",
+            f"Описание задачи номер {i}",
+            i % 3 == 0,
+            f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d} 12:00:00",
+        )
+
+
+def make_db(tmp, name):
+    db = Database(os.path.join(tmp, name))
+    conn = db._get_connection()
+    with conn:
+        conn.execute(
+            "INSERT INTO users (login, email, password_hash) VALUES ('bench', 'bench@example.com', '-')"
+        )
+    return db
+
+
+def measure_speed(func):
+    start = time.perf_counter()
+    rows = func()
+    return rows, rows / (time.perf_counter() - start)
+
+
+def measure_peak(func):
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak
+
+
+def run_benchmark():
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.csv")
+        with open(source, "w", encoding="utf-8", newline="") as f:
+            task_io.write_tasks(f, "csv", generate_tasks())
+
+        print(f"{'операция':<40}{'строк/с':>12}")
+        failed = False
+        with make_db(tmp, "bench.sqlite") as db:
+            operations = [
+                (
+                    "импорт CSV, индексы в конце",
+                    lambda: task_io.import_file(db, 1, source, defer_indexes=True),
+                )
+            ] + [
+                (
+                    f"экспорт {fmt.upper()}",
+                    lambda fmt=fmt: task_io.export_file(
+                        db, 1, os.path.join(tmp, f"export.{fmt}")
+                    ),
+                )
+                for fmt in task_io.FORMATS
+            ]
+            for name, func in operations:
+                rows, speed = measure_speed(func)
+                print(f"{name:<40}{speed:>12.0f}")
+                failed |= rows != ROWS or speed < TARGET_ROWS_PER_SEC
+
+        # Для сравнения: транзакция на пачку, индексы и tasks_fts обновляются
+        # на каждую строку (миллион строк так заняли бы минуты)
+        with make_db(tmp, "batches.sqlite") as db:
+            rows, speed = measure_speed(lambda: db.import_tasks(1, generate_tasks(ROWS // 10)))
+            print(f"{'импорт, транзакция на пачку':<40}{speed:>12.0f}")
+
+        print(f"{'строк':>10}{'пик памяти импорта, МБ':>26}{'экспорта, МБ':>16}")
+        peaks = []
+        for rows in MEMORY_ROWS:
+            with make_db(tmp, f"memory{rows}.sqlite") as db:
+                import_peak = measure_peak(
+                    lambda: db.import_tasks(1, generate_tasks(rows), defer_indexes=True)
+                )
+                export_peak = measure_peak(
+                    lambda: task_io.export_file(db, 1, os.path.join(tmp, "memory.jsonl"))
+                )
+            peaks.append((import_peak, export_peak))
+            print(f"{rows:>10}{import_peak / 2**20:>26.1f}{export_peak / 2**20:>16.1f}")
+        # В десять раз больше строк - а память почти та же
+        failed |= any(big > small * 1.5 for small, big in zip(*peaks))
+
+        if failed:
+            print(f"Цель не достигнута: {TARGET_ROWS_PER_SEC} строк/с и постоянная память")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    run_benchmark()
@@ -0,0 +1,113 @@
+"""Умный порядок списка задач: NumPy против цикла Python по строкам.
+
+    python bench_ranking.py --tasks 1000000
+
+Задачи одного пользователя (база из datagen.py, срок и приоритет
+проставляются по id) ранжируются так же, как при открытии списка в окне:
+чтение колонок из индекса (Database.rank_columns), оценка всех невыполненных
+задач и первая страница (Ranking.top), затем полный порядок для прокрутки
+(Ranking.page). Для сравнения те же оценки считаются циклом Python по
+строкам с сортировкой sorted().
+"""
+
+import argparse
+import math
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "smart_todo_list"))
+
+import numpy as np  # noqa: E402
+
+import datagen  # noqa: E402
+import ranking  # noqa: E402
+from database import Database  # noqa: E402
+
+# Сколько задач на первой странице списка (task_model.PAGE_SIZE)
+FIRST_PAGE = 200
+
+
+def python_scores(rows, now):
+    """Те же оценки, что ranking.score_tasks, циклом по строкам.
+    Возвращает оценки по убыванию"""
+    scores = []
+    for task_id, due, priority, created in rows:
+        score = 0.0
+        if due:
+            days_left = (due - now) / ranking.DAY
+            score = ranking.URGENCY_WEIGHT * 2 ** (
+                -max(days_left, 0.0) / ranking.URGENCY_HALF_LIFE_DAYS
+            )
+            score += ranking.OVERDUE_WEIGHT * min(
+                max(-days_left / ranking.OVERDUE_FULL_DAYS, 0.0), 1.0
+            )
+        score += ranking.PRIORITY_WEIGHTS[priority].item()
+        age = (now - created) / (ranking.DAY * ranking.AGE_FULL_DAYS)
+        score += ranking.AGE_WEIGHT * min(max(age, 0.0), 1.0)
+        scores.append(score)
+    return sorted(scores, reverse=True)
+
+
+def timed(func):
+    start = time.perf_counter()
+    value = func()
+    return value, time.perf_counter() - start
+
+
+def run_benchmark(tasks, seed=datagen.DEFAULT_SEED):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "ranking.sqlite")
+        datagen.generate_db(db_path, 1, tasks, seed)
+        with Database(db_path) as db:
+            conn = db._get_connection()
+            with conn:
+                conn.execute(
+                    "UPDATE tasks SET priority = id % 4,"
+                    " due_date = CASE WHEN id % 2 THEN datetime('2024-06-01', (id % 90) || ' days') END"
+                )
+            now = math.floor(time.mktime((2024, 7, 1, 0, 0, 0, 0, 0, -1)))
+
+            # Те же значения, что в rank_columns, но строками результата
+            seconds = "CAST(ROUND((julianday({}) - 2440587.5) * 86400) AS INTEGER)"
+            python_rows, python_read = timed(
+                lambda: conn.execute(
+                    f"SELECT id, IFNULL({seconds.format('due_date')}, 0), priority,"
+                    f" {seconds.format('created_at')} FROM tasks WHERE user_id = 1 AND is_done = 0"
+                ).fetchall()
+            )
+            python_scores_, python_time = timed(lambda: python_scores(python_rows, now))
+
+            columns, read = timed(lambda: ranking.load_rank_columns(db, 1))
+            order, scored = timed(lambda: ranking.Ranking(*columns, now=now))
+            top, first_page = timed(lambda: order.top(FIRST_PAGE))
+            _, full_sort = timed(lambda: order.page(FIRST_PAGE, FIRST_PAGE))
+            # Равные оценки задачи могут идти в разном порядке - сравниваем оценки
+            top_scores = -np.sort(order.keys)[:FIRST_PAGE]
+            error = max(abs(a - b) for a, b in zip(top_scores, python_scores_))
+
+            print(f"Задач: {tasks}, невыполненных: {len(columns[0])}")
+            print(f"{'этап':<34}{'мс':>10}")
+            for name, seconds in (
+                ("цикл Python: чтение строк", python_read),
+                ("цикл Python: оценка и sorted()", python_time),
+                ("NumPy: чтение колонок", read),
+                ("NumPy: оценка всех задач", scored),
+                (f"NumPy: первые {FIRST_PAGE} задач (top)", first_page),
+                ("NumPy: полный порядок (page)", full_sort),
+            ):
+                print(f"{name:<34}{seconds * 1000:>10.1f}")
+            print(f"Наибольшее расхождение оценок первых {len(top)} задач: {error:.2e}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Умный порядок списка задач")
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+    run_benchmark(args.tasks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Запись из нескольких процессов: один файл против шардированной базы.
+
+    python bench_sharding.py --shards 1 2 4 8 --writers 8 --seconds 5
+
+База из datagen.py (64 пользователя по 100 задач) шардируется на N файлов
+(sharding.py, перенос задач - rebalance), затем процессы-писатели
+добавляют задачи случайным пользователям и переключают их статус.
+Печатаются записи в секунду и ожидание блокировки. В строке «1 файл»
+пишут в обычную базу Database. С одним файлом записи всех процессов идут
+по очереди; в шардах - параллельно, пока хватает ядер процессора и
+диска. С --sync full каждая транзакция ждёт fsync, как на сервере с
+synchronous = FULL, и очередь на блокировке видна даже на одном ядре.
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "smart_todo_list"))
+
+import database  # noqa: E402
+import datagen  # noqa: E402
+from database import Database  # noqa: E402
+from sharding import ShardedDatabase, rebalance  # noqa: E402
+
+USERS = 64
+TASKS_PER_USER = 100
+
+mp = multiprocessing.get_context("spawn")
+
+
+def open_db(db_path, sharded, sync):
+    database.PRAGMAS = tuple(
+        f"PRAGMA synchronous = {sync.upper()}" if pragma.startswith("PRAGMA synchronous") else pragma
+        for pragma in database.PRAGMAS
+    )
+    return ShardedDatabase(db_path) if sharded else Database(db_path)
+
+
+def writer(db_path, sharded, sync, seed, start, stop, counters):
+    rng = random.Random(seed)
+    writes = 0
+    waited = 0.0
+    db = open_db(db_path, sharded, sync)
+    with db:
+        start.wait()
+        while not stop.is_set():
+            started = time.perf_counter()
+            task_id = db.add_task(rng.randint(1, USERS), "Нагрузка", "")
+            db.toggle_task_status(task_id)
+            writes += 2
+            waited += time.perf_counter() - started
+    counters.put((writes, waited))
+
+
+def run_round(db_path, sharded, sync, writers, seconds, seed):
+    """(записей в секунду, средняя задержка записи в мс)"""
+    start, stop = mp.Event(), mp.Event()
+    counters = mp.Queue()
+    processes = [
+        mp.Process(
+            target=writer, args=(db_path, sharded, sync, seed + i, start, stop, counters)
+        )
+        for i in range(writers)
+    ]
+    for process in processes:
+        process.start()
+    time.sleep(1.0)  # процессы успевают импортировать модули и открыть базу
+    start.set()
+    time.sleep(seconds)
+    stop.set()
+    writes = waited = 0
+    for _ in processes:
+        done, seconds_waited = counters.get()
+        writes += done
+        waited += seconds_waited
+    for process in processes:
+        process.join()
+    return writes / seconds, waited / max(writes, 1) * 2 * 1000
+
+
+def run_benchmark(shard_counts, writers, seconds, sync="normal", seed=datagen.DEFAULT_SEED):
+    print(f"Ядер процессора: {os.cpu_count()}, писателей: {writers}, synchronous = {sync.upper()}")
+    print(f"{'база':<12}{'записей/с':>12}{'мс на пару':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        source = os.path.join(tmp, "source.sqlite")
+        datagen.generate_db(source, USERS, TASKS_PER_USER, seed)
+        rounds = [(0, "1 файл")] + [(count, f"{count} шардов") for count in shard_counts]
+        for count, name in rounds:
+            round_dir = os.path.join(tmp, name.replace(" ", "_"))
+            os.makedirs(round_dir)
+            db_path = os.path.join(round_dir, "bench.sqlite")
+            shutil.copy(source, db_path)
+            if count:
+                with ShardedDatabase(db_path, count) as db:
+                    rebalance(db)
+            throughput, latency = run_round(db_path, bool(count), sync, writers, seconds, seed)
+            print(f"{name:<12}{throughput:>12.0f}{latency:>12.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Запись в шардированную базу из нескольких процессов")
+    parser.add_argument("--shards", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--sync", choices=("normal", "full"), default="normal")
+    args = parser.parse_args(argv)
+    run_benchmark(args.shards, args.writers, args.seconds, args.sync)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Поиск похожих задач у пользователя с миллионом задач.
+
+    python bench_similarity.py --tasks 1000000 --lookups 200
+
+Задачи одного пользователя генерируются как в datagen.py. Замеряются
+полная индексация (подписи MinHash и запись task_minhash), размер индекса,
+поиск похожих перед добавлением задачи (Database.similar_tasks - сначала
+он догоняет журнал изменений, поэтому между поисками добавляется задача) и
+поиск групп дубликатов для объединения (Database.duplicate_groups).
+Для сравнения показано время прямого сравнения новой задачи со всеми
+задачами пользователя на части списка.
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "smart_todo_list"))
+
+import datagen  # noqa: E402
+from database import Database  # noqa: E402
+from similarity import jaccard, normalize, trigrams  # noqa: E402
+
+# На скольких задачах замеряется прямое сравнение (результат пересчитывается на весь список)
+NAIVE_SAMPLE = 20_000
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def run_benchmark(tasks, lookups, seed=datagen.DEFAULT_SEED):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.sqlite"))
+        with db._get_connection() as conn:
+            conn.execute(
+                "INSERT INTO users (login, email, password_hash) VALUES ('u', 'u@example.com', '-')"
+            )
+        db.insert_tasks(datagen.generate_tasks(1, tasks, seed), defer_indexes=True)
+        print(f"Задач у пользователя: {tasks}")
+
+        start = time.perf_counter()
+        db.similar_tasks(1, "Купить молоко", "")
+        print(f"Полная индексация: {time.perf_counter() - start:.1f} с")
+        conn = db._get_connection()
+        pages = conn.execute(
+            "SELECT SUM(pgsize) FROM dbstat WHERE name IN ('task_minhash', 'idx_task_minhash_task')"
+        ).fetchone()[0]
+        print(f"Размер индекса: {pages / 2**20:.0f} МБ")
+
+        timings = []
+        for _ in range(lookups):
+            title = " ".join(rng.choices(datagen.WORDS, k=rng.randint(2, 4))).capitalize()
+            start = time.perf_counter()
+            db.similar_tasks(1, title, "")
+            timings.append(time.perf_counter() - start)
+            db.add_task(1, title, "")
+        print(
+            "Поиск похожих, мс: p50 {:.2f}, p95 {:.2f}, p99 {:.2f}, максимум {:.2f}".format(
+                *(percentile(timings, p) * 1000 for p in (0.5, 0.95, 0.99, 1.0))
+            )
+        )
+
+        sample = [normalize(title, description) for _, title, description, _ in db.iter_tasks(1, limit=NAIVE_SAMPLE)]
+        grams = trigrams(normalize("Купить молоко", ""))
+        start = time.perf_counter()
+        for text in sample:
+            jaccard(grams, trigrams(text))
+        naive = (time.perf_counter() - start) / len(sample) * tasks
+        print(f"Прямое сравнение со всеми задачами: {naive * 1000:.0f} мс")
+
+        start = time.perf_counter()
+        groups = db.duplicate_groups(1)
+        print(
+            f"Группы дубликатов: {len(groups)} групп, {sum(len(group) - 1 for group in groups)}"
+            f" лишних задач за {time.perf_counter() - start:.1f} с"
+        )
+        db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Поиск похожих задач на большом списке")
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=200)
+    args = parser.parse_args(argv)
+    run_benchmark(args.tasks, args.lookups)
+
+
+if __name__ == "__main__":
+    main()
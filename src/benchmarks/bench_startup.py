@@ -0,0 +1,110 @@
+"""Время до первого кадра при запуске приложения.
+
+Каждый запуск - отдельный процесс, чтобы импорт модулей и разбор .ui
+измерялись «с холодного старта». Сравниваются два режима:
+
+- сразу: база открывается до показа окна, все страницы строятся заранее,
+  .ui разбираются uic.loadUi (как было раньше);
+- лениво: как в main() - показывается только приветственная страница из
+  заранее скомпилированного .ui, база и остальные страницы создаются потом.
+
+Для ленивого режима отдельно измеряется первый переход на окно входа: на
+него переносится открытие базы и построение страницы.
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+)
+
+RUNS = 7
+
+
+def child(mode, db_path):
+    """Выполняется в отдельном процессе: печатает время до первого кадра, мс"""
+    start = time.perf_counter()
+    sys.path.insert(0, APP_DIR)
+    os.chdir(APP_DIR)  # стили загружаются по относительным путям
+
+    from PyQt6.QtWidgets import QApplication
+
+    import main
+    import ui_loader
+    from database import Database
+
+    app = QApplication(sys.argv)
+    app.setStyleSheet(main.load_stylesheet("styles/ConsoleStyle.qss"))
+    if mode == "eager":
+        ui_loader.PRECOMPILED = False
+        window = main.MainWindow(Database(db_path))
+        window.show_login()
+        window.show_register()
+        window.stackedWidget.setCurrentIndex(0)
+    else:
+        window = main.MainWindow()
+
+    timings = {}
+
+    def on_first_frame():
+        timings["first_frame"] = time.perf_counter() - start
+        if mode == "lazy":
+            navigation_start = time.perf_counter()
+            window.open_db(Database(db_path))
+            window.show_login()
+            window.login_window.grab()
+            timings["first_login_page"] = time.perf_counter() - navigation_start
+        app.quit()
+
+    window.first_frame.connect(on_first_frame)
+    window.show()
+    app.exec()
+    window.close_db()
+    print(" ".join(f"{name}={seconds * 1000:.1f}" for name, seconds in timings.items()))
+
+
+def run_child(mode, db_path):
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode, db_path],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return {
+        name: float(value)
+        for name, value in (item.split("=") for item in output.split()[-2:] if "=" in item)
+    }
+
+
+def run_benchmark():
+    sys.path.insert(0, APP_DIR)
+    import ui_loader
+    from database import Database
+
+    # Как при втором и следующих запусках: модули окон уже скомпилированы
+    ui_loader.compile_all()
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "startup.sqlite")
+        Database(db_path).close()
+
+        print(f"{'режим':<36}{'медиана, мс':>14}{'min, мс':>10}")
+        for mode, label in (("eager", "сразу (loadUi, база до окна)"), ("lazy", "лениво")):
+            runs = [run_child(mode, db_path) for _ in range(RUNS)]
+            for name in runs[0]:
+                values = [run[name] for run in runs]
+                title = label if name == "first_frame" else "  первый переход на окно входа"
+                print(f"{title:<36}{statistics.median(values):>14.1f}{min(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--child"]:
+        child(sys.argv[2], sys.argv[3])
+    else:
+        run_benchmark()
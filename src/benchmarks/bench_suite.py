@@ -0,0 +1,248 @@
+"""Набор замеров производительности на базах разного размера.
+
+    python bench_suite.py --scale 100k
+    python bench_suite.py --scale 100k --save-baseline
+    python bench_suite.py --scale 1m --baseline baselines/1m.json
+
+База нужного масштаба создаётся генератором datagen.py один раз и лежит в
+benchmarks/data. Результаты (перцентили времени каждой операции) пишутся в
+JSON в benchmarks/results. Если передан базовый файл, скрипт завершается с
+кодом 1, когда p95 какой-то операции хуже базового больше чем на
+--tolerance.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(os.path.dirname(BENCH_DIR), "smart_todo_list")
+sys.path.insert(0, APP_DIR)
+
+import datagen  # noqa: E402
+from database import Database  # noqa: E402
+
+DATA_DIR = os.path.join(BENCH_DIR, "data")
+RESULTS_DIR = os.path.join(BENCH_DIR, "results")
+BASELINES_DIR = os.path.join(BENCH_DIR, "baselines")
+
+# Сколько раз выполняется каждая операция (bcrypt медленный - его меньше)
+ITERATIONS = 200
+VERIFY_ITERATIONS = 10
+RENDER_ITERATIONS = 50
+
+# Насколько p95 может быть хуже базового, прежде чем это считается регрессией
+DEFAULT_TOLERANCE = 0.25
+# Разницу меньше этого (мс) не считаем регрессией: это шум системы, а не код
+NOISE_FLOOR_MS = 0.5
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1, len(sorted_values) * p // 100)]
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    summary = {f"p{p}_ms": percentile(timings, p) * 1000 for p in PERCENTILES}
+    summary["max_ms"] = timings[-1] * 1000
+    summary["mean_ms"] = sum(timings) / len(timings) * 1000
+    summary["count"] = len(timings)
+    return summary
+
+
+def time_calls(func, args_list):
+    timings = []
+    for args in args_list:
+        start = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def ensure_db(scale, seed):
+    users, tasks = datagen.SCALES[scale]
+    path = os.path.join(DATA_DIR, f"{scale}-{seed}.sqlite")
+    if not os.path.exists(path):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        print(f"Генерируется база {scale}: {users} × {tasks}...")
+        tmp_path = path + ".tmp"
+        for leftover in (tmp_path, tmp_path + "-wal", tmp_path + "-shm"):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        datagen.generate_db(tmp_path, users, tasks, seed)
+        shutil.move(tmp_path, path)
+    return path, users
+
+
+def run_db_operations(db, users, rng):
+    """Замеры методов Database; правки после замера откатываются"""
+    conn = db._get_connection()
+    task_count = conn.execute("SELECT MAX(id) FROM tasks").fetchone()[0]
+    user_ids = [rng.randint(1, users) for _ in range(ITERATIONS)]
+    task_ids = [rng.randint(1, task_count) for _ in range(ITERATIONS)]
+    originals = {
+        row[0]: row[1:]
+        for row in conn.execute(
+            f"SELECT id, title, description, is_done FROM tasks"
+            f" WHERE id IN ({','.join('?' * len(task_ids))})",
+            task_ids,
+        )
+    }
+
+    results = {}
+    results["verify_user"] = time_calls(
+        db.verify_user,
+        [(datagen.login(rng.randint(1, users)), datagen.PASSWORD)] * VERIFY_ITERATIONS,
+    )
+    # Повторный вход по токену сессии - без bcrypt
+    token = db.create_session(user_ids[0])
+    results["check_session"] = time_calls(db.check_session, [(token,)] * len(user_ids))
+    db.delete_session(token)
+    results["get_tasks"] = time_calls(db.get_tasks, [(user_id,) for user_id in user_ids])
+    added = []
+    results["add_task"] = time_calls(
+        lambda user_id: added.append(db.add_task(user_id, "Замер добавления", "")),
+        [(user_id,) for user_id in user_ids],
+    )
+    results["update_task_status"] = time_calls(
+        db.update_task_status, [(task_id, 1) for task_id in task_ids]
+    )
+    results["update_task_title"] = time_calls(
+        db.update_task_title, [(task_id, "Замер названия") for task_id in task_ids]
+    )
+    results["update_task_description"] = time_calls(
+        db.update_task_description, [(task_id, "Замер описания") for task_id in task_ids]
+    )
+
+    # Возвращаем базу в исходное состояние, чтобы следующий запуск мерил то же
+    with conn:
+        conn.executemany("DELETE FROM tasks WHERE id = ?", ((task_id,) for task_id in added))
+    db.update_tasks(
+        {
+            task_id: {"title": title, "description": description, "is_done": is_done}
+            for task_id, (title, description, is_done) in originals.items()
+        }
+    )
+    return results
+
+
+def run_render(db, users, rng):
+    """Замер TasksWindow.load_tasks вместе с отрисовкой окна (без экрана)"""
+    from PyQt6.QtWidgets import QApplication, QStackedWidget
+
+    app = QApplication.instance() or QApplication(sys.argv)  # noqa: F841
+    cwd = os.getcwd()
+    os.chdir(APP_DIR)  # окна загружают .ui по относительным путям
+    try:
+        import main
+
+        window = main.TasksWindow(QStackedWidget(), db, 1)
+        window.resize(800, 600)
+        window.grab()  # первая отрисовка дольше: шрифты, стили, кеши Qt
+        timings = []
+        for _ in range(RENDER_ITERATIONS):
+            window.user_id = rng.randint(1, users)
+            start = time.perf_counter()
+            window.load_tasks()
+            window.grab()  # отрисовка таблицы с загруженной страницей
+            timings.append(time.perf_counter() - start)
+        return {"tasks_window_load_tasks": timings}
+    finally:
+        os.chdir(cwd)
+
+
+def run_suite(scale, seed=datagen.DEFAULT_SEED):
+    db_path, users = ensure_db(scale, seed)
+    rng = random.Random(seed)
+    with Database(db_path) as db:
+        timings = run_db_operations(db, users, rng)
+        timings.update(run_render(db, users, rng))
+    users_count, tasks_per_user = datagen.SCALES[scale]
+    return {
+        "scale": scale,
+        "rows": users_count * tasks_per_user,
+        "seed": seed,
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "machine": platform.machine(),
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "results": {name: summarize(values) for name, values in timings.items()},
+    }
+
+
+def find_regressions(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Список (операция, p95 сейчас, p95 базовый) для операций, ставших медленнее"""
+    regressions = []
+    for name, base in baseline["results"].items():
+        current = report["results"].get(name)
+        if current is None:
+            continue
+        now, before = current["p95_ms"], base["p95_ms"]
+        if now > before * (1 + tolerance) and now - before > NOISE_FLOOR_MS:
+            regressions.append((name, now, before))
+    return regressions
+
+
+def print_report(report):
+    print(f"Масштаб {report['scale']} ({report['rows']} задач), SQLite {report['sqlite']}")
+    print(f"{'операция':<28}" + "".join(f"{key:>10}" for key in ("p50", "p95", "p99", "max")))
+    for name, summary in report["results"].items():
+        values = (summary[f"{key}_ms"] for key in ("p50", "p95", "p99", "max"))
+        print(f"{name:<28}" + "".join(f"{value:>10.3f}" for value in values))
+
+
+def save_json(report, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры производительности")
+    parser.add_argument("--scale", choices=datagen.SCALES, default="10k")
+    parser.add_argument("--seed", type=int, default=datagen.DEFAULT_SEED)
+    parser.add_argument("--output", help="файл JSON с результатами")
+    parser.add_argument("--baseline", help="файл JSON с базовыми результатами")
+    parser.add_argument("--save-baseline", action="store_true", help="сохранить как базовые")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    report = run_suite(args.scale, args.seed)
+    print_report(report)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{args.scale}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    save_json(report, output)
+    print(f"Результаты сохранены в {output}")
+
+    baseline_path = args.baseline or os.path.join(BASELINES_DIR, f"{args.scale}.json")
+    if args.save_baseline:
+        save_json(report, baseline_path)
+        print(f"Базовые результаты сохранены в {baseline_path}")
+        return 0
+    if not os.path.exists(baseline_path):
+        if args.baseline:
+            parser.error(f"нет файла {baseline_path}")
+        return 0
+
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    regressions = find_regressions(report, baseline, args.tolerance)
+    for name, now, before in regressions:
+        print(f"Регрессия {name}: p95 {now:.3f} мс, базовое {before:.3f} мс")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
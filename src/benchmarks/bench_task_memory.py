@@ -0,0 +1,71 @@
+"""Память под список задач в модели таблицы: кортежи, Task и TaskList.
+
+    python bench_task_memory.py --tasks 1000000
+
+Задачи одного пользователя (база из datagen.py) читаются из базы тремя
+способами: списком кортежей, как их отдаёт sqlite3, списком объектов Task
+(__slots__) и колоночным TaskList. Для каждого печатаются байты на задачу
+(tracemalloc) и время построения, для TaskList - ещё память и время
+первого row_of (задачи идут по id, поэтому это двоичный поиск без словаря).
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "smart_todo_list"))
+
+import datagen  # noqa: E402
+from database import Database  # noqa: E402
+from task_list import Task, TaskList  # noqa: E402
+
+
+def measure(build):
+    """Возвращает (результат, байт выделено, секунд)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    value = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size, elapsed
+
+
+def run_benchmark(tasks, seed=datagen.DEFAULT_SEED):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "memory.sqlite")
+        datagen.generate_db(db_path, 1, tasks, seed)
+        with Database(db_path) as db:
+            variants = (
+                ("кортежи", lambda: list(db.iter_tasks(1))),
+                ("Task", lambda: [Task(*row) for row in db.iter_tasks(1)]),
+                ("TaskList", lambda: TaskList(db.iter_tasks(1))),
+            )
+            print(f"Задач: {tasks}")
+            print(f"{'хранение':<12}{'байт/задачу':>12}{'всего, МБ':>11}{'время, с':>10}")
+            for name, build in variants:
+                value, size, elapsed = measure(build)
+                print(f"{name:<12}{size / tasks:>12.0f}{size / 2**20:>11.1f}{elapsed:>10.2f}")
+                if isinstance(value, TaskList):
+                    last_id = value.ids[-1]
+                    _, index_size, index_elapsed = measure(lambda: value.row_of(last_id))
+                    print(
+                        f"{'+ row_of':<12}{index_size / tasks:>12.0f}"
+                        f"{index_size / 2**20:>11.1f}{index_elapsed:>10.2f}"
+                    )
+                del value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Память под список задач")
+    parser.add_argument("--tasks", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+    run_benchmark(args.tasks)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from database import Database  # noqa: E402
+from task_model import PAGE_SIZE  # noqa: E402
+from task_query import TaskQuery  # noqa: E402
+
+TASKS = 100_000
+# Доля выполненных задач: у долго живущего списка их большинство
+DONE_EVERY = 10
+REPEATS = 20
+
+
+def fetch_all_then_filter(db, user_id):
+    # Старый путь: все задачи из базы, фильтр и сортировка в Python
+    tasks = [task for task in db.get_tasks(user_id) if not task[3]]
+    tasks.sort(key=lambda task: (task[1], task[0]))
+    return tasks[:PAGE_SIZE]
+
+
+def query_first_page(db, user_id):
+    query = TaskQuery(user_id).done(False).order_by("title").limit(PAGE_SIZE)
+    return db.query_tasks(query)
+
+
+def measure(func, db):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        result = func(db, 1)
+    return (time.perf_counter() - start) / REPEATS * 1000, result  # мс на вызов
+
+
+def run_benchmark():
+    with tempfile.TemporaryDirectory() as tmp:
+        with Database(os.path.join(tmp, "bench.sqlite")) as db:
+            conn = db._get_connection()
+            with conn:
+                conn.execute(
+                    "INSERT INTO users (login, email, password_hash) VALUES ('bench', 'bench@example.com', '-')"
+                )
+                conn.executemany(
+                    "INSERT INTO tasks (user_id, title, description, is_done) VALUES (1, ?, '', ?)",
+                    (
+                        (f"Задача {i * 7919 % TASKS}", int(i % DONE_EVERY != 0))
+                        for i in range(TASKS)
+                    ),
+                )
+
+            print(f"{'способ':<34}{'мс на страницу':>16}")
+            results = []
+            for name, func in (
+                ("все задачи + фильтр в Python", fetch_all_then_filter),
+                ("TaskQuery (фильтр в SQL)", query_first_page),
+            ):
+                elapsed, result = measure(func, db)
+                results.append(result)
+                print(f"{name:<34}{elapsed:>16.2f}")
+            assert results[0] == results[1]
+
+
+if __name__ == "__main__":
+    run_benchmark()
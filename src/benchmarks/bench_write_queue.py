@@ -0,0 +1,78 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from PyQt6.QtCore import QCoreApplication  # noqa: E402
+
+from database import Database  # noqa: E402
+from write_queue import TaskWriteQueue  # noqa: E402
+
+TASKS = 200
+EDITS = 5000
+# Сколько правок успевает накопиться за один интервал таймера очереди
+EDITS_PER_FLUSH = 100
+
+
+def make_edits(seed=1):
+    rng = random.Random(seed)
+    fields = ("title", "description", "is_done")
+    for i in range(EDITS):
+        field = rng.choice(fields)
+        value = rng.randint(0, 1) if field == "is_done" else f"{field} {i}"
+        yield rng.randint(1, TASKS), field, value
+
+
+def edit_directly(db, edits):
+    update = {
+        "title": db.update_task_title,
+        "description": db.update_task_description,
+        "is_done": db.update_task_status,
+    }
+    for task_id, field, value in edits:
+        update[field](task_id, value)
+
+
+def edit_with_queue(db, edits):
+    queue = TaskWriteQueue(db)
+    for i, (task_id, field, value) in enumerate(edits, 1):
+        queue.put(task_id, field, value)
+        if i % EDITS_PER_FLUSH == 0:
+            queue.flush()
+    queue.flush()
+
+
+def run_benchmark():
+    app = QCoreApplication.instance() or QCoreApplication(sys.argv)  # noqa: F841
+    print(f"{'способ':<28}{'правок/с':>12}")
+    for name, func in (
+        ("по одной транзакции", edit_directly),
+        ("write-behind очередь", edit_with_queue),
+    ):
+        with tempfile.TemporaryDirectory() as tmp:
+            with Database(os.path.join(tmp, "bench.sqlite")) as db:
+                conn = db._get_connection()
+                with conn:
+                    conn.execute(
+                        "INSERT INTO users (login, email, password_hash) VALUES ('bench', 'bench@example.com', '-')"
+                    )
+                db.add_tasks(1, ((f"Задача {i}", "") for i in range(TASKS)))
+
+                start = time.perf_counter()
+                func(db, make_edits())
+                elapsed = time.perf_counter() - start
+        print(f"{name:<28}{EDITS / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    run_benchmark()
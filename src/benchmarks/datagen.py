@@ -0,0 +1,102 @@
+"""Детерминированный генератор тестовых баз: N пользователей × M задач.
+
+    python datagen.py --users 1000 --tasks 1000 data/1m.sqlite
+
+Одинаковые параметры и seed дают одинаковые строки, поэтому результаты
+замеров на разных машинах и в разных запусках можно сравнивать.
+"""
+
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+import bcrypt  # noqa: E402
+
+from database import Database  # noqa: E402
+
+DEFAULT_SEED = 2025
+
+# Пароль всех сгенерированных пользователей (логины user1, user2, ...)
+PASSWORD = "Passw0rd!"
+
+# Масштабы замеров: имя -> (пользователей, задач на пользователя)
+SCALES = {
+    "1k": (10, 100),
+    "10k": (100, 100),
+    "100k": (100, 1000),
+    "1m": (1000, 1000),
+    "10m": (10_000, 1000),
+}
+
+WORDS = (
+    "купить позвонить написать отправить проверить подготовить прочитать оплатить"
+    " отчёт письмо молоко встреча проект договор счёт презентация задача план"
+    " маме врачу клиенту команде завтра срочно вечером понедельник квартал"
+).split()
+
+
+def login(user_number):
+    return f"user{user_number}"
+
+
+def generate_users(users, password_hash):
+    for n in range(1, users + 1):
+        yield login(n), f"{login(n)}@example.com", password_hash
+
+
+def generate_tasks(users, tasks_per_user, seed=DEFAULT_SEED):
+    """Строки (user_id, title, description, is_done, created_at).
+
+    Задачи пользователей перемешаны, как в живой базе: соседние id
+    принадлежат разным пользователям.
+    """
+    rng = random.Random(seed)
+    for i in range(tasks_per_user):
+        for user_id in range(1, users + 1):
+            title = " ".join(rng.choices(WORDS, k=rng.randint(2, 4)))
+            description = " ".join(rng.choices(WORDS, k=rng.randint(0, 8)))
+            is_done = int(rng.random() < 0.4)
+            day = i * 365 // tasks_per_user
+            created_at = f"2024-{day // 31 % 12 + 1:02d}-{day % 28 + 1:02d} 12:00:00"
+            yield user_id, title.capitalize(), description, is_done, created_at
+
+
+def generate_db(db_path, users, tasks_per_user, seed=DEFAULT_SEED):
+    """Создаёт базу db_path с пользователями и задачами (файла не должно быть)"""
+    if os.path.exists(db_path):
+        raise FileExistsError(db_path)
+    # Один хеш на всех: bcrypt для каждого пользователя занял бы часы
+    password_hash = bcrypt.hashpw(PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    with Database(db_path) as db:
+        conn = db._get_connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO users (login, email, password_hash) VALUES (?, ?, ?)",
+                generate_users(users, password_hash),
+            )
+        db.insert_tasks(generate_tasks(users, tasks_per_user, seed), defer_indexes=True)
+        with conn:
+            conn.execute("ANALYZE")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Генератор тестовой базы задач")
+    parser.add_argument("path", help="файл новой базы")
+    parser.add_argument("--users", type=int, required=True)
+    parser.add_argument("--tasks", type=int, required=True, help="задач на пользователя")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    args = parser.parse_args(argv)
+    generate_db(args.path, args.users, args.tasks, args.seed)
+    print(f"Создана база {args.path}: {args.users} пользователей × {args.tasks} задач")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Клиент HTTP/JSON-сервиса задач (api_server.py) для скриптов и тестов.
+
+    client = ApiClient("127.0.0.1", 8080)
+    await client.login("user", "Passw0rd!")
+    status, page = await client.request("GET", "/tasks?limit=100")
+    await client.close()
+
+Все запросы идут по одному открытому соединению (keep-alive), поэтому
+одновременные запросы одного клиента выполняются по очереди; для
+параллельных запросов нужно несколько клиентов.
+"""
+
+import asyncio
+import json
+
+
+class ApiClient:
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.token = None
+        self._reader = None
+        self._writer = None
+        self._lock = asyncio.Lock()
+
+    async def request(self, method, path, data=None):
+        """Отправляет запрос, возвращает (код ответа, JSON ответа)"""
+        async with self._lock:
+            return await self._request(method, path, data)
+
+    async def _request(self, method, path, data):
+        if self._writer is None:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        body = b"" if data is None else json.dumps(data, ensure_ascii=False).encode("utf-8")
+        headers = f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(body)}\r\n"
+        if body:
+            headers += "Content-Type: application/json\r\n"
+        if self.token is not None:
+            headers += f"Authorization: Bearer {self.token}\r\n"
+        self._writer.write((headers + "\r\n").encode("latin-1") + body)
+        await self._writer.drain()
+
+        status = int((await self._reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self._reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        payload = json.loads(await self._reader.readexactly(length)) if length else None
+        return status, payload
+
+    async def login(self, login, password):
+        status, payload = await self.request(
+            "POST", "/login", {"login": login, "password": password}
+        )
+        if status != 200:
+            raise PermissionError(payload["error"])
+        self.token = payload["token"]
+        return payload["user_id"]
+
+    async def close(self):
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = None
@@ -0,0 +1,458 @@
+"""HTTP/JSON-сервис задач без интерфейса (asyncio, только стандартная библиотека).
+
+Запуск из папки src/smart_todo_list:
+
+    python api_server.py --port 8080
+
+Запросы и ответы - JSON. Вход возвращает токен, остальные запросы
+передают его в заголовке «Authorization: Bearer <токен>»:
+
+    POST  /login                {"login": ..., "password": ...} -> {"token", "user_id"}
+    GET   /tasks?limit=50&after=<id>&done=0|1&sort=title&desc=1
+                                -> {"tasks": [...], "next_after": <id или null>}
+    POST  /tasks                {"title": ..., "description"?, "due_date"?, "priority"?} -> {"id"}
+    PATCH /tasks/<id>           {"title"?, "description"?, "is_done"?, "due_date"?, "priority"?}
+                                -> {"id"}
+    POST  /tasks/<id>/toggle    -> {"id", "is_done"}
+    GET   /reminders            -> {"reminders": [{"id", "title", "due"}, ...]}
+                                (с --reminders; наступившие с прошлого запроса)
+
+Запросы к базе выполняются в ограниченном пуле потоков (у каждого потока
+своё соединение из пула Database), проверка пароля bcrypt - в отдельном
+маленьком пуле: медленные входы не занимают потоки, нужные остальным
+запросам. Соединения клиентов держатся открытыми (HTTP/1.1 keep-alive), и
+одновременно их обслуживается сколько угодно. С --shards N задачи лежат
+в N файлах (sharding.py), и записи разных пользователей не ждут друг друга.
+
+С --reminders сервис следит за сроками задач всех пользователей
+(AsyncReminderScheduler из reminders.py): один таймер цикла asyncio на
+ближайший срок, а правки задач через сервис меняют кучу сроков на месте.
+Наступившие напоминания хранятся в памяти, пока их не заберёт клиент.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from database import TASK_UPDATE_FIELDS
+from ranking import PRIORITIES, parse_due_date
+from reminders import AsyncReminderScheduler, due_seconds
+from sharding import open_database
+from task_query import SORT_FIELDS, TaskQuery
+
+# Потоки для запросов к базе и для bcrypt
+DB_WORKERS = 4
+AUTH_WORKERS = 2
+
+# Сколько входов может ждать bcrypt; остальным сразу отвечаем 429
+AUTH_QUEUE_LIMIT = 32
+
+# Размер страницы списка задач по умолчанию и наибольший
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Ограничения запроса: тело и строка заголовка
+MAX_BODY_SIZE = 64 * 1024
+MAX_HEADER_LINE = 8 * 1024
+MAX_HEADERS = 64
+
+# Сколько секунд ждать следующего запроса на открытом соединении
+KEEP_ALIVE_TIMEOUT = 30
+
+# Сколько наступивших напоминаний хранится на пользователя до запроса /reminders
+REMINDERS_KEEP = 100
+
+
+class HttpError(Exception):
+    """Ошибка запроса: отправляется клиенту как {"error": message} с кодом status"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class TaskApiServer:
+    """Сервис задач поверх Database (или ShardedDatabase из sharding.py).
+
+    Токены входа - сессии в базе (Database.create_session): после
+    перезапуска сервера клиенты продолжают работу со старым токеном, а
+    проверка токена - один поиск по индексу вместо bcrypt.
+    """
+
+    def __init__(self, db, db_workers=DB_WORKERS, auth_workers=AUTH_WORKERS, reminders=False):
+        self.db = db
+        self.db_executor = ThreadPoolExecutor(db_workers, thread_name_prefix="api-db")
+        self.auth_executor = ThreadPoolExecutor(auth_workers, thread_name_prefix="api-auth")
+        self._auth_waiting = 0
+        self._server = None
+        self.reminders = reminders
+        self._scheduler = None
+        self._due = defaultdict(lambda: deque(maxlen=REMINDERS_KEEP))  # {user_id: [Reminder]}
+        # (метод, части пути - None на месте id, обработчик, нужен ли вход)
+        self._routes = (
+            ("POST", ("login",), self.login, False),
+            ("GET", ("tasks",), self.list_tasks, True),
+            ("POST", ("tasks",), self.add_task, True),
+            ("PATCH", ("tasks", None), self.update_task, True),
+            ("POST", ("tasks", None, "toggle"), self.toggle_task, True),
+            ("GET", ("reminders",), self.list_reminders, True),
+        )
+
+    async def start(self, host="127.0.0.1", port=8080):
+        if self.reminders:
+            self._scheduler = AsyncReminderScheduler(
+                self.db, self.on_reminders_due, asyncio.get_running_loop()
+            )
+            # Один запрос по индексу сроков - в потоке цикла, до приёма запросов
+            self._scheduler.start()
+        self._server = await asyncio.start_server(self.handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._scheduler is not None:
+            self._scheduler.stop()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        # Потоки пулов держат соединения с базой - закрываем их после пулов
+        self.auth_executor.shutdown()
+        self.db_executor.shutdown()
+        self.db.close()
+
+    async def run_db(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.db_executor, func, *args)
+
+    # Соединение с клиентом
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(read_request(reader), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except HttpError as e:
+                    await write_response(writer, e.status, {"error": e.message}, False)
+                    return
+                if request is None:
+                    return
+                method, target, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                try:
+                    status, payload = HTTPStatus.OK, await self.dispatch(
+                        method, target, headers, body
+                    )
+                except HttpError as e:
+                    status, payload = e.status, {"error": e.message}
+                except Exception as e:  # noqa: BLE001 - ошибка одного запроса не роняет сервер
+                    status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)}
+                await write_response(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, headers, body):
+        url = urlsplit(target)
+        parts = tuple(part for part in url.path.split("/") if part)
+        allowed = False
+        for route_method, pattern, handler, needs_login in self._routes:
+            if len(pattern) != len(parts) or any(
+                expected is not None and expected != part for expected, part in zip(pattern, parts)
+            ):
+                continue
+            allowed = True
+            if route_method != method:
+                continue
+            args = [
+                int_param(part, "id") for expected, part in zip(pattern, parts) if expected is None
+            ]
+            data = parse_json(body) if method in ("POST", "PATCH") else {}
+            query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+            if needs_login:
+                args.insert(0, await self.authenticate(headers))
+            return await handler(*args, data=data, query=query)
+        if allowed:
+            raise HttpError(HTTPStatus.METHOD_NOT_ALLOWED, "Метод не поддерживается")
+        raise HttpError(HTTPStatus.NOT_FOUND, "Нет такого адреса")
+
+    async def authenticate(self, headers):
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        user_id = None
+        if scheme.lower() == "bearer" and token:
+            user_id = await self.run_db(self.db.check_session, token)
+        if user_id is None:
+            raise HttpError(HTTPStatus.UNAUTHORIZED, "Нужно войти")
+        return user_id
+
+    # Обработчики
+
+    async def login(self, data, query):
+        login, password = data.get("login"), data.get("password")
+        if not isinstance(login, str) or not isinstance(password, str):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Нужны login и password")
+        if self._auth_waiting >= AUTH_QUEUE_LIMIT:
+            raise HttpError(HTTPStatus.TOO_MANY_REQUESTS, "Слишком много входов, повторите позже")
+        self._auth_waiting += 1
+        try:
+            loop = asyncio.get_running_loop()
+            user_id = await loop.run_in_executor(
+                self.auth_executor, self.db.verify_user, login, password
+            )
+        finally:
+            self._auth_waiting -= 1
+        if user_id is None:
+            raise HttpError(HTTPStatus.UNAUTHORIZED, "Неверный логин или пароль")
+        token = await self.run_db(self.db.create_session, user_id)
+        return {"token": token, "user_id": user_id}
+
+    async def list_tasks(self, user_id, data, query):
+        limit = int_param(query.get("limit", PAGE_SIZE), "limit")
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"limit должен быть от 1 до {MAX_PAGE_SIZE}")
+        task_query = TaskQuery(user_id)
+        if "done" in query:
+            task_query = task_query.done(query["done"] in ("1", "true"))
+        sort = query.get("sort", "id")
+        if sort not in SORT_FIELDS:
+            raise HttpError(HTTPStatus.BAD_REQUEST, f"Неизвестное поле сортировки: {sort}")
+        task_query = task_query.order_by(sort, query.get("desc") in ("1", "true"))
+        if "after" in query:
+            task_query = task_query.after(int_param(query["after"], "after"))
+        rows = await self.run_db(self.db.query_tasks, task_query.limit(limit))
+        return {
+            "tasks": [task_json(row) for row in rows],
+            "next_after": rows[-1][0] if len(rows) == limit else None,
+        }
+
+    async def add_task(self, user_id, data, query):
+        title = data.get("title")
+        description = data.get("description", "")
+        if not isinstance(title, str) or not title.strip() or not isinstance(description, str):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "Нужно непустое название задачи")
+        schedule = schedule_fields(data)
+        task_id = await self.run_db(
+            self.db.add_task,
+            user_id,
+            title.strip(),
+            description,
+            schedule.get("due_date"),
+            schedule.get("priority", 0),
+        )
+        if self._scheduler is not None and schedule.get("due_date"):
+            self._scheduler.update(
+                task_id, user_id, title.strip(), due_seconds(schedule["due_date"]), 0
+            )
+        return {"id": task_id}
+
+    async def update_task(self, user_id, task_id, data, query):
+        fields = {name: data[name] for name in TASK_UPDATE_FIELDS if name in data}
+        if not fields or set(data) - set(TASK_UPDATE_FIELDS):
+            raise HttpError(
+                HTTPStatus.BAD_REQUEST, f"Можно менять только {', '.join(TASK_UPDATE_FIELDS)}"
+            )
+        if "is_done" in fields:
+            fields["is_done"] = int(bool(fields["is_done"]))
+        fields.update(schedule_fields(data))
+        await self.check_owner(user_id, task_id)
+        await self.run_db(self.db.update_tasks, {task_id: fields})
+        await self.update_reminder(task_id, fields)
+        return {"id": task_id}
+
+    async def toggle_task(self, user_id, task_id, data, query):
+        await self.check_owner(user_id, task_id)
+        is_done = await self.run_db(self.db.toggle_task_status, task_id)
+        await self.update_reminder(task_id, {"is_done": is_done})
+        return {"id": task_id, "is_done": is_done}
+
+    async def list_reminders(self, user_id, data, query):
+        due = self._due.pop(user_id, ())
+        return {
+            "reminders": [
+                {"id": reminder.task_id, "title": reminder.title, "due": reminder.due}
+                for reminder in due
+            ]
+        }
+
+    # Напоминания
+
+    def on_reminders_due(self, reminders):
+        for reminder in reminders:
+            self._due[reminder.user_id].append(reminder)
+
+    async def update_reminder(self, task_id, fields):
+        """Правка задачи: куча сроков меняется за O(log n). Состояние задачи
+        читается по первичному ключу в пуле потоков"""
+        if self._scheduler is None:
+            return
+        if set(fields) <= {"title", "description", "priority"}:
+            if "title" in fields:
+                self._scheduler.rename(task_id, fields["title"])
+            return
+        row = await self.run_db(self.db.get_task_due, task_id)
+        if row is None:
+            self._scheduler.remove(task_id)
+        else:
+            self._scheduler.update(task_id, *row)
+
+    async def check_owner(self, user_id, task_id):
+        # Чужая задача для клиента неотличима от несуществующей
+        if await self.run_db(self.db.get_task_owner, task_id) != user_id:
+            raise HttpError(HTTPStatus.NOT_FOUND, "Задача не найдена")
+
+
+def task_json(row):
+    task_id, title, description, is_done = row
+    return {"id": task_id, "title": title, "description": description, "is_done": is_done}
+
+
+def schedule_fields(data):
+    """Проверенные срок и приоритет задачи из тела запроса (только переданные)"""
+    fields = {}
+    if "due_date" in data:
+        due_date = data["due_date"]
+        if due_date is not None and not isinstance(due_date, str):
+            raise HttpError(HTTPStatus.BAD_REQUEST, "due_date - строка ГГГГ-ММ-ДД или null")
+        try:
+            fields["due_date"] = parse_due_date(due_date)
+        except ValueError as e:
+            raise HttpError(HTTPStatus.BAD_REQUEST, str(e)) from e
+    if "priority" in data:
+        priority = data["priority"]
+        if type(priority) is not int or not 0 <= priority < len(PRIORITIES):
+            raise HttpError(
+                HTTPStatus.BAD_REQUEST, f"priority - целое от 0 до {len(PRIORITIES) - 1}"
+            )
+        fields["priority"] = priority
+    return fields
+
+
+def int_param(value, name):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise HttpError(HTTPStatus.BAD_REQUEST, f"{name} должен быть числом") from None
+
+
+def parse_json(body):
+    if not body:
+        return {}
+    try:
+        data = json.loads(body)
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Тело запроса - не JSON") from None
+    if not isinstance(data, dict):
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Тело запроса должно быть объектом JSON")
+    return data
+
+
+async def read_request(reader):
+    """(method, target, headers, body) следующего запроса; None - клиент закрыл соединение"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    if len(request_line) > MAX_HEADER_LINE:
+        raise HttpError(HTTPStatus.REQUEST_URI_TOO_LONG, "Слишком длинный запрос")
+    try:
+        method, target, _version = request_line.decode("latin-1").split()
+    except ValueError:
+        raise HttpError(HTTPStatus.BAD_REQUEST, "Неверная строка запроса") from None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        if len(line) > MAX_HEADER_LINE or len(headers) >= MAX_HEADERS:
+            raise HttpError(
+                HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE, "Слишком большие заголовки"
+            )
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int_param(headers.get("content-length", 0), "Content-Length")
+    if length > MAX_BODY_SIZE:
+        raise HttpError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "Слишком большое тело запроса")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, headers, body
+
+
+async def write_response(writer, status, payload, keep_alive):
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    status = HTTPStatus(status)
+    writer.write(
+        (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        ).encode("latin-1")
+        + body
+    )
+    await writer.drain()
+
+
+async def serve(
+    host,
+    port,
+    db_path=None,
+    db_workers=DB_WORKERS,
+    auth_workers=AUTH_WORKERS,
+    reminders=False,
+    shards=None,
+):
+    server = TaskApiServer(open_database(db_path, shards), db_workers, auth_workers, reminders)
+    host, port = await server.start(host, port)
+    print(f"Сервис задач слушает http://{host}:{port}")
+    try:
+        await server.serve_forever()
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="HTTP/JSON-сервис задач")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--db", help="путь к базе (по умолчанию data/smart_todo_db.sqlite)")
+    parser.add_argument("--db-workers", type=int, default=DB_WORKERS)
+    parser.add_argument("--auth-workers", type=int, default=AUTH_WORKERS)
+    parser.add_argument(
+        "--reminders", action="store_true", help="следить за сроками задач (GET /reminders)"
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        help="разложить задачи по стольким файлам (sharding.py); шардированная база"
+        " открывается так и без флага",
+    )
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(
+            serve(
+                args.host,
+                args.port,
+                args.db,
+                args.db_workers,
+                args.auth_workers,
+                args.reminders,
+                args.shards,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Перенос давно выполненных задач в архив и сжатие основной базы.
+
+Запуск из папки src/smart_todo_list (один проход до конца):
+
+    python archive.py --days 30
+    python archive.py --enable-vacuum    # один раз для базы, созданной до архива
+
+В приложении то же самое делает TaskArchiver в фоновом потоке.
+"""
+
+import argparse
+import sqlite3
+import sys
+import threading
+
+from database import ARCHIVE_BATCH_SIZE, Database
+
+# Через сколько дней после выполнения задача уходит в архив
+ARCHIVE_AFTER_DAYS = 30
+
+# Пауза после запуска приложения (с) перед первым проходом, между пачками
+# (чтобы не держать блокировку записи подряд) и между проходами
+ARCHIVE_START_DELAY = 60
+ARCHIVE_BATCH_PAUSE = 0.2
+ARCHIVE_INTERVAL = 60 * 60
+
+# Сколько свободных страниц возвращать системе за один вызов incremental_vacuum
+VACUUM_PAGES = 1000
+
+
+def archive_all(db, days=ARCHIVE_AFTER_DAYS, batch_size=ARCHIVE_BATCH_SIZE, pause=None, stop=None):
+    """Переносит в архив все подходящие задачи пачками и сжимает базу.
+
+    pause - секунды между пачками, stop - threading.Event для остановки
+    между пачками. Возвращает число перенесённых задач.
+    """
+    moved = 0
+    while stop is None or not stop.is_set():
+        count = db.archive_tasks(days, batch_size)
+        moved += count
+        if count < batch_size:
+            break
+        # Освободившиеся страницы возвращаем понемногу, не дожидаясь конца
+        db.incremental_vacuum(VACUUM_PAGES)
+        if pause and stop is not None and stop.wait(pause):
+            break
+    db.incremental_vacuum()
+    return moved
+
+
+class TaskArchiver:
+    """Фоновый поток, который раз в interval секунд переносит в архив задачи,
+    выполненные больше days дней назад (archive_all).
+
+    Поток работает со своим соединением из пула Database. stop() дожидается
+    конца текущей пачки - вызывается до Database.close().
+    """
+
+    def __init__(
+        self,
+        db,
+        days=ARCHIVE_AFTER_DAYS,
+        start_delay=ARCHIVE_START_DELAY,
+        interval=ARCHIVE_INTERVAL,
+        pause=ARCHIVE_BATCH_PAUSE,
+    ):
+        self.db = db
+        self.days = days
+        self.start_delay = start_delay
+        self.interval = interval
+        self.pause = pause
+        self.moved = 0
+        self.error = None  # последняя ошибка прохода; следующий проход повторит попытку
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="task-archiver", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self):
+        delay = self.start_delay
+        while not self._stop.wait(delay):
+            try:
+                self.moved += archive_all(self.db, self.days, pause=self.pause, stop=self._stop)
+                self.error = None
+            except sqlite3.Error as e:
+                self.error = e
+            delay = self.interval
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Перенос выполненных задач в архив")
+    parser.add_argument("--days", type=float, default=ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--db", help="путь к базе (по умолчанию data/smart_todo_db.sqlite)")
+    parser.add_argument(
+        "--enable-vacuum",
+        action="store_true",
+        help="включить auto_vacuum = INCREMENTAL (полный VACUUM базы)",
+    )
+    args = parser.parse_args(argv)
+
+    with Database(args.db) as db:
+        if args.enable_vacuum:
+            db.enable_incremental_vacuum()
+        moved = archive_all(db, args.days)
+        print(f"Перенесено в архив задач: {moved}, архив: {db.archive_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
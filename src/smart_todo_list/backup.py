@@ -0,0 +1,252 @@
+"""Резервные копии базы задач без остановки приложения.
+
+Запуск из папки src/smart_todo_list (одна копия с отчётом о ходе):
+
+    python backup.py
+    python backup.py --dir /mnt/backups --keep 14
+    python backup.py --verify ../../data/backups/smart_todo_db-20260101-120000-000.sqlite
+
+Копия снимается через SQLite backup API небольшими шагами (Database.backup),
+проверяется PRAGMA integrity_check и только потом получает своё имя; старые
+копии сверх keep удаляются. В приложении то же самое делает BackupService
+в фоновом потоке.
+"""
+
+import argparse
+import datetime
+import glob
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from database import BACKUP_PAGES, BACKUP_STEP_PAUSE, Database
+
+# Папка копий рядом с файлом базы
+BACKUP_DIR = "backups"
+
+# Сколько последних копий хранить
+BACKUP_KEEP = 7
+
+# Пауза после запуска приложения (с) перед первой копией и между копиями
+BACKUP_START_DELAY = 5 * 60
+BACKUP_INTERVAL = 6 * 60 * 60
+
+# Расширение копии, которая ещё пишется или не прошла проверку
+PARTIAL_SUFFIX = ".part"
+
+
+class BackupError(Exception):
+    """Копия не снята: повреждена или прервана"""
+
+
+class BackupCancelled(BackupError):
+    """Копирование остановлено (BackupService.stop)"""
+
+
+class BackupReport:
+    """Итог одной копии: файл, число страниц, размер и время"""
+
+    __slots__ = ("path", "pages", "size", "seconds")
+
+    def __init__(self, path, pages, size, seconds):
+        self.path = path
+        self.pages = pages
+        self.size = size
+        self.seconds = seconds
+
+    @property
+    def throughput(self):
+        """Скорость копирования, байт в секунду"""
+        return self.size / self.seconds if self.seconds else float("inf")
+
+    def __str__(self):
+        return (
+            f"{self.path}: {self.pages} страниц, {self.size / 2**20:.1f} МБ"
+            f" за {self.seconds:.2f} с ({self.throughput / 2**20:.1f} МБ/с)"
+        )
+
+
+def backup_dir(db):
+    return os.path.join(os.path.dirname(os.path.abspath(db.db_path)), BACKUP_DIR)
+
+
+def backup_name(db_path, now=None):
+    """Имя копии: имя базы и время снятия. Имена сортируются по времени"""
+    now = now or datetime.datetime.now()
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    return f"{stem}-{now:%Y%m%d-%H%M%S}-{now.microsecond // 1000:03d}.sqlite"
+
+
+def list_backups(directory, db_path):
+    """Копии базы в папке, от старых к новым"""
+    stem = os.path.splitext(os.path.basename(db_path))[0]
+    return sorted(glob.glob(os.path.join(glob.escape(directory), f"{stem}-*.sqlite")))
+
+
+def rotate_backups(directory, db_path, keep=BACKUP_KEEP):
+    """Удаляет копии сверх keep последних; возвращает удалённые пути"""
+    backups = list_backups(directory, db_path)
+    removed = backups[: max(len(backups) - keep, 0)]
+    for path in removed:
+        os.remove(path)
+    return removed
+
+
+def verify_backup(path):
+    """Проверяет копию PRAGMA integrity_check.
+
+    Возвращает список найденных ошибок; пустой список - копия цела.
+    """
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            result = [row[0] for row in conn.execute("PRAGMA integrity_check")]
+        finally:
+            conn.close()
+    except sqlite3.DatabaseError as e:
+        return [str(e)]
+    return [] if result == ["ok"] else result
+
+
+def create_backup(
+    db,
+    directory=None,
+    keep=BACKUP_KEEP,
+    pages=BACKUP_PAGES,
+    pause=BACKUP_STEP_PAUSE,
+    progress=None,
+    stop=None,
+):
+    """Снимает копию базы в папку directory (по умолчанию backups рядом с базой).
+
+    Копия пишется во временный файл и переименовывается, только если прошла
+    проверку, поэтому в папке не бывает недописанных копий. progress(copied,
+    total) сообщает о ходе копирования в страницах; stop - threading.Event,
+    по которому копирование прерывается (BackupCancelled).
+    Возвращает BackupReport.
+    """
+    directory = directory or backup_dir(db)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, backup_name(db.db_path))
+    partial = path + PARTIAL_SUFFIX
+
+    def step(copied, total):
+        if stop is not None and stop.is_set():
+            raise BackupCancelled("копирование остановлено")
+        if progress is not None:
+            progress(copied, total)
+
+    started = time.perf_counter()
+    try:
+        total = db.backup(partial, pages, pause, step)
+        problems = verify_backup(partial)
+        if problems:
+            raise BackupError(f"копия повреждена: {'; '.join(problems[:5])}")
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    seconds = time.perf_counter() - started
+    os.replace(partial, path)
+    rotate_backups(directory, db.db_path, keep)
+    return BackupReport(path, total, os.path.getsize(path), seconds)
+
+
+class BackupService:
+    """Фоновый поток, который раз в interval секунд снимает копию базы
+    (create_backup) и хранит keep последних.
+
+    progress - (скопировано, всего) страниц текущей копии, last - BackupReport
+    последней удачной копии, error - ошибка последней попытки. stop()
+    прерывает копирование на ближайшем шаге и дожидается потока -
+    вызывается до Database.close().
+    """
+
+    def __init__(
+        self,
+        db,
+        directory=None,
+        keep=BACKUP_KEEP,
+        start_delay=BACKUP_START_DELAY,
+        interval=BACKUP_INTERVAL,
+        pause=BACKUP_STEP_PAUSE,
+    ):
+        self.db = db
+        self.directory = directory
+        self.keep = keep
+        self.start_delay = start_delay
+        self.interval = interval
+        self.pause = pause
+        self.progress = None
+        self.last = None
+        self.error = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="db-backup", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _on_progress(self, copied, total):
+        self.progress = (copied, total)
+
+    def _run(self):
+        delay = self.start_delay
+        while not self._stop.wait(delay):
+            try:
+                self.last = create_backup(
+                    self.db,
+                    self.directory,
+                    self.keep,
+                    pause=self.pause,
+                    progress=self._on_progress,
+                    stop=self._stop,
+                )
+                self.error = None
+            except BackupCancelled:
+                break
+            except (BackupError, sqlite3.Error, OSError) as e:
+                self.error = e
+            finally:
+                self.progress = None
+            delay = self.interval
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Резервная копия базы задач")
+    parser.add_argument("--db", help="путь к базе (по умолчанию data/smart_todo_db.sqlite)")
+    parser.add_argument("--dir", help="папка копий (по умолчанию backups рядом с базой)")
+    parser.add_argument("--keep", type=int, default=BACKUP_KEEP)
+    parser.add_argument("--pages", type=int, default=BACKUP_PAGES, help="страниц за шаг")
+    parser.add_argument("--pause", type=float, default=BACKUP_STEP_PAUSE, help="пауза между шагами, с")
+    parser.add_argument("--verify", metavar="PATH", help="только проверить готовую копию")
+    args = parser.parse_args(argv)
+
+    if args.verify:
+        problems = verify_backup(args.verify)
+        print("\n".join(problems) if problems else "Копия цела")
+        return 1 if problems else 0
+
+    def progress(copied, total):
+        print(f"\r{copied}/{total} страниц", end="", flush=True)
+
+    with Database(args.db) as db:
+        try:
+            report = create_backup(
+                db, args.dir, args.keep, args.pages, args.pause, progress
+            )
+        except BackupError as e:
+            print(f"\nОшибка: {e}", file=sys.stderr)
+            return 1
+    print(f"\nКопия снята: {report}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
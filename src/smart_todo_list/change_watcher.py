@@ -0,0 +1,60 @@
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+# Как часто (мс) проверять, не записал ли что-то в базу другой процесс
+POLL_INTERVAL_MS = 1000
+
+
+class ChangeWatcher(QObject):
+    """Следит за изменениями задач пользователя, сделанными в обход окна.
+
+    Раз в POLL_INTERVAL_MS читается PRAGMA data_version - это не обращение
+    к таблицам, и оно меняется, только когда запись зафиксировало другое
+    соединение (другой экземпляр приложения, HTTP-сервис, скрипт импорта).
+    Тогда из журнала изменений читается разница (Database.changes_since) и
+    отправляется сигналом changed. Если журнал уже обрезан, отправляется
+    reset - список нужно перечитать целиком.
+    """
+
+    changed = pyqtSignal(list)  # [(task_id, строка задачи или None - удалена)]
+    reset = pyqtSignal()
+
+    def __init__(self, db, interval_ms=POLL_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.user_id = None
+        self.version = 0
+        self._data_version = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.poll)
+
+    def watch(self, user_id):
+        """Начинает следить за задачами пользователя с текущего момента.
+
+        Вызывается до чтения списка: изменения, сделанные во время чтения,
+        придут ещё раз, а их повторное применение ничего не меняет.
+        """
+        self.user_id = user_id
+        self.version = self.db.change_version(user_id)
+        self._data_version = self.db.data_version(user_id)
+        self._timer.start()
+
+    def stop(self):
+        self._timer.stop()
+        self.user_id = None
+
+    def poll(self):
+        """Проверяет базу; возвращает True, если были изменения"""
+        if self.user_id is None:
+            return False
+        data_version = self.db.data_version(self.user_id)
+        if data_version == self._data_version:
+            return False
+        self._data_version = data_version
+        self.version, changes = self.db.changes_since(self.user_id, self.version)
+        if changes is None:
+            self.reset.emit()
+        elif changes:
+            self.changed.emit(changes)
+        return changes != []
@@ -1,142 +1,1228 @@
+import functools
+import hashlib
+import itertools
 import os
+import random
+import re
+import secrets
 import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+
 import bcrypt
 
+from instrumentation import instrument_methods, metrics
+from migrations import migrate
+
+
+# Сколько миллисекунд SQLite ждёт, пока другое соединение или процесс
+# освободит базу, прежде чем вернуть «database is locked»
+BUSY_TIMEOUT_MS = 2000
+
+# Сколько раз повторять запись, если база всё равно оказалась занята, и пауза
+# перед первым повтором (секунды; дальше удваивается, со случайным разбросом)
+WRITE_RETRIES = 3
+RETRY_BASE_DELAY = 0.05
+
+# Стоимость bcrypt (log2 числа раундов) для новых хешей паролей. Хеши с
+# другой стоимостью пересчитываются при следующем успешном входе
+BCRYPT_ROUNDS = 12
+
+# Сколько секунд действует токен сессии («запомнить меня», HTTP-сервис)
+SESSION_TTL = 30 * 24 * 60 * 60
+
+# Настройки SQLite, которые применяются к каждому новому соединению один раз
+PRAGMAS = (
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA cache_size = -16000",  # около 16 МБ кэша страниц
+    "PRAGMA mmap_size = 268435456",  # 256 МБ
+    "PRAGMA temp_store = MEMORY",
+)
+
+# Сколько подготовленных запросов sqlite3 держит в кэше на одно соединение
+STATEMENT_CACHE_SIZE = 128
+
+# Сколько задач читается из базы за один запрос при постраничной загрузке
+TASKS_PAGE_SIZE = 500
+
+# Поля задачи, которые можно менять через update_tasks
+TASK_UPDATE_FIELDS = ("title", "description", "is_done", "due_date", "priority")
+
+# Сколько задач записывается одним executemany при импорте
+IMPORT_BATCH_SIZE = 10_000
+
+# Сколько строк курсор читает из SQLite за раз при экспорте
+EXPORT_ARRAY_SIZE = 1000
+
+# Сколько последних записей журнала изменений задач (task_changes) хранится;
+# более старые удаляются при открытии базы
+CHANGE_LOG_KEEP = 100_000
+
+# Сколько задач переносится в архив одной транзакцией (archive_tasks)
+ARCHIVE_BATCH_SIZE = 1000
+
+# Резервная копия (backup): страниц за один шаг копирования и пауза между
+# шагами (с). Если другие соединения писали в базу так часто, что копия
+# начиналась заново больше BACKUP_MAX_RESTARTS раз, остаток копируется одним шагом
+BACKUP_PAGES = 256
+BACKUP_STEP_PAUSE = 0.01
+BACKUP_MAX_RESTARTS = 3
+
+# Сколько задач по умолчанию возвращает поиск
+SEARCH_LIMIT = 50
+
+# Слова короче этого ищутся целиком, а не как префикс: для них в tasks_fts
+# нет префиксного индекса, и поиск по одной букве перебирал бы весь словарь
+SEARCH_MIN_PREFIX = 2
+
+_SEARCH_TOKEN_RE = re.compile(r"\w+")
+
+# Поиск похожих задач (similar_tasks): сколько задач возвращается и сколько
+# кандидатов из индекса task_minhash проверяется точной мерой Жаккара
+SIMILAR_LIMIT = 5
+SIMILAR_CANDIDATES = 100
+
+# Сколько задач индексируется одной транзакцией при полной индексации
+# пользователя в task_minhash (транзакция не держит блокировку записи долго)
+SIMILARITY_BATCH_SIZE = 10_000
+
+# Время из столбца TEXT (created_at, due_date) в секундах Unix. julianday, а
+# не unixepoch: он есть в любой версии SQLite
+_UNIX_SECONDS = "CAST(ROUND((julianday({}) - 2440587.5) * 86400) AS INTEGER)"
+
+
+def _retry_when_busy(method):
+    """Повторяет запись, если база занята другим соединением или процессом.
+
+    Метод должен выполнять всю транзакцию сам: при ошибке она откатывается
+    целиком, поэтому повтор безопасен. Паузы между повторами растут
+    экспоненциально; после WRITE_RETRIES повторов ошибка передаётся дальше.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                return method(self, *args, **kwargs)
+            except sqlite3.OperationalError as e:
+                if attempt == WRITE_RETRIES or not _is_busy(e):
+                    raise
+            time.sleep(RETRY_BASE_DELAY * 2**attempt * random.uniform(0.5, 1.5))
+
+    return wrapper
 
+
+class _BackupRestarted(Exception):
+    """Копия базы начиналась заново слишком часто (Database.backup)"""
+
+
+def _utc_text(seconds):
+    """Секунды Unix в формате CURRENT_TIMESTAMP (UTC)"""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(seconds))
+
+
+def _is_busy(error):
+    return error.sqlite_errorcode & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
+
+
+@instrument_methods("db", exclude=("close",))
 class Database:
-    def __init__(self):
-        # Корень проекта - на два уровня выше этого файла (database.py лежит в src/smart_todo_list/)
-        base_dir = os.path.dirname(
-            os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        )
+    """Доступ к базе задач.
 
-        # Путь к папке для базы данных (data в корне проекта)
-        data_dir = os.path.join(base_dir, "data")
+    Несколько экземпляров приложения (и другие процессы) могут работать с
+    одной базой одновременно: журнал WAL не даёт записи блокировать чтение,
+    транзакции записи начинаются с BEGIN IMMEDIATE (блокировка берётся сразу,
+    а не посреди транзакции), занятая база ожидается BUSY_TIMEOUT_MS, а
+    методы записи повторяются с паузой (_retry_when_busy).
+    """
 
-        # Создаем папку, если ее нет
-        if not os.path.exists(data_dir):
-            os.makedirs(data_dir)
+    def __init__(self, db_path=None, bcrypt_rounds=BCRYPT_ROUNDS, archive_path=None):
+        self.bcrypt_rounds = bcrypt_rounds
 
-        # Путь к файлу базы данных SQLite
-        self.db_path = os.path.join(data_dir, "smart_todo_db.sqlite")
+        # Пул соединений: по одному соединению на поток, переиспользуется между вызовами
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
 
-        # Путь к файлу схемы SQL относительно этого файла
-        schema_path = os.path.join(
-            os.path.dirname(os.path.abspath(__file__)), "database", "schema.sql"
-        )
+        if db_path is None:
+            # Корень проекта - на два уровня выше этого файла (database.py лежит в src/smart_todo_list/)
+            base_dir = os.path.dirname(
+                os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            )
+
+            # Путь к папке для базы данных (data в корне проекта)
+            data_dir = os.path.join(base_dir, "data")
+
+            # Создаем папку, если ее нет
+            if not os.path.exists(data_dir):
+                os.makedirs(data_dir)
+
+            # Путь к файлу базы данных SQLite
+            db_path = os.path.join(data_dir, "smart_todo_db.sqlite")
+
+        self.db_path = db_path
+        # Архив выполненных задач - отдельный файл рядом с базой (archive_tasks)
+        self.archive_path = archive_path or os.path.splitext(db_path)[0] + ".archive.sqlite"
 
         # Если база не существует, создаем ее
         if not os.path.exists(self.db_path):
-            self._create_db(schema_path)
+            self._create_db(self._schema_path())
+
+        # Обновляем схему существующей базы до последней версии (PRAGMA user_version)
+        migrate(self._get_connection())
+        self.trim_changes()
+
+    @staticmethod
+    def _schema_path():
+        # Путь к файлу схемы SQL относительно этого файла
+        return os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), "database", "schema.sql"
+        )
 
     def _create_db(self, schema_path):
-        with sqlite3.connect(self.db_path) as conn:
-            with open(schema_path, "r", encoding="utf-8") as f:
-                sql_script = f.read()
-            conn.executescript(sql_script)
+        with open(schema_path, "r", encoding="utf-8") as f:
+            sql_script = f.read()
+        conn = self._get_connection()
+        # Страницы, освободившиеся после переноса задач в архив, возвращает
+        # incremental_vacuum. Переключение WAL при подключении уже записало
+        # заголовок файла, поэтому режим применяет VACUUM - пока база пуста,
+        # он ничего не стоит
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        conn.executescript(sql_script)
+
+    def _connect(self):
+        # check_same_thread=False нужен только для close(): каждое соединение
+        # используется лишь тем потоком, который его открыл
+        # isolation_level="IMMEDIATE": неявная транзакция перед INSERT/UPDATE/
+        # DELETE начинается с BEGIN IMMEDIATE. С обычным BEGIN два процесса,
+        # читающие в своих транзакциях, не могли бы оба перейти к записи, и
+        # один получал бы «database is locked» без ожидания
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            isolation_level="IMMEDIATE",
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+        )
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        metrics.install(conn)
+        return conn
+
+    def _get_connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """Закрывает все соединения пула (вызывается при завершении приложения)"""
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+            # Старые thread-local ссылки указывают на закрытые соединения
+            self._local = threading.local()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
 
     def verify_user(self, login, password):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        try:
-            cursor.execute("SELECT password_hash FROM users WHERE login = ?", (login,))
-            result = cursor.fetchone()
-            if not result:
-                return False
-            stored_hash = result[0].encode("utf-8")
-            return bcrypt.checkpw(password.encode("utf-8"), stored_hash)
-        finally:
-            cursor.close()
-            conn.close()
+        """Проверяет пароль и возвращает id пользователя (None - неверный логин или пароль).
+
+        Если хеш посчитан с другой стоимостью bcrypt, чем bcrypt_rounds, он
+        пересчитывается и сохраняется: пароль известен только при входе.
+        """
+        conn = self._get_connection()
+        result = conn.execute(
+            "SELECT id, password_hash FROM users WHERE login = ?", (login,)
+        ).fetchone()
+        if not result:
+            return None
+        user_id, stored_hash = result
+        with metrics.measure("bcrypt.checkpw"):
+            if not bcrypt.checkpw(password.encode("utf-8"), stored_hash.encode("utf-8")):
+                return None
+        if _bcrypt_rounds(stored_hash) != self.bcrypt_rounds:
+            self._update_password_hash(user_id, stored_hash, self._hash_password(password))
+        return user_id
+
+    def _hash_password(self, password):
+        with metrics.measure("bcrypt.hashpw"):
+            hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt(self.bcrypt_rounds))
+        return hashed.decode("utf-8")
+
+    @_retry_when_busy
+    def _update_password_hash(self, user_id, old_hash, new_hash):
+        # Условие на старый хеш: пароль, сменённый тем временем, не затирается
+        conn = self._get_connection()
+        with conn:
+            conn.execute(
+                "UPDATE users SET password_hash = ? WHERE id = ? AND password_hash = ?",
+                (new_hash, user_id, old_hash),
+            )
 
     def register_user(self, login, email, password):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        hashed = self._hash_password(password)
         try:
-            hashed = bcrypt.hashpw(password.encode("utf-8"), bcrypt.gensalt())
-            cursor.execute(
+            self._insert_user(login, email, hashed)
+        except sqlite3.IntegrityError as e:
+            raise RuntimeError(f"Ошибка регистрации пользователя: {e}") from e
+
+    @_retry_when_busy
+    def _insert_user(self, login, email, password_hash):
+        # Отдельно от register_user: повтор записи не пересчитывает bcrypt
+        conn = self._get_connection()
+        with conn:
+            conn.execute(
                 "INSERT INTO users (login, email, password_hash) VALUES (?, ?, ?)",
-                (login, email, hashed.decode("utf-8")),
+                (login, email, password_hash),
             )
-            conn.commit()
-        except sqlite3.IntegrityError as e:
-            conn.rollback()
-            raise RuntimeError(f"Ошибка регистрации пользователя: {e}")
-        finally:
-            cursor.close()
-            conn.close()
+
+    @_retry_when_busy
+    def create_session(self, user_id, ttl=SESSION_TTL):
+        """Создаёт сессию пользователя и возвращает её токен.
+
+        В базе хранится только хеш токена. Истёкшие сессии удаляются здесь же.
+        """
+        token = secrets.token_urlsafe(32)
+        now = int(time.time())
+        conn = self._get_connection()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "INSERT INTO sessions (token_hash, user_id, expires_at) VALUES (?, ?, ?)",
+                (_token_hash(token), user_id, now + ttl),
+            )
+        return token
+
+    def check_session(self, token):
+        """id пользователя по токену сессии или None, если токен неизвестен или истёк"""
+        row = self._get_connection().execute(
+            "SELECT user_id FROM sessions WHERE token_hash = ? AND expires_at > ?",
+            (_token_hash(token), int(time.time())),
+        ).fetchone()
+        return row[0] if row else None
+
+    @_retry_when_busy
+    def delete_session(self, token):
+        conn = self._get_connection()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE token_hash = ?", (_token_hash(token),))
 
     def get_tasks(self, user_id):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        try:
-            cursor.execute(
-                "SELECT id, title, description, is_done FROM tasks WHERE user_id = ?",
-                (user_id,),
+        conn = self._get_connection()
+        return conn.execute(
+            "SELECT id, title, description, is_done FROM tasks WHERE user_id = ? ORDER BY id",
+            (user_id,),
+        ).fetchall()
+
+    def iter_tasks(self, user_id, after_id=0, limit=None):
+        """Задачи пользователя с id больше after_id в порядке возрастания id.
+
+        Читает базу страницами по TASKS_PAGE_SIZE (keyset-пагинация по id),
+        поэтому в памяти одновременно находится не больше одной страницы.
+        limit ограничивает общее число задач, None - до конца списка.
+        """
+        conn = self._get_connection()
+        while limit is None or limit > 0:
+            page_size = TASKS_PAGE_SIZE if limit is None else min(limit, TASKS_PAGE_SIZE)
+            rows = conn.execute(
+                "SELECT id, title, description, is_done FROM tasks"
+                " WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (user_id, after_id, page_size),
+            ).fetchall()
+            yield from rows
+            if len(rows) < page_size:
+                return
+            after_id = rows[-1][0]
+            if limit is not None:
+                limit -= len(rows)
+
+    def query_tasks(self, query):
+        """Задачи по запросу TaskQuery: фильтры, сортировка и страница - в SQL"""
+        sql, params = query.compile()
+        return self._get_connection().execute(sql, params).fetchall()
+
+    def get_tasks_by_ids(self, task_ids):
+        """Задачи с данными id в том же порядке; удалённые пропускаются"""
+        if not task_ids:
+            return []
+        placeholders = ",".join("?" * len(task_ids))
+        rows = self._get_connection().execute(
+            "SELECT id, title, description, is_done FROM tasks"
+            f" WHERE id IN ({placeholders})",
+            task_ids,
+        ).fetchall()
+        by_id = {row[0]: row for row in rows}
+        return [by_id[task_id] for task_id in task_ids if task_id in by_id]
+
+    def rank_columns(self, user_id):
+        """Невыполненные задачи пользователя для ранжирования (ranking.py).
+
+        Возвращает четыре строки с числами через запятую - id, срок,
+        приоритет и время создания (срок и время создания - секунды Unix,
+        срок 0 - без срока); порядок задач во всех строках один и тот же.
+        sqlite3 создаёт объект Python на каждое значение строки результата,
+        а четыре строки разбираются в массивы NumPy целиком, в несколько раз
+        быстрее.
+
+        Читается только индекс idx_tasks_user_open_rank: без статистики
+        ANALYZE планировщик выбрал бы idx_tasks_user_done и читал бы каждую
+        строку таблицы.
+        """
+        row = self._get_connection().execute(
+            "SELECT group_concat(id), group_concat(IFNULL("
+            + _UNIX_SECONDS.format("due_date")
+            + ", 0)), group_concat(priority), group_concat("
+            + _UNIX_SECONDS.format("created_at")
+            + ") FROM tasks INDEXED BY idx_tasks_user_open_rank"
+            " WHERE user_id = ? AND is_done = 0",
+            (user_id,),
+        ).fetchone()
+        return tuple(column or "" for column in row)
+
+    def get_stats(self, user_id):
+        """(всего, невыполненных, выполненных) задач пользователя без архива.
+
+        Счётчики ведут триггеры на tasks (таблица user_stats), поэтому это
+        одна строка по ключу, сколько бы задач ни было у пользователя.
+        """
+        row = self._get_connection().execute(
+            "SELECT total, done FROM user_stats WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        total, done = row or (0, 0)
+        return total, total - done, done
+
+    def search_tasks(self, user_id, query, limit=SEARCH_LIMIT, offset=0, is_done=None):
+        """Полнотекстовый поиск задач пользователя по названию и описанию.
+
+        Каждое слово запроса ищется как префикс («отч» найдёт «отчёт»), все
+        слова должны встретиться; «ё» и «е» не различаются. Сначала идут
+        задачи, у которых все слова нашлись в названии, затем остальные;
+        внутри каждой группы новые задачи выше. limit и offset задают
+        страницу результатов, is_done (0 или 1) оставляет задачи с этим
+        статусом.
+
+        bm25 не используется: для коротких префиксов он считает IDF по всему
+        индексу (10-20 мс на миллионе задач), а раз все слова запроса
+        обязательны, IDF у найденных задач одинаков и порядок по сути
+        определяется тем, где совпали слова - в названии или в описании.
+        """
+        match = build_match_query(user_id, query)
+        if match is None:
+            return []
+        status = "" if is_done is None else " AND t.is_done = ?"
+        params = [match] if is_done is None else [match, int(is_done)]
+        conn = self._get_connection()
+        return conn.execute(
+            "SELECT t.id, t.title, t.description, t.is_done"
+            " FROM tasks_fts JOIN tasks AS t ON t.id = tasks_fts.rowid"
+            f" WHERE tasks_fts MATCH ?{status}"
+            " ORDER BY t.id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?) DESC,"
+            " t.id DESC LIMIT ? OFFSET ?",
+            (*params, build_match_query(user_id, query, "title"), limit, offset),
+        ).fetchall()
+
+    def similar_tasks(self, user_id, title, description="", limit=SIMILAR_LIMIT, is_done=None):
+        """Задачи пользователя, похожие на задачу с таким названием и описанием.
+
+        Возвращает до limit строк (id, title, description, is_done, сходство)
+        по убыванию сходства - меры Жаккара триграмм текста задачи (не меньше
+        DUPLICATE_THRESHOLD из similarity.py). is_done (0 или 1) оставляет
+        задачи с этим статусом.
+
+        Кандидаты читаются из индекса task_minhash по хешам LSH-полос - это
+        BANDS запросов по первичному ключу, сколько бы задач ни было у
+        пользователя; точно сравниваются не больше SIMILAR_CANDIDATES задач,
+        совпавших по наибольшему числу полос.
+        """
+        # similarity импортирует NumPy - не при запуске приложения
+        from similarity import DUPLICATE_THRESHOLD, band_hashes, jaccard, normalize, trigrams
+
+        self._sync_similarity(user_id)
+        text = normalize(title, description)
+        conn = self._get_connection()
+        hits = Counter()
+        for band in set(band_hashes([text])[0].tolist()) - {0}:
+            hits.update(
+                row[0]
+                for row in conn.execute(
+                    "SELECT task_id FROM task_minhash WHERE user_id = ? AND band = ?"
+                    " ORDER BY task_id DESC LIMIT ?",
+                    (user_id, band, SIMILAR_CANDIDATES),
+                )
             )
-            tasks = cursor.fetchall()
-            return tasks
-        finally:
-            cursor.close()
-            conn.close()
+        grams = trigrams(text)
+        found = []
+        for task in self.get_tasks_by_ids([task_id for task_id, _ in hits.most_common(SIMILAR_CANDIDATES)]):
+            if is_done is not None and task[3] != is_done:
+                continue
+            score = jaccard(grams, trigrams(normalize(task[1], task[2])))
+            if score >= DUPLICATE_THRESHOLD:
+                found.append((*task, score))
+        found.sort(key=lambda task: (-task[4], -task[0]))
+        return found[:limit]
+
+    def duplicate_groups(self, user_id, is_done=0):
+        """Группы похожих задач пользователя для объединения (merge_tasks).
+
+        Группа - список id по возрастанию: первой идёт самая ранняя задача,
+        остальные похожи на неё не меньше чем на MERGE_THRESHOLD.
+        is_done (0, 1 или None - все) - какие задачи объединяются; по
+        умолчанию невыполненные: выполненная задача с тем же названием
+        обычно не дубликат, а дело, которое пришлось повторить.
+
+        Сравниваются только задачи с общим хешем LSH-полосы - каждая с
+        первой задачей своей корзины, поэтому сравнений порядка числа задач,
+        а не его квадрата.
+        """
+        from similarity import MERGE_THRESHOLD, jaccard, normalize, trigrams
+
+        self._sync_similarity(user_id)
+        conn = self._get_connection()
+        status = "" if is_done is None else " AND is_done = ?"
+        params = (user_id,) if is_done is None else (user_id, int(is_done))
+        texts = {
+            task_id: normalize(title, description)
+            for task_id, title, description in conn.execute(
+                f"SELECT id, title, description FROM tasks WHERE user_id = ?{status}", params
+            )
+        }
+
+        # Мера Жаккара не больше отношения меньшего множества к большему: пары
+        # задач очень разной длины отсекаются без построения множеств
+        sizes = {task_id: len(trigrams(text)) for task_id, text in texts.items()}
+        parent = {}  # непересекающиеся множества задач; у корня группы записи нет
+
+        def find(task_id):
+            while task_id in parent:
+                parent[task_id] = parent.get(parent[task_id], parent[task_id])
+                task_id = parent[task_id]
+            return task_id
+
+        rows = conn.execute(
+            "SELECT band, task_id FROM task_minhash WHERE user_id = ? ORDER BY band, task_id",
+            (user_id,),
+        )
+        for _, bucket in itertools.groupby(rows, key=lambda row: row[0]):
+            bucket = [task_id for _, task_id in bucket if task_id in texts]
+            if len(bucket) < 2:
+                continue
+            first, first_grams = bucket[0], None
+            for other in bucket[1:]:
+                root, other_root = find(first), find(other)
+                if root == other_root:
+                    continue
+                if texts[first] != texts[other]:
+                    smaller, larger = sorted((sizes[first], sizes[other]))
+                    if smaller < MERGE_THRESHOLD * larger:
+                        continue
+                    if first_grams is None:
+                        first_grams = trigrams(texts[first])
+                    if jaccard(first_grams, trigrams(texts[other])) < MERGE_THRESHOLD:
+                        continue
+                parent[max(root, other_root)] = min(root, other_root)
+
+        members = defaultdict(list)
+        for task_id in parent:
+            members[find(task_id)].append(task_id)
+        groups = []
+        for root, group in sorted(members.items()):
+            # Похожесть не транзитивна: в группе остаются задачи, похожие на
+            # ту, что останется после объединения
+            root_grams = trigrams(texts[root])
+            duplicates = [
+                task_id
+                for task_id in sorted(group)
+                if texts[task_id] == texts[root]
+                or jaccard(root_grams, trigrams(texts[task_id])) >= MERGE_THRESHOLD
+            ]
+            if duplicates:
+                groups.append([root, *duplicates])
+        return groups
+
+    @_retry_when_busy
+    def merge_tasks(self, user_id, groups):
+        """Объединяет группы задач пользователя (списки id, например из
+        duplicate_groups) одной транзакцией; возвращает число удалённых задач.
 
-    def add_task(self, user_id, title, description):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        От группы остаётся первая задача, остальные удаляются. Оставшаяся
+        задача получает наибольший приоритет и ближайший срок группы,
+        остаётся невыполненной, если не выполнена хоть одна задача группы, а
+        пустое описание заменяется первым непустым описанием из удалённых.
+        Чужие задачи не трогаются.
+        """
+        conn = self._get_connection()
+        deleted = 0
+        with conn:
+            for keep, *duplicates in groups:
+                placeholders = ",".join("?" * len(duplicates))
+                rows = conn.execute(
+                    "DELETE FROM tasks"
+                    f" WHERE user_id = ? AND id IN ({placeholders}) AND id != ?"
+                    " AND EXISTS (SELECT 1 FROM tasks WHERE id = ? AND user_id = ?)"
+                    " RETURNING id, description, is_done, due_date, priority",
+                    (user_id, *duplicates, keep, keep, user_id),
+                ).fetchall()
+                if not rows:
+                    continue
+                rows.sort()
+                due_date = min((row[3] for row in rows if row[3] is not None), default=None)
+                conn.execute(
+                    "UPDATE tasks SET"
+                    " description = CASE WHEN IFNULL(description, '') = '' THEN ?"
+                    " ELSE description END,"
+                    " is_done = MIN(is_done, ?),"
+                    " due_date = COALESCE(MIN(due_date, ?), due_date, ?),"
+                    " priority = MAX(priority, ?)"
+                    " WHERE id = ?",
+                    (
+                        next((row[1] for row in rows if row[1]), ""),
+                        min(row[2] for row in rows),
+                        due_date,
+                        due_date,
+                        max(row[4] for row in rows),
+                        keep,
+                    ),
+                )
+                deleted += len(rows)
+        return deleted
+
+    def _sync_similarity(self, user_id):
+        """Доводит индекс похожих задач пользователя (task_minhash) до журнала
+        изменений задач: пересчитываются подписи только задач, изменённых
+        после прошлой индексации. Если пользователь ещё не индексировался или
+        журнал обрезан дальше его версии, его задачи индексируются заново."""
+        row = self._get_connection().execute(
+            "SELECT version FROM task_minhash_state WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is not None and row[0] >= self.change_version():
+            return
+        if row is None or not self._index_changed_tasks(user_id):
+            self._reindex_similarity(user_id)
+
+    def _index_changed_tasks(self, user_id):
+        """Пересчитывает подписи задач пользователя из журнала изменений одной
+        транзакцией. Возвращает False, если журнала для этого не хватает"""
+        conn = self._get_connection()
+        conn.commit()
+        # Версии читаются под блокировкой записи: журнал не меняется, пока
+        # изменения переносятся в индекс
+        self._begin_immediate(conn)
         try:
-            cursor.execute(
+            row = conn.execute(
+                "SELECT version FROM task_minhash_state WHERE user_id = ?", (user_id,)
+            ).fetchone()
+            oldest = conn.execute("SELECT MIN(version) FROM task_changes").fetchone()[0]
+            latest = self.change_version()
+            # Записи журнала после версии индекса уже удалил trim_changes
+            if row is None or (latest > row[0] and (oldest is None or oldest > row[0] + 1)):
+                conn.rollback()
+                return False
+            changed = "SELECT task_id FROM task_changes WHERE user_id = ? AND version > ?"
+            conn.execute(
+                f"DELETE FROM task_minhash WHERE user_id = ? AND task_id IN ({changed})",
+                (user_id, user_id, row[0]),
+            )
+            tasks = conn.execute(
+                f"SELECT id, title, description FROM tasks WHERE user_id = ? AND id IN ({changed})",
+                (user_id, user_id, row[0]),
+            ).fetchall()
+            conn.executemany(_INSERT_BANDS, _band_rows(user_id, tasks))
+            conn.execute(
+                "UPDATE task_minhash_state SET version = ? WHERE user_id = ?", (latest, user_id)
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return True
+
+    def _reindex_similarity(self, user_id):
+        """Индексирует все задачи пользователя заново, пачками по SIMILARITY_BATCH_SIZE"""
+        # Версия читается до задач: правки, сделанные во время индексации,
+        # догонит следующий _sync_similarity
+        version = self.change_version()
+        self._write_similarity(
+            "DELETE FROM task_minhash_state WHERE user_id = ?", [(user_id,)]
+        )
+        self._write_similarity("DELETE FROM task_minhash WHERE user_id = ?", [(user_id,)])
+        for batch in _batches(self.iter_tasks(user_id), SIMILARITY_BATCH_SIZE):
+            self._write_similarity(_INSERT_BANDS, list(_band_rows(user_id, batch)))
+        self._write_similarity(
+            "INSERT OR REPLACE INTO task_minhash_state (user_id, version) VALUES (?, ?)",
+            [(user_id, version)],
+        )
+
+    @_retry_when_busy
+    def _write_similarity(self, sql, rows):
+        conn = self._get_connection()
+        with conn:
+            conn.executemany(sql, rows)
+
+    @_retry_when_busy
+    def add_task(self, user_id, title, description, due_date=None, priority=0):
+        """Добавляет задачу и возвращает её id. due_date - срок в формате
+        created_at или None, priority - от 0 (нет) до 3 (высокий)"""
+        conn = self._get_connection()
+        with conn:
+            cursor = conn.execute(
+                "INSERT INTO tasks (user_id, title, description, due_date, priority)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (user_id, title, description, due_date, priority),
+            )
+        return cursor.lastrowid
+
+    @_retry_when_busy
+    def add_tasks(self, user_id, tasks):
+        """Добавляет задачи (title, description) одной транзакцией, возвращает их число"""
+        tasks = list(tasks)  # при повторе записи задачи понадобятся ещё раз
+        conn = self._get_connection()
+        with conn:
+            cursor = conn.executemany(
                 "INSERT INTO tasks (user_id, title, description) VALUES (?, ?, ?)",
-                (user_id, title, description),
+                ((user_id, title, description) for title, description in tasks),
+            )
+        return cursor.rowcount
+
+    def import_tasks(self, user_id, tasks, batch_size=IMPORT_BATCH_SIZE, defer_indexes=False):
+        """Импортирует задачи (title, description, is_done, created_at) из итератора.
+
+        created_at = None - время импорта. Возвращает число импортированных
+        задач, подробности - в insert_tasks.
+        """
+        return self.insert_tasks(
+            ((user_id, *task) for task in tasks), batch_size, defer_indexes
+        )
+
+    def insert_tasks(self, rows, batch_size=IMPORT_BATCH_SIZE, defer_indexes=False):
+        """Массовая вставка строк (user_id, title, description, is_done, created_at).
+
+        Строки читаются и записываются пачками по batch_size через executemany,
+        поэтому память не зависит от объёма импорта. Возвращает число строк.
+
+        По умолчанию каждая пачка - отдельная транзакция: прерванный импорт
+        оставляет в базе уже записанные пачки. С defer_indexes=True весь импорт
+        идёт одной транзакцией: индексы и триггеры tasks удаляются, а после
+        вставки создаются заново и новые задачи добавляются в tasks_fts одним
+        запросом. Это быстрее для больших импортов и безопасно - при ошибке
+        откатываются и данные, и удаление индексов.
+        """
+        conn = self._get_connection()
+        insert = (
+            "INSERT INTO tasks (user_id, title, description, is_done, created_at)"
+            " VALUES (?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))"
+        )
+        batches = _batches(rows, batch_size)
+        if not defer_indexes:
+            count = 0
+            for batch in batches:
+                self._insert_batch(insert, batch)
+                count += len(batch)
+            return count
+
+        conn.commit()
+        self._begin_immediate(conn)
+        try:
+            schema = conn.execute(
+                "SELECT type, name, sql FROM sqlite_master"
+                " WHERE tbl_name = 'tasks' AND type IN ('index', 'trigger') AND sql IS NOT NULL"
+            ).fetchall()
+            last_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM tasks").fetchone()[0]
+            for kind, name, _ in schema:
+                conn.execute(f'DROP {kind.upper()} "{name}"')
+            count = 0
+            for batch in batches:
+                conn.executemany(insert, batch)
+                count += len(batch)
+            for _, _, sql in schema:
+                conn.execute(sql)
+            # Триггеры не работали - индексируем новые задачи, пишем их в
+            # журнал изменений и считаем в счётчиках пользователей сами
+            conn.execute(
+                "INSERT INTO tasks_fts (rowid, user_id, title, description)"
+                " SELECT id, user_id, title, description FROM tasks_fts_content WHERE id > ?",
+                (last_id,),
+            )
+            conn.execute(
+                "INSERT INTO task_changes (user_id, task_id, op)"
+                " SELECT user_id, id, 'insert' FROM tasks WHERE id > ?",
+                (last_id,),
+            )
+            conn.execute(
+                "INSERT INTO user_stats (user_id, total, done)"
+                " SELECT user_id, COUNT(*), SUM(is_done IS 1) FROM tasks WHERE id > ?"
+                " GROUP BY user_id"
+                " ON CONFLICT (user_id) DO UPDATE"
+                " SET total = total + excluded.total, done = done + excluded.done",
+                (last_id,),
             )
             conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        return count
+
+    @_retry_when_busy
+    def _insert_batch(self, insert, batch):
+        conn = self._get_connection()
+        with conn:
+            conn.executemany(insert, batch)
+
+    @_retry_when_busy
+    def _begin_immediate(self, conn):
+        conn.execute("BEGIN IMMEDIATE")
+
+    def export_tasks(self, user_id, include_archived=False):
+        """Задачи пользователя (title, description, is_done, created_at) по порядку id.
+
+        Генератор идёт по курсору SQLite и не собирает результат в список,
+        поэтому экспорт любого объёма занимает постоянную память.
+        include_archived=True - вместе с задачами из архива (представление all_tasks).
+        """
+        if include_archived:
+            cursor, source = self._archive_connection().cursor(), "all_tasks"
+        else:
+            cursor, source = self._get_connection().cursor(), "tasks"
+        cursor.arraysize = EXPORT_ARRAY_SIZE
+        cursor.execute(
+            f"SELECT title, description, is_done, created_at FROM {source}"
+            " WHERE user_id = ? ORDER BY id",
+            (user_id,),
+        )
+        try:
+            while True:
+                rows = cursor.fetchmany()
+                if not rows:
+                    return
+                yield from rows
         finally:
             cursor.close()
-            conn.close()
 
+    @_retry_when_busy
+    def update_tasks(self, updates):
+        """Применяет изменения нескольких задач одной транзакцией.
+
+        updates - словарь {task_id: {поле: значение}}, поля из TASK_UPDATE_FIELDS.
+        Поля, которых нет в словаре задачи, остаются без изменений.
+        """
+        rows = []
+        for task_id, fields in updates.items():
+            unknown = set(fields) - set(TASK_UPDATE_FIELDS)
+            if unknown:
+                raise ValueError(f"Неизвестные поля задачи: {', '.join(sorted(unknown))}")
+            rows.append(
+                (
+                    "title" in fields,
+                    fields.get("title"),
+                    "description" in fields,
+                    fields.get("description"),
+                    "is_done" in fields,
+                    fields.get("is_done"),
+                    "due_date" in fields,
+                    fields.get("due_date"),
+                    "priority" in fields,
+                    fields.get("priority"),
+                    task_id,
+                )
+            )
+        if not rows:
+            return
+        conn = self._get_connection()
+        with conn:
+            # Один и тот же запрос для любых наборов полей - один подготовленный запрос на executemany
+            conn.executemany(
+                "UPDATE tasks SET"
+                " title = CASE WHEN ? THEN ? ELSE title END,"
+                " description = CASE WHEN ? THEN ? ELSE description END,"
+                " is_done = CASE WHEN ? THEN ? ELSE is_done END,"
+                " due_date = CASE WHEN ? THEN ? ELSE due_date END,"
+                " priority = CASE WHEN ? THEN ? ELSE priority END"
+                " WHERE id = ?",
+                rows,
+            )
+
+    @_retry_when_busy
     def update_task_status(self, task_id, is_done):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        try:
-            cursor.execute(
+        conn = self._get_connection()
+        with conn:
+            conn.execute(
                 "UPDATE tasks SET is_done = ? WHERE id = ?", (is_done, task_id)
             )
-            conn.commit()
-        finally:
-            cursor.close()
-            conn.close()
 
+    @_retry_when_busy
     def update_task_title(self, task_id, new_title):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        try:
-            cursor.execute(
+        conn = self._get_connection()
+        with conn:
+            conn.execute(
                 "UPDATE tasks SET title = ? WHERE id = ?", (new_title, task_id)
             )
-            conn.commit()
-        finally:
-            cursor.close()
-            conn.close()
 
+    @_retry_when_busy
     def update_task_description(self, task_id, new_description):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        try:
-            cursor.execute(
+        conn = self._get_connection()
+        with conn:
+            conn.execute(
                 "UPDATE tasks SET description = ? WHERE id = ?",
                 (new_description, task_id),
             )
+
+    @_retry_when_busy
+    def toggle_task_status(self, task_id):
+        """Меняет статус задачи на противоположный одним запросом.
+
+        Возвращает новый статус (0 или 1), None - если задачи нет. В отличие
+        от чтения и update_task_status, одновременные переключения из разных
+        потоков не теряются.
+        """
+        conn = self._get_connection()
+        with conn:
+            row = conn.execute(
+                "UPDATE tasks SET is_done = 1 - is_done WHERE id = ? RETURNING is_done",
+                (task_id,),
+            ).fetchone()
+        return None if row is None else row[0]
+
+    def data_version(self, user_id=None):
+        """PRAGMA data_version соединения этого потока: меняется, когда другое
+        соединение или процесс фиксирует запись в базу. user_id нужен
+        шардированной базе (sharding.py) - файл у каждого пользователя свой"""
+        return self._get_connection().execute("PRAGMA data_version").fetchone()[0]
+
+    def change_version(self, user_id=None):
+        """Номер последней записи журнала изменений задач (0 - изменений не было);
+        user_id - как в data_version"""
+        row = self._get_connection().execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'task_changes'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def changes_since(self, user_id, version):
+        """Изменения задач пользователя после version: (новая версия, изменения).
+
+        Изменения - список (task_id, задача) по возрастанию id, где задача -
+        текущая строка (id, title, description, is_done) или None, если
+        задача удалена. Задача, изменённая несколько раз, встречается один
+        раз. Если журнал уже обрезан дальше version (trim_changes), вместо
+        списка возвращается None: показанный список нужно перечитать целиком.
+        """
+        conn = self._get_connection()
+        # Версия читается первой: изменения, записанные между запросами,
+        # попадут и в этот ответ, и в следующий - их повторное применение
+        # ничего не меняет
+        latest = self.change_version()
+        if version >= latest:
+            return latest, []
+        oldest = conn.execute("SELECT MIN(version) FROM task_changes").fetchone()[0]
+        if oldest is None or oldest > version + 1:
+            return latest, None
+        rows = conn.execute(
+            "SELECT c.task_id, t.id, t.title, t.description, t.is_done"
+            " FROM (SELECT DISTINCT task_id FROM task_changes WHERE user_id = ? AND version > ?) AS c"
+            " LEFT JOIN tasks AS t ON t.id = c.task_id AND t.user_id = ?"
+            " ORDER BY c.task_id",
+            (user_id, version, user_id),
+        ).fetchall()
+        return latest, [(row[0], row[1:] if row[1] is not None else None) for row in rows]
+
+    @_retry_when_busy
+    def trim_changes(self, keep=CHANGE_LOG_KEEP):
+        """Удаляет из журнала изменений все записи, кроме keep последних"""
+        conn = self._get_connection()
+        with conn:
+            conn.execute(
+                "DELETE FROM task_changes WHERE version <= ?", (self.change_version() - keep,)
+            )
+
+    def check_stats(self, repair=False):
+        """Сверяет счётчики user_stats с подсчётом задач по всей таблице tasks.
+
+        Возвращает расхождения - список (user_id, счётчики, подсчёт), где
+        счётчики и подсчёт - (всего, невыполненных, выполненных), как в
+        get_stats. Подсчёт - один запрос, он видит один снимок базы. С
+        repair=True счётчики этих пользователей заменяются подсчётом в той же
+        транзакции, под блокировкой записи: задачи не меняются между
+        подсчётом и исправлением.
+        """
+        conn = self._get_connection()
+        conn.commit()
+        if repair:
+            self._begin_immediate(conn)
+        try:
+            rows = conn.execute(
+                "SELECT user_id, SUM(stored_total), SUM(stored_done), SUM(total), SUM(done)"
+                " FROM (SELECT user_id, total AS stored_total, done AS stored_done,"
+                " 0 AS total, 0 AS done FROM user_stats"
+                " UNION ALL SELECT user_id, 0, 0, COUNT(*), SUM(is_done IS 1)"
+                " FROM tasks GROUP BY user_id)"
+                " GROUP BY user_id"
+                " HAVING SUM(stored_total) != SUM(total) OR SUM(stored_done) != SUM(done)"
+                " ORDER BY user_id"
+            ).fetchall()
+            if repair:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO user_stats (user_id, total, done) VALUES (?, ?, ?)",
+                    ((user_id, total, done) for user_id, _, _, total, done in rows),
+                )
             conn.commit()
-        finally:
-            cursor.close()
-            conn.close()
+        except BaseException:
+            conn.rollback()
+            raise
+        return [
+            (user_id, (stored, stored - stored_done, stored_done), (total, total - done, done))
+            for user_id, stored, stored_done, total, done in rows
+        ]
 
-    def get_user_id(self, login):
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _archive_connection(self):
+        """Соединение потока с подключённым архивом (ATTACH ... AS archive).
+
+        Архив подключается к соединению при первом обращении; там же
+        создаются его таблица и временное представление all_tasks - задачи
+        из базы и из архива вместе.
+        """
+        conn = self._get_connection()
+        if getattr(self._local, "archive_attached", False):
+            return conn
+        conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+        conn.execute("PRAGMA archive.journal_mode = WAL")
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS archive.archived_tasks ("
+                " id INTEGER PRIMARY KEY, user_id INTEGER NOT NULL, title TEXT NOT NULL,"
+                " description TEXT, is_done INTEGER, created_at TEXT, done_at TEXT,"
+                " archived_at TEXT DEFAULT CURRENT_TIMESTAMP)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS archive.idx_archived_tasks_user"
+                " ON archived_tasks (user_id, id)"
+            )
+        # Постоянное представление не может ссылаться на другую базу -
+        # временное живёт, пока открыто соединение
+        conn.execute(
+            "CREATE TEMP VIEW IF NOT EXISTS all_tasks AS"
+            " SELECT id, user_id, title, description, is_done, created_at, done_at,"
+            " 0 AS archived FROM main.tasks"
+            " UNION ALL"
+            " SELECT id, user_id, title, description, is_done, created_at, done_at,"
+            " 1 AS archived FROM archive.archived_tasks"
+        )
+        self._local.archive_attached = True
+        return conn
+
+    def archive_tasks(self, days, batch_size=ARCHIVE_BATCH_SIZE):
+        """Переносит в архив пачку задач, выполненных больше days дней назад.
+
+        Возвращает число перенесённых задач (0 - переносить больше нечего).
+        Пачка копируется в архив и удаляется из tasks двумя транзакциями:
+        в режиме WAL транзакция над двумя файлами атомарна только для каждого
+        файла. Удаляются лишь задачи, уже записанные в архив, поэтому после
+        сбоя между транзакциями задача окажется в обоих файлах, а не
+        потеряется, и следующий вызов закончит перенос.
+        """
+        conn = self._archive_connection()
+        cutoff = f"-{float(days)} days"
+        ids = [
+            row[0]
+            for row in conn.execute(
+                "SELECT id FROM main.tasks"
+                " WHERE is_done = 1 AND COALESCE(done_at, created_at) < datetime('now', ?)"
+                " ORDER BY COALESCE(done_at, created_at) LIMIT ?",
+                (cutoff, batch_size),
+            )
+        ]
+        if not ids:
+            return 0
+        self._copy_to_archive(conn, ids)
+        return self._delete_archived(conn, ids)
+
+    @_retry_when_busy
+    def _copy_to_archive(self, conn, ids):
+        placeholders = ",".join("?" * len(ids))
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO archive.archived_tasks"
+                " (id, user_id, title, description, is_done, created_at, done_at)"
+                " SELECT id, user_id, title, description, is_done, created_at, done_at"
+                f" FROM main.tasks WHERE id IN ({placeholders})",
+                ids,
+            )
+
+    @_retry_when_busy
+    def _delete_archived(self, conn, ids):
+        placeholders = ",".join("?" * len(ids))
+        with conn:
+            cursor = conn.execute(
+                f"DELETE FROM main.tasks WHERE id IN ({placeholders})"
+                " AND id IN (SELECT id FROM archive.archived_tasks)",
+                ids,
+            )
+        return cursor.rowcount
+
+    def incremental_vacuum(self, pages=None):
+        """Возвращает системе свободные страницы основного файла (все или pages).
+
+        Работает, если база создана с auto_vacuum = INCREMENTAL (новые базы);
+        для старой базы режим включает enable_incremental_vacuum.
+        Возвращает число страниц в списке свободных после очистки.
+        """
+        conn = self._get_connection()
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+            # Каждый шаг запроса освобождает одну страницу, а execute() делает
+            # один шаг для PRAGMA без результата - executescript идёт до конца
+            pages = f"({int(pages)})" if pages else ""
+            conn.executescript(f"PRAGMA main.incremental_vacuum{pages}")
+        return conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def enable_incremental_vacuum(self):
+        """Включает auto_vacuum = INCREMENTAL для базы, созданной без него.
+
+        Выполняет полный VACUUM: база перестраивается целиком и на это время
+        блокируется, поэтому вызывается один раз и вручную (archive.py --enable-vacuum).
+        """
+        conn = self._get_connection()
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+
+    def backup(self, dest_path, pages=BACKUP_PAGES, pause=BACKUP_STEP_PAUSE, progress=None):
+        """Копирует основную базу в файл dest_path, не останавливая работу с ней.
+
+        SQLite backup API копирует по pages страниц за шаг. Чтение базы
+        держится только внутри шага, между шагами - пауза pause секунд, так
+        что запись из других соединений не ждёт конца копии. Если база
+        изменилась посреди копии, SQLite начинает её заново, поэтому снимок
+        всегда согласован. После BACKUP_MAX_RESTARTS перезапусков остаток
+        копируется одним шагом: в режиме WAL чтение не мешает записи.
+
+        progress(copied, total) вызывается после каждого шага; исключение из
+        него прерывает копию. Копия - один файл без журнала WAL.
+        Возвращает число страниц в копии.
+        """
+        conn = self._get_connection()
+        state = {"copied": 0, "total": 0, "restarts": 0}
+
+        def step(status, remaining, total):
+            copied = total - remaining
+            if copied < state["copied"]:
+                state["restarts"] += 1
+            state["copied"], state["total"] = copied, total
+            if progress is not None:
+                progress(copied, total)
+            if remaining and state["restarts"] > BACKUP_MAX_RESTARTS:
+                raise _BackupRestarted
+            if remaining and pause:
+                time.sleep(pause)
+
+        target = sqlite3.connect(dest_path)
         try:
-            cursor.execute("SELECT id FROM users WHERE login = ?", (login,))
-            result = cursor.fetchone()
-            return result[0] if result else None
+            try:
+                conn.backup(target, pages=pages, progress=step, name="main")
+            except _BackupRestarted:
+                conn.backup(target, pages=-1, progress=step, name="main")
+            target.execute("PRAGMA journal_mode = DELETE")
         finally:
-            cursor.close()
-            conn.close()
+            target.close()
+        return state["total"]
+
+    def due_tasks(self, start, end, user_id=None):
+        """Невыполненные задачи со сроком в полуинтервале [start, end) по
+        возрастанию срока: (id, user_id, название, срок). Время - секунды
+        Unix; user_id=None - задачи всех пользователей.
+
+        Диапазон читается по индексу (idx_tasks_user_open_rank для одного
+        пользователя, idx_tasks_open_due для всех), а не перебором задач.
+        """
+        where = "is_done = 0 AND due_date >= ? AND due_date < ?"
+        params = [_utc_text(start), _utc_text(end)]
+        if user_id is not None:
+            where = "user_id = ? AND " + where
+            params.insert(0, user_id)
+        return self._get_connection().execute(
+            f"SELECT id, user_id, title, {_UNIX_SECONDS.format('due_date')} FROM tasks"
+            f" WHERE {where} ORDER BY due_date",
+            params,
+        ).fetchall()
+
+    def get_task_due(self, task_id):
+        """(user_id, название, срок в секундах Unix или None, is_done) задачи
+        или None, если задачи нет"""
+        return self._get_connection().execute(
+            f"SELECT user_id, title, {_UNIX_SECONDS.format('due_date')}, is_done"
+            " FROM tasks WHERE id = ?",
+            (task_id,),
+        ).fetchone()
+
+    def get_task_owner(self, task_id):
+        """id пользователя, которому принадлежит задача, None - если задачи нет"""
+        row = self._get_connection().execute(
+            "SELECT user_id FROM tasks WHERE id = ?", (task_id,)
+        ).fetchone()
+        return None if row is None else row[0]
+
+    def get_user_id(self, login):
+        conn = self._get_connection()
+        result = conn.execute(
+            "SELECT id FROM users WHERE login = ?", (login,)
+        ).fetchone()
+        return result[0] if result else None
+
+
+def _bcrypt_rounds(password_hash):
+    # Хеш вида $2b$12$...: стоимость - между вторым и третьим «$»
+    return int(password_hash.split("$")[2])
+
+
+def _token_hash(token):
+    # Токен случайный и длинный, поэтому достаточно быстрого SHA-256 без соли
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def build_match_query(user_id, query, columns="{title description}"):
+    """Строит выражение FTS5 MATCH для search_tasks (None, если искать нечего).
+
+    columns - фильтр колонок FTS5, в которых должны найтись слова запроса.
+    """
+    tokens = _SEARCH_TOKEN_RE.findall(query.replace("ё", "е").replace("Ё", "Е"))
+    if not tokens:
+        return None
+    # Слова берём в кавычки, чтобы символы синтаксиса FTS5 в запросе не ломали его
+    words = " AND ".join(
+        f'"{token}"*' if len(token) >= SEARCH_MIN_PREFIX else f'"{token}"'
+        for token in tokens
+    )
+    return f'user_id : "{int(user_id)}" AND {columns} : ({words})'
+
+
+_INSERT_BANDS = "INSERT OR REPLACE INTO task_minhash (user_id, band, task_id) VALUES (?, ?, ?)"
+
+
+def _band_rows(user_id, tasks):
+    """Строки task_minhash для задач (id, title, description, ...)"""
+    from similarity import band_hashes, normalize
+
+    bands = band_hashes([normalize(task[1], task[2]) for task in tasks])
+    for task, task_bands in zip(tasks, bands.tolist()):
+        # Хеш 0 - у текста без триграмм: такая задача ни на что не похожа
+        for band in set(task_bands) - {0}:
+            yield user_id, band, task[0]
+
+
+def _batches(items, size):
+    """Разбивает итератор на списки не длиннее size"""
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,3 @@
+-- Индекс для списка задач пользователя и фильтра «скрыть выполненные»:
+-- WHERE user_id = ? [AND is_done = ?] ORDER BY id
+CREATE INDEX IF NOT EXISTS idx_tasks_user_done ON tasks (user_id, is_done, id);
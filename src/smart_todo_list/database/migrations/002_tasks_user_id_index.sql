@@ -0,0 +1,3 @@
+-- Индекс для постраничной загрузки (keyset-пагинация по id):
+-- WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?
+CREATE INDEX IF NOT EXISTS idx_tasks_user_id ON tasks (user_id, id);
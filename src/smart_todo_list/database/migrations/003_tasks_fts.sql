@@ -0,0 +1,73 @@
+-- Полнотекстовый поиск по названию и описанию задач (FTS5).
+-- Таблица хранит только индекс, текст для индексации берётся из представления
+-- tasks_fts_content. В нём «ё» заменена на «е»: токенизатор unicode61 снимает
+-- диакритику только с латиницы, а искать «отчет» и «отчёт» нужно одинаково.
+-- user_id индексируется как токен, чтобы запрос отбирал задачи одного
+-- пользователя внутри FTS, без фильтрации после поиска.
+-- detail = column: позиции слов не хранятся (фразовый поиск не нужен), списки
+-- документов получаются короче, и запросы по коротким префиксам читают меньше.
+CREATE VIEW IF NOT EXISTS tasks_fts_content AS
+SELECT
+    id,
+    user_id,
+    replace(replace(title, 'ё', 'е'), 'Ё', 'Е') AS title,
+    replace(replace(description, 'ё', 'е'), 'Ё', 'Е') AS description
+FROM tasks;
+
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+    user_id,
+    title,
+    description,
+    content = 'tasks_fts_content',
+    content_rowid = 'id',
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3',
+    detail = column
+);
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO tasks_fts (rowid, user_id, title, description)
+    VALUES (
+        new.id,
+        new.user_id,
+        replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е'),
+        replace(replace(new.description, 'ё', 'е'), 'Ё', 'Е')
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, user_id, title, description)
+    VALUES (
+        'delete',
+        old.id,
+        old.user_id,
+        replace(replace(old.title, 'ё', 'е'), 'Ё', 'Е'),
+        replace(replace(old.description, 'ё', 'е'), 'Ё', 'Е')
+    );
+END;
+
+CREATE TRIGGER IF NOT EXISTS tasks_fts_update AFTER UPDATE OF user_id, title, description ON tasks
+WHEN old.user_id IS NOT new.user_id
+    OR old.title IS NOT new.title
+    OR old.description IS NOT new.description
+BEGIN
+    INSERT INTO tasks_fts (tasks_fts, rowid, user_id, title, description)
+    VALUES (
+        'delete',
+        old.id,
+        old.user_id,
+        replace(replace(old.title, 'ё', 'е'), 'Ё', 'Е'),
+        replace(replace(old.description, 'ё', 'е'), 'Ё', 'Е')
+    );
+    INSERT INTO tasks_fts (rowid, user_id, title, description)
+    VALUES (
+        new.id,
+        new.user_id,
+        replace(replace(new.title, 'ё', 'е'), 'Ё', 'Е'),
+        replace(replace(new.description, 'ё', 'е'), 'Ё', 'Е')
+    );
+END;
+
+-- Индексируем задачи, которые уже есть в базе, и сливаем индекс в один сегмент
+INSERT INTO tasks_fts (tasks_fts) VALUES ('rebuild');
+INSERT INTO tasks_fts (tasks_fts) VALUES ('optimize');
@@ -0,0 +1,5 @@
+-- Индексы для сортировки списка задач (TaskQuery.order_by):
+-- WHERE user_id = ? ORDER BY created_at, id / ORDER BY title, id.
+-- Сортировка по статусу использует idx_tasks_user_done (user_id, is_done, id).
+CREATE INDEX IF NOT EXISTS idx_tasks_user_created ON tasks (user_id, created_at, id);
+CREATE INDEX IF NOT EXISTS idx_tasks_user_title ON tasks (user_id, title, id);
@@ -0,0 +1,11 @@
+-- Сессии «запомнить меня» и HTTP-сервиса: повторный вход по токену проверяется
+-- одним поиском по первичному ключу, без bcrypt. Хранится только SHA-256 токена,
+-- поэтому по копии базы войти нельзя. expires_at - время истечения в секундах Unix.
+CREATE TABLE IF NOT EXISTS sessions (
+    token_hash TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users(id),
+    expires_at INTEGER NOT NULL
+) WITHOUT ROWID;
+
+-- Для удаления истёкших сессий: WHERE expires_at <= ?
+CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at);
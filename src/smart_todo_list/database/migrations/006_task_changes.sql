@@ -0,0 +1,29 @@
+-- Журнал изменений задач для обновления открытых списков по разнице
+-- (Database.changes_since): version растёт с каждой записью и не повторяется
+-- (AUTOINCREMENT), по нему окно запоминает, до какого изменения оно уже
+-- показало задачи. Хранятся только id и вид изменения, сами данные задачи
+-- читаются из tasks. Старые записи удаляет Database.trim_changes.
+CREATE TABLE IF NOT EXISTS task_changes (
+    version INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id INTEGER NOT NULL,
+    task_id INTEGER NOT NULL,
+    op TEXT NOT NULL CHECK (op IN ('insert', 'update', 'delete'))
+);
+
+-- WHERE user_id = ? AND version > ?
+CREATE INDEX IF NOT EXISTS idx_task_changes_user ON task_changes (user_id, version);
+
+CREATE TRIGGER IF NOT EXISTS task_changes_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO task_changes (user_id, task_id, op) VALUES (new.user_id, new.id, 'insert');
+END;
+
+CREATE TRIGGER IF NOT EXISTS task_changes_update AFTER UPDATE ON tasks BEGIN
+    -- Задача другого пользователя для прежнего владельца удалена
+    INSERT INTO task_changes (user_id, task_id, op)
+    SELECT old.user_id, old.id, 'delete' WHERE old.user_id IS NOT new.user_id;
+    INSERT INTO task_changes (user_id, task_id, op) VALUES (new.user_id, new.id, 'update');
+END;
+
+CREATE TRIGGER IF NOT EXISTS task_changes_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO task_changes (user_id, task_id, op) VALUES (old.user_id, old.id, 'delete');
+END;
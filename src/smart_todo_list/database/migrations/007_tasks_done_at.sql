@@ -0,0 +1,28 @@
+-- Когда задача отмечена выполненной: по этому времени выполненные задачи
+-- переносятся в архив (Database.archive_tasks). Для уже выполненных задач
+-- время неизвестно - считаем, что они выполнены сейчас, и в архив они
+-- попадут не раньше, чем новые. Задачи, импортированные сразу выполненными,
+-- триггер не трогает: для них берётся created_at.
+ALTER TABLE tasks ADD COLUMN done_at TEXT;
+
+-- Заполнение done_at - не изменение задач: записи, которые триггер журнала
+-- изменений добавит на каждую строку, удаляем
+CREATE TEMP TABLE migration_changes_before AS
+SELECT COALESCE(MAX(version), 0) AS version FROM task_changes;
+
+UPDATE tasks SET done_at = CURRENT_TIMESTAMP WHERE is_done = 1;
+
+DELETE FROM task_changes WHERE version > (SELECT version FROM temp.migration_changes_before);
+
+DROP TABLE temp.migration_changes_before;
+
+CREATE TRIGGER IF NOT EXISTS tasks_done_at AFTER UPDATE OF is_done ON tasks
+WHEN old.is_done IS NOT new.is_done
+BEGIN
+    UPDATE tasks SET done_at = CASE WHEN new.is_done THEN CURRENT_TIMESTAMP END
+    WHERE id = new.id;
+END;
+
+-- Выполненные задачи по времени выполнения: WHERE is_done = 1 AND COALESCE(done_at, created_at) < ?
+CREATE INDEX IF NOT EXISTS idx_tasks_done_at ON tasks (COALESCE(done_at, created_at))
+WHERE is_done = 1;
@@ -0,0 +1,18 @@
+-- Срок и приоритет задачи для умного порядка списка (ranking.py).
+-- due_date - «ГГГГ-ММ-ДД ЧЧ:ММ:СС» или «ГГГГ-ММ-ДД», как created_at; NULL - без срока.
+-- priority - 0 (нет), 1 (низкий), 2 (средний), 3 (высокий).
+ALTER TABLE tasks ADD COLUMN due_date TEXT;
+ALTER TABLE tasks ADD COLUMN priority INTEGER NOT NULL DEFAULT 0 CHECK (priority BETWEEN 0 AND 3);
+
+-- Сортировка списка (TaskQuery.order_by): WHERE user_id = ? ORDER BY priority, id.
+-- По сроку список не сортируется в SQL: у задач без срока он NULL, и
+-- сравнение (due_date, id) для keyset-страниц не работало бы; срок
+-- учитывает умный порядок
+CREATE INDEX IF NOT EXISTS idx_tasks_user_priority ON tasks (user_id, priority, id);
+
+-- Ранжирование невыполненных задач (Database.rank_columns) читает только этот
+-- индекс, не обращаясь к строкам таблицы с названиями и описаниями. is_done
+-- в колонках нужен, чтобы SQLite считал индекс покрывающим условие is_done = 0
+CREATE INDEX IF NOT EXISTS idx_tasks_user_open_rank
+ON tasks (user_id, due_date, priority, created_at, is_done)
+WHERE is_done = 0;
@@ -0,0 +1,6 @@
+-- Ближайшие сроки невыполненных задач всех пользователей для напоминаний
+-- HTTP-сервиса (Database.due_tasks без user_id):
+-- WHERE is_done = 0 AND due_date >= ? AND due_date < ? ORDER BY due_date.
+-- Для одного пользователя тот же запрос идёт по idx_tasks_user_open_rank
+CREATE INDEX IF NOT EXISTS idx_tasks_open_due ON tasks (due_date)
+WHERE is_done = 0 AND due_date IS NOT NULL;
@@ -0,0 +1,23 @@
+-- Индекс похожих задач (similarity.py, Database.similar_tasks): по строке на
+-- каждую LSH-полосу MinHash-подписи задачи. Задачи, у которых совпал хеш
+-- хотя бы одной полосы, - кандидаты в дубликаты; номер полосы входит в хеш.
+-- Подписи считаются в Python, поэтому триггеров на tasks нет: индекс
+-- догоняет журнал изменений task_changes при поиске похожих. Так в таблицу
+-- tasks по-прежнему может писать любой процесс, даже без этого приложения.
+CREATE TABLE IF NOT EXISTS task_minhash (
+    user_id INTEGER NOT NULL,
+    band INTEGER NOT NULL,
+    task_id INTEGER NOT NULL,
+    PRIMARY KEY (user_id, band, task_id)
+) WITHOUT ROWID;
+
+-- Удаление строк изменённых задач
+CREATE INDEX IF NOT EXISTS idx_task_minhash_task ON task_minhash (task_id);
+
+-- До какой версии журнала изменений проиндексированы задачи пользователя.
+-- Пользователь без строки ещё не индексировался: его задачи индексируются
+-- целиком при первом поиске похожих, как и после обрезки журнала
+CREATE TABLE IF NOT EXISTS task_minhash_state (
+    user_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL
+);
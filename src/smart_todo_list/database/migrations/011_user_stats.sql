@@ -0,0 +1,34 @@
+-- Счётчики задач пользователя для сводки в окне (Database.get_stats): всего
+-- и выполненных, невыполненных = total - done. Их ведут триггеры на tasks,
+-- поэтому чтение сводки - одна строка по ключу, а не COUNT(*) по всем задачам
+-- пользователя. Счётчики учитывают только задачи в tasks, без архива.
+-- Сверить их с подсчётом по tasks и исправить - Database.check_stats.
+CREATE TABLE IF NOT EXISTS user_stats (
+    user_id INTEGER PRIMARY KEY,
+    total INTEGER NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT INTO user_stats (user_id, total, done)
+SELECT user_id, COUNT(*), SUM(is_done IS 1) FROM tasks GROUP BY user_id;
+
+CREATE TRIGGER IF NOT EXISTS user_stats_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO user_stats (user_id, total, done) VALUES (new.user_id, 1, new.is_done IS 1)
+    ON CONFLICT (user_id) DO UPDATE SET total = total + 1, done = done + excluded.done;
+END;
+
+-- Передача задачи другому пользователю - удаление у прежнего владельца и
+-- добавление новому
+CREATE TRIGGER IF NOT EXISTS user_stats_update AFTER UPDATE OF user_id, is_done ON tasks
+WHEN old.user_id IS NOT new.user_id OR (old.is_done IS 1) != (new.is_done IS 1)
+BEGIN
+    UPDATE user_stats SET total = total - 1, done = done - (old.is_done IS 1)
+    WHERE user_id = old.user_id;
+    INSERT INTO user_stats (user_id, total, done) VALUES (new.user_id, 1, new.is_done IS 1)
+    ON CONFLICT (user_id) DO UPDATE SET total = total + 1, done = done + excluded.done;
+END;
+
+CREATE TRIGGER IF NOT EXISTS user_stats_delete AFTER DELETE ON tasks BEGIN
+    UPDATE user_stats SET total = total - 1, done = done - (old.is_done IS 1)
+    WHERE user_id = old.user_id;
+END;
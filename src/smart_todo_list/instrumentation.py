@@ -0,0 +1,338 @@
+"""Замеры времени операций приложения и журнал медленных операций.
+
+Методы Database (декоратор instrument_methods) и действия интерфейса
+(декоратор timed) отмечаются именами вида «db.get_tasks» и «ui.load_tasks».
+Пока замеры выключены (по умолчанию), обёртка только проверяет флаг
+metrics.enabled и вызывает исходный метод.
+
+Включённые замеры собирают гистограммы времени по операциям. Через
+sqlite3 trace/progress callback они считают SQL-запросы и шаги виртуальной
+машины SQLite в каждой операции. Для вложенных операций запоминается, сколько
+времени ушло на базу (db.*), bcrypt (bcrypt.*) и остальное. Операции дольше
+порога пишутся в журнал медленных операций (логгер SLOW_LOG_NAME).
+Счётчики выгружаются текстом в формате Prometheus (to_prometheus).
+
+Включение при запуске приложения - переменными окружения:
+
+    SMART_TODO_METRICS=metrics.prom   файл для выгрузки счётчиков при выходе
+    SMART_TODO_SLOW_LOG=slow.log      файл журнала медленных операций
+    SMART_TODO_SLOW_MS=100            порог медленной операции, мс
+"""
+
+import bisect
+import functools
+import os
+import re
+import threading
+import time
+import types
+from contextlib import contextmanager
+
+# Порог медленной операции по умолчанию, мс
+SLOW_THRESHOLD_MS = 100
+
+# Границы корзин гистограммы времени операций, секунды
+HISTOGRAM_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+# Progress callback SQLite вызывается раз в столько шагов виртуальной машины
+PROGRESS_STEPS = 1000
+
+# Сколько SQL-запросов операции попадает в журнал медленных операций
+SLOW_LOG_STATEMENTS = 5
+
+# Операция, к которой относятся запросы вне отмеченных операций (миграции и т.п.)
+OTHER_OPERATION = "other"
+
+# Имя логгера журнала медленных операций
+SLOW_LOG_NAME = "smart_todo_list.slow"
+
+# Флаг генератора в co_flags (inspect.CO_GENERATOR). Модули inspect и logging
+# импортируются десятки миллисекунд, поэтому при запуске приложения, пока
+# замеры выключены, они не нужны
+CO_GENERATOR = 0x20
+
+# Строковые литералы в тексте запроса: значения (названия задач, хеши
+# паролей) в журнал не пишем
+_SQL_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+
+
+class _Frame:
+    """Выполняющаяся операция в стеке операций потока"""
+
+    __slots__ = ("name", "started", "elapsed", "children", "statements", "sql", "vm_steps")
+
+    def __init__(self, name):
+        self.name = name
+        self.started = 0.0
+        self.elapsed = 0.0
+        self.children = {}  # {категория: секунды} вложенных операций
+        self.statements = 0
+        self.sql = []
+        self.vm_steps = 0
+
+
+class Metrics:
+    """Гистограммы времени операций, счётчики SQLite и журнал медленных операций"""
+
+    def __init__(self, buckets=HISTOGRAM_BUCKETS):
+        self.enabled = False
+        self.slow_threshold_ms = SLOW_THRESHOLD_MS
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            # {операция: [число наблюдений в каждой корзине..., в +Inf, сумма]}
+            self._histograms = {}
+            # {(метрика, операция): значение}
+            self._counters = {}
+
+    def enable(self, slow_threshold_ms=None, slow_log_path=None):
+        """Включает замеры.
+
+        Trace и progress callback ставятся на соединения, которые Database
+        открывает после включения, поэтому включать замеры нужно до создания
+        Database.
+        """
+        if slow_threshold_ms is not None:
+            self.slow_threshold_ms = slow_threshold_ms
+        if slow_log_path is not None:
+            import logging
+
+            handler = logging.FileHandler(slow_log_path, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            logging.getLogger(SLOW_LOG_NAME).addHandler(handler)
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def install(self, conn):
+        """Ставит на соединение SQLite callback-и подсчёта запросов и шагов"""
+        if self.enabled:
+            conn.set_trace_callback(self._on_statement)
+            conn.set_progress_handler(self._on_progress, PROGRESS_STEPS)
+
+    @contextmanager
+    def measure(self, name):
+        """Замер блока кода как операции name"""
+        if not self.enabled:
+            yield
+            return
+        frame = _Frame(name)
+        self._resume(frame)
+        try:
+            yield
+        finally:
+            self._suspend(frame)
+            self._finish(frame)
+
+    def measure_iter(self, name, iterator):
+        """Замер генератора: учитывается только время внутри него, без
+        времени кода, который перебирает результаты"""
+        frame = _Frame(name)
+        try:
+            while True:
+                self._resume(frame)
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    self._suspend(frame)
+                yield item
+        finally:
+            iterator.close()
+            self._finish(frame)
+
+    def _stack(self):
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _resume(self, frame):
+        self._stack().append(frame)
+        frame.started = time.perf_counter()
+
+    def _suspend(self, frame):
+        elapsed = time.perf_counter() - frame.started
+        frame.elapsed += elapsed
+        stack = self._stack()
+        stack.pop()
+        if stack:
+            category = frame.name.split(".", 1)[0]
+            parent = stack[-1]
+            parent.children[category] = parent.children.get(category, 0.0) + elapsed
+
+    def _finish(self, frame):
+        self.observe(frame.name, frame.elapsed)
+        if frame.elapsed * 1000 >= self.slow_threshold_ms:
+            self._add("smart_todo_slow_operations_total", frame.name, 1)
+            import logging
+
+            logging.getLogger(SLOW_LOG_NAME).warning(self._describe(frame))
+
+    def observe(self, name, seconds):
+        """Добавляет наблюдение в гистограмму операции name"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = [0] * (len(self.buckets) + 1) + [0.0]
+            histogram[bisect.bisect_left(self.buckets, seconds)] += 1
+            histogram[-1] += seconds
+
+    def _add(self, metric, operation, value):
+        key = (metric, operation)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def _on_statement(self, sql):
+        if sql.startswith("--"):
+            return  # запросы внутри триггеров и FTS5 - часть основного запроса
+        stack = self._stack()
+        name = stack[-1].name if stack else OTHER_OPERATION
+        self._add("smart_todo_sqlite_statements_total", name, 1)
+        if stack:
+            sql = _SQL_STRING_RE.sub("?", " ".join(sql.split()))
+        for frame in stack:
+            frame.statements += 1
+            if len(frame.sql) < SLOW_LOG_STATEMENTS and sql not in frame.sql:
+                frame.sql.append(sql)
+
+    def _on_progress(self):
+        stack = self._stack()
+        name = stack[-1].name if stack else OTHER_OPERATION
+        self._add("smart_todo_sqlite_vm_steps_total", name, PROGRESS_STEPS)
+        for frame in stack:
+            frame.vm_steps += PROGRESS_STEPS
+        return 0  # ненулевое значение прервало бы запрос
+
+    @staticmethod
+    def _describe(frame):
+        parts = [
+            f"{category} {seconds * 1000:.1f} мс" for category, seconds in frame.children.items()
+        ]
+        other = frame.elapsed - sum(frame.children.values())
+        if frame.children:
+            parts.append(f"остальное {other * 1000:.1f} мс")
+        parts.append(f"SQL-запросов {frame.statements}")
+        if frame.vm_steps:
+            parts.append(f"шагов SQLite ~{frame.vm_steps}")
+        message = f"{frame.name} {frame.elapsed * 1000:.1f} мс ({', '.join(parts)})"
+        if frame.sql:
+            message += ": " + " | ".join(frame.sql)
+        return message
+
+    def count(self, name):
+        """Сколько раз выполнилась операция name"""
+        with self._lock:
+            histogram = self._histograms.get(name)
+            return sum(histogram[:-1]) if histogram else 0
+
+    def counter(self, metric, operation):
+        with self._lock:
+            return self._counters.get((metric, operation), 0)
+
+    def to_prometheus(self):
+        """Гистограммы и счётчики в текстовом формате Prometheus"""
+        with self._lock:
+            histograms = {name: list(values) for name, values in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = [
+            "# HELP smart_todo_operation_seconds Время выполнения операции",
+            "# TYPE smart_todo_operation_seconds histogram",
+        ]
+        for name in sorted(histograms):
+            histogram = histograms[name]
+            total = 0
+            for bound, observations in zip((*self.buckets, "+Inf"), histogram[:-1]):
+                total += observations
+                lines.append(
+                    f'smart_todo_operation_seconds_bucket{{operation="{name}",le="{bound}"}} {total}'
+                )
+            lines.append(f'smart_todo_operation_seconds_sum{{operation="{name}"}} {histogram[-1]}')
+            lines.append(f'smart_todo_operation_seconds_count{{operation="{name}"}} {total}')
+
+        for metric, help_text in (
+            ("smart_todo_sqlite_statements_total", "Выполнено SQL-запросов"),
+            ("smart_todo_sqlite_vm_steps_total", "Шагов виртуальной машины SQLite (приблизительно)"),
+            ("smart_todo_slow_operations_total", "Операций дольше порога журнала"),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for (counter_metric, operation), value in sorted(counters.items()):
+                if counter_metric == metric:
+                    lines.append(f'{metric}{{operation="{operation}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.to_prometheus())
+
+
+# Общий объект замеров приложения
+metrics = Metrics()
+
+
+def timed(name):
+    """Декоратор: каждый вызов функции - операция name"""
+
+    def decorator(func):
+        if func.__code__.co_flags & CO_GENERATOR:
+
+            @functools.wraps(func)
+            def generator_wrapper(*args, **kwargs):
+                if not metrics.enabled:
+                    return func(*args, **kwargs)
+                return metrics.measure_iter(name, func(*args, **kwargs))
+
+            return generator_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return func(*args, **kwargs)
+            frame = _Frame(name)
+            metrics._resume(frame)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                metrics._suspend(frame)
+                metrics._finish(frame)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_methods(prefix, exclude=()):
+    """Декоратор класса: оборачивает timed все его публичные методы"""
+
+    def decorator(cls):
+        for attr, value in list(vars(cls).items()):
+            if attr.startswith("_") or attr in exclude or not isinstance(value, types.FunctionType):
+                continue
+            setattr(cls, attr, timed(f"{prefix}.{attr}")(value))
+        return cls
+
+    return decorator
+
+
+def enable_from_env(environ=os.environ):
+    """Включает замеры, если задана SMART_TODO_METRICS или SMART_TODO_SLOW_LOG.
+
+    Возвращает путь для выгрузки счётчиков (или None).
+    """
+    metrics_path = environ.get("SMART_TODO_METRICS")
+    slow_log_path = environ.get("SMART_TODO_SLOW_LOG")
+    if metrics_path or slow_log_path:
+        threshold = environ.get("SMART_TODO_SLOW_MS")
+        metrics.enable(
+            slow_threshold_ms=float(threshold) if threshold else None,
+            slow_log_path=slow_log_path,
+        )
+    return metrics_path
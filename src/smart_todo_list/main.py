@@ -4,8 +4,7 @@ import sys
 
 import re
 from PyQt6 import QtCore, QtWidgets
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.uic import loadUi
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal, pyqtSlot
 from PyQt6.QtGui import QIcon
 from PyQt6.QtWidgets import (
     QApplication,
@@ -14,23 +13,38 @@ from PyQt6.QtWidgets import (
     QMessageBox,
     QStackedWidget,
     QVBoxLayout,
-    QTableWidget,
-    QTableWidgetItem,
     QPushButton,
     QCheckBox,
     QInputDialog,
     QSizePolicy,
 )
 
+from archive import TaskArchiver
+from backup import BackupService
+from change_watcher import ChangeWatcher
 from database import Database
+from instrumentation import enable_from_env, metrics, timed
+from reminder_notifier import ReminderNotifier
+from task_cache import TaskCache
+from task_model import TaskTableModel, STATUS_COLUMN
+from ui_loader import load_ui
+from workers import Worker, auth_thread_pool, db_thread_pool
+from write_queue import TaskWriteQueue
+
+# Имя файла с токеном сессии «Запомнить меня» (в папке базы данных)
+SESSION_TOKEN_FILE = "session.token"
 
 
 class WelcomeWindow(QWidget):
 
+    # Окна входа и регистрации создаёт MainWindow при первом переходе на них
+    login_requested = pyqtSignal()
+    register_requested = pyqtSignal()
+
     def __init__(self, stacked_widget):
         super().__init__()
         self.stacked_widget = stacked_widget
-        loadUi("ui/welcome_window.ui", self)
+        load_ui("welcome_window", self)
         self.connect_signals()
 
     def connect_signals(self):
@@ -38,28 +52,38 @@ class WelcomeWindow(QWidget):
         self.registerButton.clicked.connect(self.go_to_register)
 
     def go_to_login(self):
-        self.stacked_widget.setCurrentIndex(1)
+        self.login_requested.emit()
 
     def go_to_register(self):
-        self.stacked_widget.setCurrentIndex(2)
+        self.register_requested.emit()
 
 
 class LoginWindow(QWidget):
 
     login_success = pyqtSignal(int)  # сигнал с user_id
+    login_failed = pyqtSignal(str)  # сигнал с текстом ошибки
 
     def __init__(self, stacked_widget, db):
         super().__init__()
         self.stacked_widget = stacked_widget
         self.db = db
-        loadUi("ui/login_window.ui", self)
+        self.worker = None  # фоновая проверка пароля, None - если не идёт
+        load_ui("login_window", self)
+        self.login_button_text = self.loginButton.text()
         self.connect_signals()
 
     def connect_signals(self):
         self.loginButton.clicked.connect(self.login)
         self.backButton.clicked.connect(self.go_back)
 
+    # pyqtSlot() - чтобы clicked не передавал в обёртку timed флаг checked
+    @pyqtSlot()
+    @timed("ui.login")
     def login(self):
+        # Повторные нажатия, пока идёт проверка пароля, игнорируем
+        if self.worker is not None:
+            return
+
         login = self.loginInput.text().strip()
         password = self.passwordInput.text()
 
@@ -67,18 +91,53 @@ class LoginWindow(QWidget):
             QMessageBox.warning(self, "Ошибка", "Заполните все поля!")
             return
 
-        if self.db.verify_user(login, password):
-            user_id = self.db.get_user_id(login)
-            if user_id is None:
-                QMessageBox.warning(self, "Ошибка", "Пользователь не найден.")
-                return
-            QMessageBox.information(self, "Успех", f"Добро пожаловать, {login}!")
-            self.clear_fields()
-            self.login_success.emit(
-                user_id
-            )  # отправляем сигнал о успешном входе с user_id
-        else:
+        # bcrypt.checkpw выполняется в пуле потоков, чтобы не блокировать интерфейс
+        self.set_busy(True)
+        remember = self.rememberCheckBox.isChecked()
+        self.worker = Worker(self.authenticate, login, password, remember)
+        self.worker.signals.finished.connect(self.on_login_finished)
+        self.worker.signals.failed.connect(self.on_login_failed)
+        auth_thread_pool.start(self.worker)
+
+    def authenticate(self, login, password, remember):
+        """Выполняется в рабочем потоке: возвращает (login, user_id, токен сессии).
+
+        user_id - None при неверном логине или пароле, токен - None, если
+        «Запомнить меня» не отмечено.
+        """
+        user_id = self.db.verify_user(login, password)
+        if user_id is None or not remember:
+            return login, user_id, None
+        return login, user_id, self.db.create_session(user_id)
+
+    def on_login_finished(self, result):
+        self.set_busy(False)
+        login, user_id, token = result
+        if user_id is None:
+            self.login_failed.emit("Неверный логин или пароль.")
             QMessageBox.warning(self, "Ошибка", "Неверный логин или пароль.")
+            return
+        # Без «Запомнить меня» прежняя сессия этого компьютера забывается
+        save_session_token(self.db, token)
+        QMessageBox.information(self, "Успех", f"Добро пожаловать, {login}!")
+        self.clear_fields()
+        self.login_success.emit(user_id)  # отправляем сигнал о успешном входе с user_id
+
+    def on_login_failed(self, error):
+        self.set_busy(False)
+        self.login_failed.emit(str(error))
+        QMessageBox.warning(self, "Ошибка", f"Не удалось выполнить вход:\n{error}")
+
+    def set_busy(self, busy):
+        """Состояние «идёт вход»: кнопка заблокирована, курсор ожидания"""
+        if not busy:
+            self.worker = None
+        self.loginButton.setEnabled(not busy)
+        self.loginButton.setText("Вход..." if busy else self.login_button_text)
+        if busy:
+            self.setCursor(Qt.CursorShape.WaitCursor)
+        else:
+            self.unsetCursor()
 
     def go_back(self):
         self.clear_fields()
@@ -87,6 +146,7 @@ class LoginWindow(QWidget):
     def clear_fields(self):
         self.loginInput.clear()
         self.passwordInput.clear()
+        self.rememberCheckBox.setChecked(False)
 
 
 class RegisterWindow(QWidget):
@@ -95,7 +155,9 @@ class RegisterWindow(QWidget):
         super().__init__()
         self.stacked_widget = stacked_widget
         self.db = db
-        loadUi("ui/register_window.ui", self)
+        self.worker = None  # фоновая регистрация, None - если не идёт
+        load_ui("register_window", self)
+        self.register_button_text = self.registerButton.text()
         self.connect_signals()
 
     def connect_signals(self):
@@ -152,8 +214,14 @@ class RegisterWindow(QWidget):
 
         return True, "Пароль безопасен"
 
+    @pyqtSlot()
+    @timed("ui.register")
     def register(self):
         """Обработка регистрации"""
+        # Повторные нажатия, пока идёт регистрация, игнорируем
+        if self.worker is not None:
+            return
+
         login = self.loginInput.text().strip()
         email = self.emailInput.text().strip()
         password = self.passwordInput.text()
@@ -180,17 +248,43 @@ class RegisterWindow(QWidget):
             QMessageBox.warning(self, "Ненадежный пароль", message)
             return
 
-        # Здесь должна быть реальная логика регистрации
-        # Попытка зарегистрировать пользователя через метод БД
-        try:
-            self.db.register_user(login, email, password)
-            QMessageBox.information(
-                self, "Успех", f"Пользователь {login} успешно зарегистрирован!"
-            )
-            self.clear_fields()
-            self.go_back()
-        except RuntimeError as e:
-            QMessageBox.warning(self, "Ошибка регистрации", str(e))
+        # Попытка зарегистрировать пользователя через метод БД.
+        # bcrypt.hashpw выполняется в пуле потоков, чтобы не блокировать интерфейс
+        self.set_busy(True)
+        self.worker = Worker(self.create_user, login, email, password)
+        self.worker.signals.finished.connect(self.on_register_finished)
+        self.worker.signals.failed.connect(self.on_register_failed)
+        auth_thread_pool.start(self.worker)
+
+    def create_user(self, login, email, password):
+        """Выполняется в рабочем потоке: возвращает логин зарегистрированного пользователя"""
+        self.db.register_user(login, email, password)
+        return login
+
+    def on_register_finished(self, login):
+        self.set_busy(False)
+        QMessageBox.information(
+            self, "Успех", f"Пользователь {login} успешно зарегистрирован!"
+        )
+        self.clear_fields()
+        self.go_back()
+
+    def on_register_failed(self, error):
+        self.set_busy(False)
+        QMessageBox.warning(self, "Ошибка регистрации", str(error))
+
+    def set_busy(self, busy):
+        """Состояние «идёт регистрация»: кнопка заблокирована, курсор ожидания"""
+        if not busy:
+            self.worker = None
+        self.registerButton.setEnabled(not busy)
+        self.registerButton.setText(
+            "Регистрация..." if busy else self.register_button_text
+        )
+        if busy:
+            self.setCursor(Qt.CursorShape.WaitCursor)
+        else:
+            self.unsetCursor()
 
     def go_back(self):
         """Возврат к приветственному окну"""
@@ -207,107 +301,159 @@ class RegisterWindow(QWidget):
 
 
 class TasksWindow(QWidget):
+
+    # Пауза после последнего нажатия клавиши, после которой запускается поиск
+    SEARCH_DELAY_MS = 250
+
     def __init__(self, stacked_widget, db, user_id):
         super().__init__()
         self.stacked_widget = stacked_widget
         self.db = db
         self.user_id = user_id
-        loadUi("ui/tasks_window.ui", self)
-
-        self.tasks = []
+        load_ui("tasks_window", self)
+
+        # Правки задач копятся и пишутся в базу пачкой (см. write_queue.py)
+        self.write_queue = TaskWriteQueue(self.db, parent=self)
+        self.write_queue.flush_failed.connect(self.on_flush_failed)
+        self.write_queue.flushed.connect(self.refresh_stats)
+        # При закрытии окна правки сохраняет confirm_close; aboutToQuit - на
+        # случай выхода из приложения без закрытия главного окна
+        QApplication.instance().aboutToQuit.connect(self.write_queue.flush)
+
+        # Модель с задачами: фильтр «скрыть выполненные» и сортировка по
+        # клику на заголовок колонки выполняются в SQL (TaskQuery)
+        self.model = TaskTableModel(self.db, self, write_queue=self.write_queue, ranked=True)
+        self.taskTable.setModel(self.model)
+        # Без индикатора сортировки задачи идут в умном порядке (ranking.py)
+        self.taskTable.horizontalHeader().setSortIndicator(-1, Qt.SortOrder.AscendingOrder)
+        self.taskTable.setSortingEnabled(True)
+
+        # Поиск запускается не на каждое нажатие, а после паузы в наборе
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.run_search)
+        self.searchInput.textChanged.connect(self.search_timer.start)
 
         # Используем чекбокс из ui
-        self.hideCompletedCheckBox.stateChanged.connect(self.load_tasks)
-        self.taskTable.cellClicked.connect(self.on_cell_clicked)
-        self.taskTable.cellChanged.connect(self.on_cell_changed)
+        self.hideCompletedCheckBox.stateChanged.connect(self.on_hide_completed_changed)
+        self.taskTable.clicked.connect(self.on_cell_clicked)
 
         # Кнопка из ui
         self.pushButtonAddTask.clicked.connect(self.add_task_dialog)
+        self.pushButtonMergeDuplicates.clicked.connect(self.find_duplicates)
+        self.duplicates_worker = None
+
+        # Изменения задач из других окон и процессов применяются по разнице;
+        # если журнал изменений обрезан, текущий список перечитывается
+        self.change_watcher = ChangeWatcher(self.db, parent=self)
+        self.change_watcher.changed.connect(self.model.apply_changes)
+        self.change_watcher.reset.connect(self.run_search)
+        # Сводка над таблицей - счётчики из базы (одна строка user_stats):
+        # обновляется после записи правок и изменений из других процессов
+        self.change_watcher.changed.connect(lambda changes: self.refresh_stats())
+        self.change_watcher.reset.connect(self.refresh_stats)
+
+        # Напоминания о сроках: один таймер на ближайший срок, куча сроков
+        # меняется по правкам в этом окне и по изменениям из других процессов
+        self.reminders = ReminderNotifier(self.db, parent=self)
+        self.reminders.due.connect(self.show_reminders)
+        self.model.task_written.connect(self.reminders.task_changed)
+        self.change_watcher.changed.connect(self.reminders.tasks_changed)
+        self.change_watcher.reset.connect(self.restart_reminders)
 
         self.load_tasks()
 
+    @timed("ui.load_tasks")
     def load_tasks(self):
-        self.taskTable.blockSignals(
-            True
-        )  # чтобы не триггерить cellChanged при обновлении
-        self.taskTable.setRowCount(0)
+        """Загрузка задач пользователя (при входе): первая страница, остальные - при прокрутке"""
+        if not self.db:
+            self.model.set_tasks([])
+            return
+        # Несохранённые правки должны попасть в базу до перечитывания списка
+        self.write_queue.flush()
+        self.change_watcher.watch(self.user_id)
+        self.reminders.watch(self.user_id)
+        self.model.load_user(self.user_id)
+        self.refresh_stats()
+
+    def refresh_stats(self):
+        """Сводка по задачам пользователя: число задач и доля выполненных"""
         if not self.db:
-            self.taskTable.blockSignals(False)
             return
+        total, open_count, done = self.db.get_stats(self.user_id)
+        self.statsLabel.setText(
+            f"Всего: {total}, невыполненных: {open_count}, выполненных: {done}"
+        )
+        self.doneProgressBar.setMaximum(max(total, 1))
+        self.doneProgressBar.setValue(done)
 
-        self.tasks = self.db.get_tasks(self.user_id)
-        hide_completed = self.hideCompletedCheckBox.isChecked()
-
-        for task in self.tasks:
-            task_id, title, description, is_done = task
-            if hide_completed and is_done:
-                continue
-
-            row = self.taskTable.rowCount()
-            self.taskTable.insertRow(row)
-
-            title_item = QTableWidgetItem(title)
-            description_item = QTableWidgetItem(description)
-            if is_done:
-                font = title_item.font()
-                font.setStrikeOut(True)
-                title_item.setFont(font)
-                font_desc = description_item.font()
-                font_desc.setStrikeOut(True)
-                description_item.setFont(font_desc)
-            self.taskTable.setItem(row, 0, title_item)
-            self.taskTable.setItem(row, 1, description_item)
-
-            status_item = QTableWidgetItem()
-            status_item.setFlags(
-                status_item.flags()
-                | Qt.ItemFlag.ItemIsUserCheckable
-                | Qt.ItemFlag.ItemIsEnabled
-            )
-            status_item.setCheckState(
-                Qt.CheckState.Checked if is_done else Qt.CheckState.Unchecked
-            )
-            self.taskTable.setItem(row, 2, status_item)
-
-        self.taskTable.blockSignals(False)
-
-    def on_cell_clicked(self, row, column):
-        if column == 2:  # Клик по колонке со статусом
-            item = self.taskTable.item(row, column)
-            if item is None:
-                return
-            current_state = item.checkState()
-            new_state = (
-                Qt.CheckState.Unchecked
-                if current_state == Qt.CheckState.Checked
-                else Qt.CheckState.Checked
-            )
-            item.setCheckState(new_state)
-            # Обновление статуса в базе и UI вызовется через on_cell_changed
-
-    def on_cell_changed(self, row, column):
-        if column == 2:
-            # Обработка изменения статуса по чекбоксу
-            item = self.taskTable.item(row, column)
-            if item is None:
-                return
-            is_done = item.checkState() == Qt.CheckState.Checked
-            task_id = self.tasks[row][0]
-            self.db.update_task_status(task_id, is_done)
+    def restart_reminders(self):
+        self.reminders.watch(self.user_id)
+
+    def show_reminders(self, reminders):
+        """Напоминание о наступивших сроках; окно не блокирует работу со списком"""
+        text = "\n".join(f"• {reminder.title}" for reminder in reminders)
+        box = QMessageBox(
+            QMessageBox.Icon.Information, "Напоминание", f"Наступил срок:\n{text}", parent=self
+        )
+        box.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+        box.setModal(False)
+        box.show()
+
+    @timed("ui.search")
+    def run_search(self):
+        """Показывает результаты поиска, а при пустой строке - обычный список задач"""
+        query = self.searchInput.text().strip()
+        if not query:
             self.load_tasks()
-        elif column in (0, 1):
-            # Обработка изменения названия или описания
-            item = self.taskTable.item(row, column)
-            if item is None:
-                return
-            new_text = item.text()
-            task_id = self.tasks[row][0]
-            if column == 0:
-                self.db.update_task_title(task_id, new_text)
-            else:
-                self.db.update_task_description(task_id, new_text)
+            return
+        self.write_queue.flush()
+        self.model.load_search(self.user_id, query)
+
+    def reset_search(self):
+        self.search_timer.stop()
+        self.searchInput.blockSignals(True)
+        self.searchInput.clear()
+        self.searchInput.blockSignals(False)
+
+    def on_hide_completed_changed(self, state):
+        self.model.set_hide_completed(self.hideCompletedCheckBox.isChecked())
+
+    @timed("ui.cell_clicked")
+    def on_cell_clicked(self, index):
+        if index.column() == STATUS_COLUMN:  # Клик по колонке со статусом
+            self.model.toggle_status(index.row())
+
+    def on_flush_failed(self, error):
+        QMessageBox.warning(self, "Ошибка", f"Не удалось сохранить изменения:\n{error}")
+
+    def confirm_close(self):
+        """Сохраняет отложенные правки перед выходом.
+
+        Если запись не удалась, спрашивает пользователя: повторить попытку,
+        выйти без сохранения или остаться в приложении. Возвращает False,
+        если закрывать окно нельзя.
+        """
+        while not self.write_queue.flush():
+            reply = QMessageBox.question(
+                self,
+                "Выход",
+                "Изменения задач не сохранены. Повторить попытку?",
+                QMessageBox.StandardButton.Retry
+                | QMessageBox.StandardButton.Discard
+                | QMessageBox.StandardButton.Cancel,
+            )
+            if reply == QMessageBox.StandardButton.Discard:
+                self.write_queue.discard()
+                return True
+            if reply != QMessageBox.StandardButton.Retry:
+                return False
+        return True
 
     def add_task_dialog(self):
+        from ranking import PRIORITIES, parse_due_date
+
         title, ok = QInputDialog.getText(self, "Добавить задачу", "Название задачи:")
         if not ok or not title.strip():
             return
@@ -318,21 +464,120 @@ class TasksWindow(QWidget):
         if not ok:
             description = ""
 
+        if not self.confirm_not_duplicate(title.strip(), description.strip()):
+            return
+
+        priority, ok = QInputDialog.getItem(
+            self, "Добавить задачу", "Приоритет:", PRIORITIES, 0, False
+        )
+        priority = PRIORITIES.index(priority) if ok else 0
+
+        due_date = None
+        while True:
+            text, ok = QInputDialog.getText(
+                self, "Добавить задачу", "Срок, ГГГГ-ММ-ДД [ЧЧ:ММ] (необязательно):"
+            )
+            try:
+                due_date = parse_due_date(text, local=True) if ok else None
+                break
+            except ValueError as e:
+                QMessageBox.warning(self, "Ошибка", str(e))
+
         try:
-            self.db.add_task(self.user_id, title.strip(), description.strip())
+            self.model.add_task(
+                self.user_id, title.strip(), description.strip(), due_date, priority
+            )
+            self.refresh_stats()
             QMessageBox.information(self, "Успех", "Задача успешно добавлена")
-            self.load_tasks()
         except Exception as e:
             QMessageBox.warning(self, "Ошибка", f"Не удалось добавить задачу:\n{e}")
 
+    def confirm_not_duplicate(self, title, description):
+        """Если похожие невыполненные задачи уже есть, спрашивает, добавлять ли
+        новую. Возвращает True, если задачу нужно добавить"""
+        # Несохранённые правки названий должны попасть в индекс похожих задач
+        self.write_queue.flush()
+        similar = self.db.similar_tasks(self.user_id, title, description, is_done=0)
+        if not similar:
+            return True
+        text = "\n".join(f"• {task[1]}" for task in similar)
+        reply = QMessageBox.question(
+            self,
+            "Похожие задачи",
+            f"Похожие задачи уже есть:\n{text}\n\nВсё равно добавить задачу?",
+        )
+        return reply == QMessageBox.StandardButton.Yes
+
+    def find_duplicates(self):
+        """Ищет почти одинаковые задачи в фоновом потоке: на длинном списке
+        это занимает секунды"""
+        if self.duplicates_worker is not None:
+            return
+        self.write_queue.flush()
+        self.pushButtonMergeDuplicates.setEnabled(False)
+        self.duplicates_worker = Worker(self.find_duplicate_groups, self.user_id)
+        self.duplicates_worker.signals.finished.connect(self.on_duplicates_found)
+        self.duplicates_worker.signals.failed.connect(self.on_duplicates_failed)
+        db_thread_pool.start(self.duplicates_worker)
+
+    def find_duplicate_groups(self, user_id):
+        """Выполняется в рабочем потоке: (user_id, группы дубликатов)"""
+        return user_id, self.db.duplicate_groups(user_id)
+
+    def on_duplicates_found(self, result):
+        self.duplicates_worker = None
+        self.pushButtonMergeDuplicates.setEnabled(True)
+        user_id, groups = result
+        if user_id != self.user_id:
+            return  # пока шёл поиск, вошёл другой пользователь
+        if not groups:
+            QMessageBox.information(self, "Дубликаты", "Одинаковых задач не найдено")
+            return
+        extra = sum(len(group) - 1 for group in groups)
+        reply = QMessageBox.question(
+            self,
+            "Дубликаты",
+            f"Найдено групп почти одинаковых задач: {len(groups)}.\n"
+            f"Из каждой останется самая ранняя задача, лишних будет удалено: {extra}.\n"
+            "Объединить?",
+        )
+        if reply != QMessageBox.StandardButton.Yes:
+            return
+        self.write_queue.flush()
+        deleted = self.db.merge_tasks(self.user_id, groups)
+        self.run_search()
+        self.refresh_stats()
+        QMessageBox.information(self, "Дубликаты", f"Удалено дубликатов: {deleted}")
+
+    def on_duplicates_failed(self, error):
+        self.duplicates_worker = None
+        self.pushButtonMergeDuplicates.setEnabled(True)
+        QMessageBox.warning(self, "Ошибка", f"Не удалось найти дубликаты:\n{error}")
+
 
 class MainWindow(QMainWindow):
-    """Главное окно приложения со StackedWidget"""
+    """Главное окно приложения со StackedWidget.
+
+    Для быстрого запуска сначала создаётся только приветственная страница,
+    окна входа и регистрации - при первом переходе на них. Если база не
+    передана, она открывается после первого кадра (open_db) или при первом
+    обращении к self.db.
+    """
+
+    first_frame = pyqtSignal()  # окно отрисовано в первый раз
 
-    def __init__(self, db):
+    def __init__(self, db=None):
         super().__init__()
-        loadUi("ui/main_window.ui", self)
-        self.db = db
+        load_ui("main_window", self)
+        self._db = None
+        self.task_cache = None
+        self.archiver = None
+        self.backup_service = None
+        if db is not None:
+            self.open_db(db)
+        self._first_frame_shown = False
+        self.login_window = None
+        self.register_window = None
         self.current_user_id = None  # здесь будем хранить вошедшего пользователя
         self.tasks_window = (
             None  # окно списка задач создаётся позже, когда появится user_id
@@ -347,39 +592,94 @@ class MainWindow(QMainWindow):
 
         self.init_windows()
 
-    def init_windows(self):
-        """Инициализация и добавление окон в stacked widget"""
+    @property
+    def db(self):
+        if self._db is None:
+            self.open_db()
+        return self._db
+
+    def open_db(self, db=None):
+        """Открывает базу (при необходимости создаёт её и обновляет схему)"""
+        if self._db is None:
+            self._db = db if db is not None else Database()
+            # Списки задач читаются через кэш: повторный вход не перечитывает базу
+            self.task_cache = TaskCache(self._db)
+            # Давно выполненные задачи переносятся в архив в фоновом потоке
+            self.archiver = TaskArchiver(self._db)
+            self.archiver.start()
+            # Резервные копии базы по расписанию, тоже в фоновом потоке
+            self.backup_service = BackupService(self._db)
+            self.backup_service.start()
+
+    def restore_session(self):
+        """Открывает базу и, если при прошлом входе отмечено «Запомнить меня»,
+        сразу показывает задачи: токен проверяется без bcrypt"""
+        token = load_session_token(self.db)
+        user_id = self.db.check_session(token) if token else None
+        if user_id is not None:
+            self.on_login_success(user_id)
+
+    def close_db(self):
+        """Закрывает пул соединений, если база была открыта"""
+        if self.archiver is not None:
+            self.archiver.stop()
+        if self.backup_service is not None:
+            self.backup_service.stop()
+        if self._db is not None:
+            self._db.close()
 
-        # Создаем окна, кроме tasks_window, т.к. user_id ещё неизвестен
+    def init_windows(self):
+        """Создаёт стартовую страницу; остальные создаются при первом переходе"""
         self.welcome_window = WelcomeWindow(self.stackedWidget)
-        self.login_window = LoginWindow(self.stackedWidget, self.db)
-        self.register_window = RegisterWindow(self.stackedWidget, self.db)
-
-        # Подписываемся на сигнал успешного входа из окна логина
-        self.login_window.login_success.connect(self.on_login_success)
-
-        # Добавляем окна, которые создали
+        self.welcome_window.login_requested.connect(self.show_login)
+        self.welcome_window.register_requested.connect(self.show_register)
+        # Приветственная страница всегда первая: окна возвращаются к индексу 0
         self.stackedWidget.addWidget(self.welcome_window)
-        self.stackedWidget.addWidget(self.login_window)
-        self.stackedWidget.addWidget(self.register_window)
-
-        # Показываем стартовое окно
         self.stackedWidget.setCurrentIndex(0)
 
+    def show_login(self):
+        if self.login_window is None:
+            self.login_window = LoginWindow(self.stackedWidget, self.db)
+            # Подписываемся на сигнал успешного входа из окна логина
+            self.login_window.login_success.connect(self.on_login_success)
+            self.stackedWidget.addWidget(self.login_window)
+        self.stackedWidget.setCurrentWidget(self.login_window)
+
+    def show_register(self):
+        if self.register_window is None:
+            self.register_window = RegisterWindow(self.stackedWidget, self.db)
+            self.stackedWidget.addWidget(self.register_window)
+        self.stackedWidget.setCurrentWidget(self.register_window)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._first_frame_shown:
+            self._first_frame_shown = True
+            self.first_frame.emit()
+
+    @timed("ui.open_tasks")
     def on_login_success(self, user_id):
         """Вызывается при успешном входе пользователя"""
         self.current_user_id = user_id
         if self.tasks_window is None:
             # Создаём окно задач с user_id, теперь можно загрузить задачи конкретного пользователя
-            self.tasks_window = TasksWindow(self.stackedWidget, self.db, user_id)
+            self.tasks_window = TasksWindow(self.stackedWidget, self.task_cache, user_id)
             self.stackedWidget.addWidget(self.tasks_window)
         else:
             # Если окно задач уже есть, просто обновляем user_id и загружаем задачи
             self.tasks_window.user_id = user_id
+            self.tasks_window.reset_search()
             self.tasks_window.load_tasks()
         # Показываем окно задач
         self.stackedWidget.setCurrentWidget(self.tasks_window)
 
+    def closeEvent(self, event):
+        # Отложенные правки задач сохраняем до закрытия окна
+        if self.tasks_window is not None and not self.tasks_window.confirm_close():
+            event.ignore()
+            return
+        super().closeEvent(event)
+
     def on_page_changed(self, index):
         widget = self.stackedWidget.widget(index)
         if widget:
@@ -387,6 +687,35 @@ class MainWindow(QMainWindow):
             self.resize(size)
 
 
+def session_token_path(db):
+    # Токен «Запомнить меня» лежит рядом с базой, к которой относится
+    return os.path.join(os.path.dirname(os.path.abspath(db.db_path)), SESSION_TOKEN_FILE)
+
+
+def load_session_token(db):
+    try:
+        with open(session_token_path(db), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def save_session_token(db, token):
+    """Сохраняет токен сессии; None - удаляет сохранённый (и его сессию в базе)"""
+    old_token = load_session_token(db)
+    if old_token is not None and old_token != token:
+        db.delete_session(old_token)
+    path = session_token_path(db)
+    if token is None:
+        if old_token is not None:
+            os.remove(path)
+        return
+    # Файл с токеном доступен только владельцу
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(token)
+
+
 def load_stylesheet(filename):
     with open(filename, "r", encoding="utf-8") as f:
         return f.read()
@@ -402,6 +731,9 @@ if hasattr(QtCore.Qt, "AA_UseHighDpiPixmaps"):
 
 
 def main():
+    # Замеры операций включаются переменными окружения (см. instrumentation.py)
+    metrics_path = enable_from_env()
+
     app = QApplication(sys.argv)
 
     # Загружаем иконку окна на все приложение сразу
@@ -411,14 +743,22 @@ def main():
     style = load_stylesheet("styles/ConsoleStyle.qss")
     app.setStyleSheet(style)
 
-    # Создаем объект базы данных
-    db = Database()
-
-    # Создаем главное окно и передаем объект базы
-    window = MainWindow(db)
+    # Создаем главное окно; база открывается сразу после первого кадра,
+    # пока пользователь смотрит на приветственную страницу, и если вход был
+    # запомнен, сразу открываются задачи
+    window = MainWindow()
+    window.first_frame.connect(window.restore_session, Qt.ConnectionType.QueuedConnection)
 
     window.show()
-    sys.exit(app.exec())
+    exit_code = app.exec()
+
+    # Дожидаемся фоновых проверок пароля: они ещё могут обращаться к базе
+    auth_thread_pool.waitForDone()
+    # Закрываем пул соединений после того, как окна сохранили отложенные правки (aboutToQuit)
+    window.close_db()
+    if metrics_path:
+        metrics.write_prometheus(metrics_path)
+    sys.exit(exit_code)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,77 @@
+import os
+import re
+import sqlite3
+
+# Папка с миграциями: файлы вида 001_название.sql, номер файла = версия схемы
+MIGRATIONS_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "database", "migrations"
+)
+
+_MIGRATION_FILE_RE = re.compile(r"^(\d+)_.+\.sql$")
+
+
+def load_migrations(migrations_dir=MIGRATIONS_DIR):
+    """Возвращает список (версия, имя файла, SQL) в порядке возрастания версии"""
+    migrations = []
+    for filename in os.listdir(migrations_dir):
+        match = _MIGRATION_FILE_RE.match(filename)
+        if not match:
+            continue
+        with open(os.path.join(migrations_dir, filename), "r", encoding="utf-8") as f:
+            migrations.append((int(match.group(1)), filename, f.read()))
+    migrations.sort()
+    return migrations
+
+
+def split_statements(sql_script):
+    """Делит SQL-скрипт на отдельные запросы (учитывает триггеры с BEGIN ... END;)"""
+    statements = []
+    buffer = ""
+    for line in sql_script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            statement = buffer.strip()
+            if statement.rstrip(";").strip():
+                statements.append(statement)
+            buffer = ""
+    if buffer.strip() and not buffer.strip().startswith("--"):
+        statements.append(buffer.strip())
+    return statements
+
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn, migrations_dir=MIGRATIONS_DIR):
+    """Доводит схему базы до последней версии и возвращает итоговую версию.
+
+    Каждая миграция выполняется в своей транзакции BEGIN IMMEDIATE вместе с
+    обновлением PRAGMA user_version, поэтому прерванная миграция откатывается
+    целиком, а два процесса не применят одну миграцию дважды.
+    """
+    conn.commit()
+    applied = False
+    for version, filename, sql_script in load_migrations(migrations_dir):
+        if version <= get_version(conn):
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Версию перечитываем под блокировкой: её мог поднять другой процесс
+            if version <= get_version(conn):
+                conn.rollback()
+                continue
+            for statement in split_statements(sql_script):
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {version:d}")
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            raise RuntimeError(f"Ошибка миграции {filename}: {e}") from e
+        applied = True
+
+    if applied:
+        # Обновляем статистику, чтобы планировщик выбирал новые индексы
+        conn.execute("ANALYZE")
+        conn.commit()
+    return get_version(conn)
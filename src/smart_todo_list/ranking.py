@@ -0,0 +1,142 @@
+"""Умный порядок списка задач: ранжирование невыполненных задач NumPy.
+
+Оценка задачи складывается из трёх частей:
+
+- срочность: чем ближе срок, тем выше (вдвое за каждые URGENCY_HALF_LIFE_DAYS
+  до срока); просроченная задача получает полный вес и надбавку, растущую
+  первую неделю просрочки; у задачи без срока срочности нет;
+- приоритет: вес из PRIORITY_WEIGHTS;
+- возраст: давно созданная задача понемногу поднимается, чтобы не лежать
+  внизу списка вечно (полный вес через AGE_FULL_DAYS дней).
+
+Все задачи пользователя оцениваются разом операциями над массивами, без
+цикла Python по строкам. При равной оценке раньше идёт задача с меньшим id.
+"""
+
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Названия приоритетов по значению tasks.priority
+PRIORITIES = ("Нет", "Низкий", "Средний", "Высокий")
+
+# Вес приоритета в оценке задачи
+PRIORITY_WEIGHTS = np.array([0.0, 1.0, 2.5, 5.0])
+
+# Вес задачи со сроком сейчас и через сколько дней до срока он падает вдвое
+URGENCY_WEIGHT = 6.0
+URGENCY_HALF_LIFE_DAYS = 2.0
+
+# Надбавка за просрочку: полная через OVERDUE_FULL_DAYS дней после срока
+OVERDUE_WEIGHT = 2.0
+OVERDUE_FULL_DAYS = 7.0
+
+# Надбавка за возраст: полная через AGE_FULL_DAYS дней после создания
+AGE_WEIGHT = 1.0
+AGE_FULL_DAYS = 30.0
+
+DAY = 24 * 60 * 60
+
+# Форматы срока задачи, которые принимают окно и HTTP-сервис
+DUE_DATE_FORMATS = ("%Y-%m-%d", "%Y-%m-%d %H:%M", "%Y-%m-%d %H:%M:%S")
+
+
+def parse_due_date(text, local=False):
+    """Срок задачи из строки «ГГГГ-ММ-ДД[ ЧЧ:ММ[:СС]]» в формате tasks.due_date.
+
+    Пустая строка и None - без срока (None). Неверный формат - ValueError.
+    Время в tasks.due_date - UTC, как created_at; local=True - строка
+    введена в местном времени (окно приложения) и переводится в UTC.
+    Срок без времени - весь день, он не переводится.
+    """
+    text = (text or "").strip()
+    if not text:
+        return None
+    for fmt in DUE_DATE_FORMATS:
+        try:
+            due = datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+        if fmt == DUE_DATE_FORMATS[0]:
+            return due.strftime("%Y-%m-%d")
+        if local:
+            due = datetime.fromtimestamp(due.timestamp(), timezone.utc)
+        return due.strftime("%Y-%m-%d %H:%M:%S")
+    raise ValueError(f"Срок задачи должен быть в формате ГГГГ-ММ-ДД: {text}")
+
+
+def load_rank_columns(db, user_id):
+    """Невыполненные задачи пользователя: массивы id, срока (0 - без срока),
+    приоритета и времени создания (секунды Unix), int64"""
+    return tuple(
+        np.fromstring(column, sep=",", dtype=np.int64) for column in db.rank_columns(user_id)
+    )
+
+
+def score_tasks(due, priority, created, now=None):
+    """Оценки задач по колонкам срока, приоритета и времени создания (больше - выше).
+
+    Каждая операция проходит по всему массиву, поэтому промежуточные
+    массивы переиспользуются (out=, *=), а не создаются заново.
+    """
+    now = int(time.time() if now is None else now)
+    days_left = (due - now).astype(np.float64)
+    days_left *= 1 / DAY
+    score = np.maximum(days_left, 0.0)
+    score *= -1 / URGENCY_HALF_LIFE_DAYS
+    np.exp2(score, out=score)
+    score *= URGENCY_WEIGHT
+    overdue = np.clip(days_left, -OVERDUE_FULL_DAYS, 0.0, out=days_left)
+    overdue *= -OVERDUE_WEIGHT / OVERDUE_FULL_DAYS
+    score += overdue
+    score[due == 0] = 0.0
+    score += PRIORITY_WEIGHTS[priority]
+    age = (now - created).astype(np.float64)
+    age *= 1 / (DAY * AGE_FULL_DAYS)
+    np.clip(age, 0.0, 1.0, out=age)
+    age *= AGE_WEIGHT
+    score += age
+    return score
+
+
+class Ranking:
+    """Невыполненные задачи пользователя в умном порядке.
+
+    Оценки считаются сразу для всех задач. Полная сортировка нужна, только
+    когда список прокручивают дальше первой страницы: первые count задач
+    (top) выбираются за линейное время. При равных оценках задачи идут в
+    порядке из Database.rank_columns - для задач с одинаковыми полями это
+    порядок id; top и page дают один и тот же порядок.
+    """
+
+    def __init__(self, ids, due, priority, created, now=None):
+        self.ids = ids
+        # Со знаком минус: сортировка по возрастанию
+        self.keys = -score_tasks(due, priority, created, now)
+        self._order = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def top(self, count):
+        """id первых count задач"""
+        if self._order is not None or count >= len(self.ids):
+            return self.page(0, count)
+        kth = np.partition(self.keys, count - 1)[count - 1]
+        better = np.flatnonzero(self.keys < kth)
+        # Из задач с оценкой на границе берутся первые по порядку строк
+        ties = np.flatnonzero(self.keys == kth)[: count - len(better)]
+        rows = np.sort(np.concatenate((better, ties)))
+        return self.ids[rows[np.argsort(self.keys[rows], kind="stable")]]
+
+    def page(self, start, count):
+        """id задач с позиции start, не больше count"""
+        if self._order is None:
+            self._order = np.argsort(self.keys, kind="stable")
+        return self.ids[self._order[start : start + count]]
+
+
+def rank_tasks(db, user_id, now=None):
+    """Ranking невыполненных задач пользователя"""
+    return Ranking(*load_rank_columns(db, user_id), now=now)
@@ -0,0 +1,65 @@
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from reminders import REMINDER_HORIZON, ReminderScheduler
+
+
+class ReminderNotifier(QObject):
+    """Напоминания о сроках задач пользователя в окне приложения.
+
+    Сроки держит ReminderScheduler (reminders.py), а таймер у него один -
+    однократный QTimer на ближайший срок. Пока срок не наступил, окно не
+    делает ничего: ни опроса базы, ни перебора задач. Наступившие
+    напоминания отправляются сигналом due.
+
+    О правках задач сообщают task_changed (правка в этом окне, сразу,
+    даже если она ещё в очереди записи) и tasks_changed (изменения из
+    других процессов от ChangeWatcher).
+    """
+
+    due = pyqtSignal(list)  # [Reminder]
+
+    def __init__(self, db, horizon=REMINDER_HORIZON, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.horizon = horizon
+        self.scheduler = None
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._fire)
+
+    def watch(self, user_id):
+        """Начинает напоминать о задачах пользователя (прежние напоминания сбрасываются)"""
+        self.stop()
+        self.scheduler = ReminderScheduler(
+            self.db, self._arm, self.due.emit, user_id, self.horizon
+        )
+        self.scheduler.start()
+
+    def stop(self):
+        self._timer.stop()
+        self.scheduler = None
+
+    def task_changed(self, task_id, fields):
+        if self.scheduler is not None:
+            self.scheduler.task_changed(task_id, fields)
+
+    def tasks_changed(self, changes):
+        """Изменения из Database.changes_since: [(task_id, строка или None)]"""
+        if self.scheduler is None:
+            return
+        for task_id, task in changes:
+            if task is None:
+                self.scheduler.remove(task_id)
+            else:
+                # Срока в строке задачи нет - его читает task_changed
+                self.scheduler.task_changed(task_id, {})
+
+    def _arm(self, delay):
+        # QTimer принимает целые миллисекунды; срок округляется вверх, чтобы
+        # таймер не сработал раньше него
+        self._timer.start(min(int(delay * 1000) + 1, 2**31 - 1))
+
+    def _fire(self):
+        if self.scheduler is not None:
+            self.scheduler.fire()
@@ -0,0 +1,244 @@
+"""Напоминания о сроках задач: мин-куча сроков и один таймер.
+
+Ближайшие сроки (на REMINDER_HORIZON вперёд) читаются одним запросом по
+индексу (Database.due_tasks) в мин-кучу, и таймер взводится на самый
+ранний из них. Пока срок не наступил, ничего не выполняется: нет ни
+опроса базы, ни перебора задач. Когда задача получает новый срок или
+выполняется, куча меняется на месте за O(log n) (update), и таймер
+перевзводится, только если сменился ближайший срок. Сроки дальше горизонта
+подгружаются, когда до конца горизонта дошёл таймер.
+
+ReminderScheduler не зависит от Qt и asyncio: таймер ему передают функцией
+arm(delay). В окне приложения это QTimer (reminder_notifier.py), в
+HTTP-сервисе - loop.call_later (AsyncReminderScheduler).
+"""
+
+import calendar
+import heapq
+import time
+
+# На сколько секунд вперёд сроки загружаются в кучу
+REMINDER_HORIZON = 24 * 60 * 60
+
+# Куча перестраивается, когда в ней столько устаревших записей на одну живую
+STALE_RATIO = 2
+
+# Поля задачи, от которых напоминание не зависит (кроме названия)
+_UNSCHEDULED_FIELDS = {"description", "priority"}
+
+
+def due_seconds(due_date):
+    """Срок из tasks.due_date (UTC, как created_at) в секундах Unix; None - без срока"""
+    if not due_date:
+        return None
+    fmt = "%Y-%m-%d %H:%M:%S" if len(due_date) > 10 else "%Y-%m-%d"
+    return calendar.timegm(time.strptime(due_date, fmt))
+
+
+class Reminder:
+    """Напоминание о задаче: срок (секунды Unix) и название для показа"""
+
+    __slots__ = ("task_id", "user_id", "title", "due")
+
+    def __init__(self, task_id, user_id, title, due):
+        self.task_id = task_id
+        self.user_id = user_id
+        self.title = title
+        self.due = due
+
+    def __repr__(self):
+        return (
+            f"Reminder(task_id={self.task_id!r}, user_id={self.user_id!r}, "
+            f"title={self.title!r}, due={self.due!r})"
+        )
+
+
+class ReminderQueue:
+    """Мин-куча напоминаний по сроку.
+
+    Запись в куче - (срок, id задачи); действующее напоминание задачи
+    хранится в словаре. Перенос и отмена не ищут запись в куче: старая
+    запись остаётся и пропускается, когда доходит до вершины (ленивое
+    удаление). Поэтому schedule - O(log n), cancel - O(1), а куча
+    перестраивается, когда устаревших записей становится слишком много.
+    """
+
+    def __init__(self):
+        self._heap = []
+        self._reminders = {}  # {task_id: Reminder}
+
+    def __len__(self):
+        return len(self._reminders)
+
+    def __contains__(self, task_id):
+        return task_id in self._reminders
+
+    def get(self, task_id):
+        return self._reminders.get(task_id)
+
+    def schedule(self, reminder):
+        old = self._reminders.get(reminder.task_id)
+        self._reminders[reminder.task_id] = reminder
+        if old is None or old.due != reminder.due:
+            heapq.heappush(self._heap, (reminder.due, reminder.task_id))
+            self._compact()
+
+    def cancel(self, task_id):
+        self._reminders.pop(task_id, None)
+
+    def next_due(self):
+        """Самый ранний срок или None, если напоминаний нет"""
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        """Убирает из кучи и возвращает напоминания со сроком не позже now"""
+        due = []
+        while True:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                return due
+            _, task_id = heapq.heappop(self._heap)
+            due.append(self._reminders.pop(task_id))
+
+    def _is_stale(self, entry):
+        reminder = self._reminders.get(entry[1])
+        return reminder is None or reminder.due != entry[0]
+
+    def _drop_stale(self):
+        while self._heap and self._is_stale(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def _compact(self):
+        if len(self._heap) > (STALE_RATIO + 1) * len(self._reminders) + 64:
+            self._heap = [(r.due, task_id) for task_id, r in self._reminders.items()]
+            heapq.heapify(self._heap)
+
+
+class ReminderScheduler:
+    """Напоминания о сроках задач пользователя (или всех пользователей).
+
+    arm(delay) взводит единственный таймер на delay секунд (прежний
+    отменяется), по таймеру вызывается fire(). on_due(reminders) получает
+    наступившие напоминания. update сообщает о новой задаче или правке
+    срока, статуса, названия; remove - об удалённой задаче.
+    """
+
+    def __init__(self, db, arm, on_due, user_id=None, horizon=REMINDER_HORIZON, clock=time.time):
+        self.db = db
+        self.user_id = user_id
+        self.horizon = horizon
+        self.queue = ReminderQueue()
+        self._arm = arm
+        self._on_due = on_due
+        self._clock = clock
+        self._loaded_until = None  # сроки до этого времени уже в куче
+        self._armed_at = None  # на какой момент взведён таймер
+
+    def start(self):
+        """Загружает сроки на горизонт вперёд и взводит таймер"""
+        now = self._clock()
+        self._loaded_until = now
+        self._load(now)
+        self._rearm(now)
+
+    def fire(self):
+        """Срабатывание таймера: наступившие напоминания и следующий горизонт"""
+        now = self._clock()
+        self._armed_at = None
+        if now >= self._loaded_until:
+            self._load(now)
+        due = self.queue.pop_due(now)
+        if due:
+            self._on_due(due)
+        self._rearm(now)
+
+    def update(self, task_id, user_id, title, due, is_done):
+        """Новое состояние задачи: срок (секунды Unix или None) и статус"""
+        if self._loaded_until is None:  # ещё не запущен: задачу прочитает start
+            return
+        if self.user_id is not None and user_id != self.user_id:
+            self.queue.cancel(task_id)
+            return
+        now = self._clock()
+        if is_done or due is None or due < now or due >= self._loaded_until:
+            # Сроки дальше горизонта загрузит следующий запрос по индексу
+            self.queue.cancel(task_id)
+        else:
+            self.queue.schedule(Reminder(task_id, user_id, title, due))
+        self._rearm(now)
+
+    def task_changed(self, task_id, fields):
+        """Задачу добавили или изменили поля fields ({поле: значение}, как в
+        Database.update_tasks; пустой словарь - неизвестно что).
+
+        Значения из fields новее базы: правка может ещё лежать в очереди
+        записи. Недостающие срок и статус читаются по первичному ключу.
+        """
+        if fields and set(fields) <= _UNSCHEDULED_FIELDS | {"title"}:
+            if "title" in fields:
+                self.rename(task_id, fields["title"])
+            return
+        if fields.get("is_done"):
+            self.remove(task_id)
+            return
+        row = self.db.get_task_due(task_id)
+        if row is None:
+            self.remove(task_id)
+            return
+        user_id, title, due, is_done = row
+        if "due_date" in fields:
+            due = due_seconds(fields["due_date"])
+        self.update(
+            task_id,
+            user_id,
+            fields.get("title", title),
+            due,
+            fields.get("is_done", is_done),
+        )
+
+    def rename(self, task_id, title):
+        """Новое название задачи; куча не меняется"""
+        reminder = self.queue.get(task_id)
+        if reminder is not None:
+            reminder.title = title
+
+    def remove(self, task_id):
+        self.queue.cancel(task_id)
+
+    def _load(self, now):
+        until = now + self.horizon
+        for task_id, user_id, title, due in self.db.due_tasks(
+            self._loaded_until, until, self.user_id
+        ):
+            self.queue.schedule(Reminder(task_id, user_id, title, due))
+        self._loaded_until = until
+
+    def _rearm(self, now):
+        deadline = self.queue.next_due()
+        if deadline is None:
+            deadline = self._loaded_until
+        if deadline != self._armed_at:
+            self._armed_at = deadline
+            self._arm(max(deadline - now, 0))
+
+
+class AsyncReminderScheduler(ReminderScheduler):
+    """ReminderScheduler с таймером asyncio (loop.call_later) - для
+    HTTP-сервиса. Запросы к базе выполняются в потоке цикла: это один
+    запрос по индексу раз в горизонт."""
+
+    def __init__(self, db, on_due, loop, **kwargs):
+        super().__init__(db, self._call_later, on_due, **kwargs)
+        self._loop = loop
+        self._handle = None
+
+    def _call_later(self, delay):
+        if self._handle is not None:
+            self._handle.cancel()
+        self._handle = self._loop.call_later(delay, self.fire)
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
@@ -0,0 +1,566 @@
+"""Шардированное хранилище: каталог пользователей и задачи в N файлах SQLite.
+
+В обычной базе (Database) задачи всех пользователей лежат в одном файле, а
+писать в файл SQLite может только одно соединение за раз: процессы
+HTTP-сервиса, окна и скрипты ждут друг друга на одной блокировке и одном
+журнале WAL. ShardedDatabase раскладывает задачи по файлам-шардам по
+user_id, и записи в разные шарды идут параллельно.
+
+- Каталог (db_path) - обычная база: пользователи, сессии, список шардов
+  (shards) и шард каждого пользователя (user_shards). Задачи, созданные до
+  шардирования, остаются в каталоге - это «шард 0», - пока их не перенесёт
+  rebalance, поэтому существующую базу можно шардировать, ничего не копируя.
+- Шард k (1..N) - файл «<имя>.shard<k>.sqlite» с той же схемой и
+  миграциями. Новый пользователь попадает в шард 1 + user_id % N.
+- id задачи определяет её шард: в шарде k id начинаются с
+  k * SHARD_ID_SPAN (sqlite_sequence), у задач каталога они меньше
+  SHARD_ID_SPAN. Методы, которые получают только id задачи (update_tasks,
+  toggle_task_status, ...), находят файл без обращения к каталогу.
+
+Маршрутизатор повторяет методы Database и передаёт вызов базе нужного
+файла; у каждого файла свой пул соединений по потокам. Шард пользователя
+читается из каталога один раз и дальше берётся из памяти.
+
+rebalance переносит задачи пользователей, чей шард не совпадает с
+расчётным: после шардирования старой базы и после добавления шардов.
+Перенесённые задачи получают новые id. Процессы, открывшие базу до
+переноса, узнают о нём только после перезапуска, поэтому rebalance
+запускается при остановленных сервисах. Запуск из папки src/smart_todo_list:
+
+    python sharding.py --db ../../data/smart_todo_db.sqlite --shards 4
+"""
+
+import argparse
+import heapq
+import os
+import sqlite3
+import sys
+import threading
+
+from database import BCRYPT_ROUNDS, IMPORT_BATCH_SIZE, Database, _batches
+
+# Ширина диапазона id задач одного шарда: шард k выдаёт id от k * SHARD_ID_SPAN.
+# 10^12 задач на шард; id остаются меньше 2^53 и точно передаются в JSON
+SHARD_ID_SPAN = 10**12
+
+# Поля задачи, которые переносятся между файлами (id выдаёт новый шард)
+_TASK_COLUMNS = (
+    "user_id, title, description, is_done, created_at, done_at, due_date, priority"
+)
+_ARCHIVE_COLUMNS = "id, user_id, title, description, is_done, created_at, done_at, archived_at"
+
+
+def shard_path(db_path, shard):
+    """Путь к файлу шарда shard рядом с каталогом db_path"""
+    stem, ext = os.path.splitext(db_path)
+    return f"{stem}.shard{shard}{ext or '.sqlite'}"
+
+
+def is_sharded(db_path):
+    """True, если db_path - каталог шардированной базы"""
+    if db_path is None or not os.path.exists(db_path):
+        return False
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        return (
+            conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'shards'"
+            ).fetchone()
+            is not None
+        )
+    finally:
+        conn.close()
+
+
+def open_database(db_path=None, shards=None):
+    """ShardedDatabase, если база уже шардирована или задано число шардов,
+    иначе обычная Database"""
+    if shards or is_sharded(db_path):
+        return ShardedDatabase(db_path, shards)
+    return Database(db_path)
+
+
+class ShardedDatabase:
+    """Database поверх каталога и N файлов с задачами (см. описание модуля).
+
+    shards - число шардов: при первом открытии база шардируется, большее
+    число добавляет новые файлы (задачи переносит rebalance), None - как
+    записано в каталоге. Уменьшить число шардов нельзя.
+
+    Запись нескольких задач (update_tasks, insert_tasks) - отдельная
+    транзакция в каждом затронутом файле: атомарна она только внутри шарда.
+    """
+
+    def __init__(self, db_path=None, shards=None, bcrypt_rounds=BCRYPT_ROUNDS):
+        self.directory = Database(db_path, bcrypt_rounds)
+        self.db_path = self.directory.db_path
+        self.bcrypt_rounds = bcrypt_rounds
+        self._lock = threading.Lock()
+        self._user_shards = {}  # {user_id: номер шарда}, 0 - каталог
+        count = self._configure(shards)
+        self.shards = [
+            self._open_shard(shard, shard_path(self.db_path, shard))
+            for shard in range(1, count + 1)
+        ]
+        # Базы всех файлов по номеру шарда: каталог (0) и шарды 1..N
+        self.files = [self.directory, *self.shards]
+
+    def _configure(self, shards):
+        """Создаёт таблицы каталога и записывает число шардов; возвращает его"""
+        conn = self.directory._get_connection()
+        conn.commit()
+        self.directory._begin_immediate(conn)
+        try:
+            if conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'shards'"
+            ).fetchone() is None:
+                conn.execute("CREATE TABLE shards (shard INTEGER PRIMARY KEY)")
+                conn.execute(
+                    "CREATE TABLE user_shards ("
+                    " user_id INTEGER PRIMARY KEY REFERENCES users(id),"
+                    " shard INTEGER NOT NULL) WITHOUT ROWID"
+                )
+                # Задачи, которые уже есть в базе, остаются в каталоге
+                conn.execute("INSERT INTO user_shards SELECT id, 0 FROM users")
+            count = conn.execute("SELECT COUNT(*) FROM shards").fetchone()[0]
+            if shards is not None and shards < count:
+                raise ValueError(f"В базе {count} шардов, уменьшить их число нельзя")
+            if shards is not None and shards > count:
+                conn.executemany(
+                    "INSERT INTO shards (shard) VALUES (?)",
+                    ((shard,) for shard in range(count + 1, shards + 1)),
+                )
+                count = shards
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        if not count:
+            raise ValueError("Нужно число шардов: база ещё не шардирована")
+        return count
+
+    def _open_shard(self, shard, path):
+        db = Database(path, self.bcrypt_rounds)
+        conn = db._get_connection()
+        with conn:
+            # id задач шарда начинаются с shard * SHARD_ID_SPAN
+            conn.execute(
+                "INSERT INTO sqlite_sequence (name, seq)"
+                " SELECT 'tasks', ? WHERE NOT EXISTS"
+                " (SELECT 1 FROM sqlite_sequence WHERE name = 'tasks')",
+                (shard * SHARD_ID_SPAN,),
+            )
+        return db
+
+    def close(self):
+        for db in self.files:
+            db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # Маршрутизация
+
+    def home_shard(self, user_id):
+        """Расчётный шард пользователя (хеш по user_id)"""
+        return 1 + user_id % len(self.shards)
+
+    def shard_of_user(self, user_id):
+        """Номер шарда, где лежат задачи пользователя (0 - каталог)"""
+        shard = self._user_shards.get(user_id)
+        if shard is None:
+            shard = self._assign(user_id)
+        return shard
+
+    def for_user(self, user_id):
+        return self.files[self.shard_of_user(user_id)]
+
+    def for_task(self, task_id):
+        """База файла с задачей task_id; None - у такого id нет шарда"""
+        shard = task_id // SHARD_ID_SPAN
+        return self.files[shard] if 0 <= shard <= len(self.shards) else None
+
+    def _assign(self, user_id):
+        conn = self.directory._get_connection()
+        row = conn.execute(
+            "SELECT shard FROM user_shards WHERE user_id = ?", (user_id,)
+        ).fetchone()
+        if row is None:
+            if not conn.execute("SELECT 1 FROM users WHERE id = ?", (user_id,)).fetchone():
+                # Неизвестный пользователь не закрепляется: чтение вернёт пустой
+                # список, а запись - ошибку внешнего ключа, как в Database
+                return self.home_shard(user_id)
+            # Пользователь, добавленный в каталог в обход ShardedDatabase; его
+            # задачи могли остаться в каталоге
+            shard = (
+                0
+                if conn.execute("SELECT 1 FROM tasks WHERE user_id = ?", (user_id,)).fetchone()
+                else self.home_shard(user_id)
+            )
+            self._add_user(shard, user_id)
+            with conn:
+                conn.execute(
+                    "INSERT OR IGNORE INTO user_shards (user_id, shard) VALUES (?, ?)",
+                    (user_id, shard),
+                )
+            # Другой процесс мог закрепить пользователя раньше
+            row = conn.execute(
+                "SELECT shard FROM user_shards WHERE user_id = ?", (user_id,)
+            ).fetchone()
+        with self._lock:
+            self._user_shards[user_id] = row[0]
+        return row[0]
+
+    def _add_user(self, shard, user_id):
+        """Строка пользователя в шарде - для внешнего ключа tasks.user_id.
+        Логин и пароль хранит только каталог"""
+        if shard == 0:
+            return
+        conn = self.files[shard]._get_connection()
+        placeholder = f"#{user_id}"
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO users (id, login, email, password_hash)"
+                " VALUES (?, ?, ?, '')",
+                (user_id, placeholder, placeholder),
+            )
+
+    def _group_by_file(self, task_ids):
+        """{база: [id]} для id, у которых есть шард"""
+        groups = {}
+        for task_id in task_ids:
+            db = self.for_task(task_id)
+            if db is not None:
+                groups.setdefault(db, []).append(task_id)
+        return groups
+
+    # Пользователи и сессии - каталог
+
+    def verify_user(self, login, password):
+        return self.directory.verify_user(login, password)
+
+    def register_user(self, login, email, password):
+        self.directory.register_user(login, email, password)
+        self.shard_of_user(self.directory.get_user_id(login))
+
+    def create_session(self, user_id, *args, **kwargs):
+        return self.directory.create_session(user_id, *args, **kwargs)
+
+    def check_session(self, token):
+        return self.directory.check_session(token)
+
+    def delete_session(self, token):
+        self.directory.delete_session(token)
+
+    def get_user_id(self, login):
+        return self.directory.get_user_id(login)
+
+    # Задачи пользователя - его шард
+
+    def get_tasks(self, user_id):
+        return self.for_user(user_id).get_tasks(user_id)
+
+    def iter_tasks(self, user_id, *args, **kwargs):
+        return self.for_user(user_id).iter_tasks(user_id, *args, **kwargs)
+
+    def query_tasks(self, query):
+        return self.for_user(query.user_id).query_tasks(query)
+
+    def rank_columns(self, user_id):
+        return self.for_user(user_id).rank_columns(user_id)
+
+    def get_stats(self, user_id):
+        return self.for_user(user_id).get_stats(user_id)
+
+    def search_tasks(self, user_id, query, *args, **kwargs):
+        return self.for_user(user_id).search_tasks(user_id, query, *args, **kwargs)
+
+    def similar_tasks(self, user_id, *args, **kwargs):
+        return self.for_user(user_id).similar_tasks(user_id, *args, **kwargs)
+
+    def duplicate_groups(self, user_id, *args, **kwargs):
+        return self.for_user(user_id).duplicate_groups(user_id, *args, **kwargs)
+
+    def merge_tasks(self, user_id, groups):
+        return self.for_user(user_id).merge_tasks(user_id, groups)
+
+    def add_task(self, user_id, *args, **kwargs):
+        return self.for_user(user_id).add_task(user_id, *args, **kwargs)
+
+    def add_tasks(self, user_id, tasks):
+        return self.for_user(user_id).add_tasks(user_id, tasks)
+
+    def import_tasks(self, user_id, tasks, *args, **kwargs):
+        return self.for_user(user_id).import_tasks(user_id, tasks, *args, **kwargs)
+
+    def insert_tasks(self, rows, batch_size=IMPORT_BATCH_SIZE, defer_indexes=False):
+        """Строки (user_id, ...) пишутся пачками, каждая пачка - по шардам.
+        defer_indexes не поддерживается: импорт в несколько файлов не может
+        быть одной транзакцией (для одного пользователя - import_tasks)"""
+        if defer_indexes:
+            raise ValueError("defer_indexes работает только для одного шарда (import_tasks)")
+        count = 0
+        for batch in _batches(rows, batch_size):
+            groups = {}
+            for row in batch:
+                groups.setdefault(self.shard_of_user(row[0]), []).append(row)
+            for shard, group in groups.items():
+                count += self.files[shard].insert_tasks(group, batch_size)
+        return count
+
+    def export_tasks(self, user_id, include_archived=False):
+        return self.for_user(user_id).export_tasks(user_id, include_archived)
+
+    def changes_since(self, user_id, version):
+        return self.for_user(user_id).changes_since(user_id, version)
+
+    def data_version(self, user_id=None):
+        """data_version файла с задачами пользователя (без user_id - каталога)"""
+        db = self.directory if user_id is None else self.for_user(user_id)
+        return db.data_version()
+
+    def change_version(self, user_id=None):
+        """Версия журнала изменений файла с задачами пользователя"""
+        db = self.directory if user_id is None else self.for_user(user_id)
+        return db.change_version()
+
+    # Задачи по id - шард из id
+
+    def get_tasks_by_ids(self, task_ids):
+        by_id = {}
+        for db, ids in self._group_by_file(task_ids).items():
+            by_id.update((row[0], row) for row in db.get_tasks_by_ids(ids))
+        return [by_id[task_id] for task_id in task_ids if task_id in by_id]
+
+    def update_tasks(self, updates):
+        for db, ids in self._group_by_file(updates).items():
+            db.update_tasks({task_id: updates[task_id] for task_id in ids})
+
+    def update_task_status(self, task_id, is_done):
+        db = self.for_task(task_id)
+        if db is not None:
+            db.update_task_status(task_id, is_done)
+
+    def update_task_title(self, task_id, new_title):
+        db = self.for_task(task_id)
+        if db is not None:
+            db.update_task_title(task_id, new_title)
+
+    def update_task_description(self, task_id, new_description):
+        db = self.for_task(task_id)
+        if db is not None:
+            db.update_task_description(task_id, new_description)
+
+    def toggle_task_status(self, task_id):
+        db = self.for_task(task_id)
+        return None if db is None else db.toggle_task_status(task_id)
+
+    def get_task_due(self, task_id):
+        db = self.for_task(task_id)
+        return None if db is None else db.get_task_due(task_id)
+
+    def get_task_owner(self, task_id):
+        db = self.for_task(task_id)
+        return None if db is None else db.get_task_owner(task_id)
+
+    def due_tasks(self, start, end, user_id=None):
+        if user_id is not None:
+            return self.for_user(user_id).due_tasks(start, end, user_id)
+        # Каждый файл отдаёт сроки по порядку - сливаем, не сортируя заново
+        return list(
+            heapq.merge(*(db.due_tasks(start, end) for db in self.files), key=lambda row: row[3])
+        )
+
+    # Обслуживание - все файлы
+
+    def trim_changes(self, *args, **kwargs):
+        for db in self.files:
+            db.trim_changes(*args, **kwargs)
+
+    def check_stats(self, repair=False):
+        # Счётчики в каждом файле - по его задачам; у перенесённого
+        # пользователя в прежнем файле остаются нули
+        return [mismatch for db in self.files for mismatch in db.check_stats(repair)]
+
+    def archive_tasks(self, *args, **kwargs):
+        return sum(db.archive_tasks(*args, **kwargs) for db in self.files)
+
+    def incremental_vacuum(self, pages=None):
+        return sum(db.incremental_vacuum(pages) for db in self.files)
+
+    def enable_incremental_vacuum(self):
+        for db in self.files:
+            db.enable_incremental_vacuum()
+
+
+def move_user(db, user_id, target):
+    """Переносит задачи пользователя (и его архив) в шард target.
+
+    Исходный файл держит блокировку записи, пока задачи копируются, поэтому
+    ни одна запись в него не теряется. Порядок шагов - копия, новая запись
+    в user_shards, удаление из исходного файла: после сбоя задачи остаются
+    в обоих файлах, а не пропадают, и повторный rebalance доводит перенос
+    (копия в target перед вставкой удаляет остатки прошлой попытки, а
+    остатки в исходном файле удаляет purge_moved).
+    Возвращает число перенесённых задач.
+    """
+    source = db.shard_of_user(user_id)
+    if source == target:
+        return 0
+    source_db, target_db = db.files[source], db.files[target]
+    db._add_user(target, user_id)
+    has_archive = os.path.exists(source_db.archive_path)
+    if has_archive:
+        # ATTACH невозможен внутри транзакции - подключаем архивы заранее
+        source_db._archive_connection()
+        target_db._archive_connection()
+
+    source_conn = source_db._get_connection()
+    source_conn.commit()
+    source_db._begin_immediate(source_conn)
+    try:
+        moved = _copy_tasks(target_db, source_db, user_id, has_archive)
+        directory = db.directory._get_connection()
+        with directory:
+            directory.execute(
+                "INSERT OR REPLACE INTO user_shards (user_id, shard) VALUES (?, ?)",
+                (user_id, target),
+            )
+        with db._lock:
+            db._user_shards[user_id] = target
+        _delete_user_tasks(source_conn, source, user_id, has_archive)
+        source_conn.commit()
+    except BaseException:
+        source_conn.rollback()
+        raise
+    return moved
+
+
+def _copy_tasks(target_db, source_db, user_id, has_archive):
+    conn = target_db._get_connection()
+    conn.execute("ATTACH DATABASE ? AS source", (source_db.db_path,))
+    if has_archive:
+        conn.execute("ATTACH DATABASE ? AS source_archive", (source_db.archive_path,))
+    try:
+        # Обычный BEGIN, не IMMEDIATE: IMMEDIATE взял бы блокировку записи и
+        # подключённого исходного файла, а её держит move_user. Исходный файл
+        # только читается
+        conn.execute("BEGIN")
+        with conn:
+            conn.execute("DELETE FROM main.tasks WHERE user_id = ?", (user_id,))
+            # Порядок id сохраняется; новые id выдаёт sqlite_sequence шарда
+            moved = conn.execute(
+                f"INSERT INTO main.tasks ({_TASK_COLUMNS})"
+                f" SELECT {_TASK_COLUMNS} FROM source.tasks WHERE user_id = ? ORDER BY id",
+                (user_id,),
+            ).rowcount
+            if has_archive:
+                # id в архиве не пересекаются: диапазоны id шардов разные
+                conn.execute(
+                    f"INSERT OR IGNORE INTO archive.archived_tasks ({_ARCHIVE_COLUMNS})"
+                    f" SELECT {_ARCHIVE_COLUMNS} FROM source_archive.archived_tasks"
+                    " WHERE user_id = ?",
+                    (user_id,),
+                )
+    finally:
+        conn.execute("DETACH DATABASE source")
+        if has_archive:
+            conn.execute("DETACH DATABASE source_archive")
+    return moved
+
+
+def _delete_user_tasks(conn, shard, user_id, has_archive):
+    conn.execute("DELETE FROM main.tasks WHERE user_id = ?", (user_id,))
+    if has_archive:
+        conn.execute("DELETE FROM archive.archived_tasks WHERE user_id = ?", (user_id,))
+    if shard != 0:
+        # Без строки пользователя запись из процесса со старой картой шардов
+        # не пройдёт проверку внешнего ключа и не потеряется молча
+        conn.execute("DELETE FROM main.users WHERE id = ?", (user_id,))
+    # Индекс похожих задач пользователя теперь строится в другом файле
+    conn.execute("DELETE FROM main.task_minhash WHERE user_id = ?", (user_id,))
+    conn.execute("DELETE FROM main.task_minhash_state WHERE user_id = ?", (user_id,))
+
+
+def rebalance(db, progress=None):
+    """Переносит пользователей, чей шард не совпадает с расчётным, и удаляет
+    остатки прерванных переносов (purge_moved).
+
+    progress(user_id, source, target, moved) вызывается после каждого
+    пользователя. Возвращает (число пользователей, число задач).
+    """
+    placement = db.directory._get_connection().execute(
+        "SELECT user_id, shard FROM user_shards ORDER BY user_id"
+    ).fetchall()
+    users = tasks = 0
+    for user_id, shard in placement:
+        target = db.home_shard(user_id)
+        if shard == target:
+            continue
+        moved = move_user(db, user_id, target)
+        users += 1
+        tasks += moved
+        if progress is not None:
+            progress(user_id, shard, target, moved)
+    purge_moved(db)
+    return users, tasks
+
+
+def purge_moved(db):
+    """Удаляет из файлов задачи пользователей, закреплённых за другим шардом
+    (остатки переноса, прерванного после записи в user_shards).
+    Возвращает число удалённых задач"""
+    placement = dict(
+        db.directory._get_connection().execute("SELECT user_id, shard FROM user_shards")
+    )
+    purged = 0
+    for shard, file_db in enumerate(db.files):
+        conn = file_db._get_connection()
+        has_archive = os.path.exists(file_db.archive_path)
+        if has_archive:
+            file_db._archive_connection()
+        # В шарде у каждого пользователя с задачами есть строка users; в
+        # каталоге пользователи настоящие - их задачи ищутся по индексу
+        users = conn.execute(
+            "SELECT DISTINCT user_id FROM main.tasks" if shard == 0 else "SELECT id FROM main.users"
+        ).fetchall()
+        for (user_id,) in users:
+            if placement.get(user_id, shard) == shard:
+                continue
+            with conn:
+                purged += conn.execute(
+                    "SELECT COUNT(*) FROM main.tasks WHERE user_id = ?", (user_id,)
+                ).fetchone()[0]
+                _delete_user_tasks(conn, shard, user_id, has_archive)
+    return purged
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Шардирование базы задач")
+    parser.add_argument("--db", help="путь к базе (по умолчанию data/smart_todo_db.sqlite)")
+    parser.add_argument(
+        "--shards", type=int, help="число шардов (по умолчанию - как записано в базе)"
+    )
+    args = parser.parse_args(argv)
+
+    try:
+        db = ShardedDatabase(args.db, args.shards)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    with db:
+        users, tasks = rebalance(
+            db,
+            lambda user_id, source, target, moved: print(
+                f"Пользователь {user_id}: шард {source} -> {target}, задач: {moved}"
+            ),
+        )
+        print(f"Шардов: {len(db.shards)}, перенесено пользователей: {users}, задач: {tasks}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""Поиск похожих задач: MinHash по триграммам символов и LSH-полосы.
+
+Текст задачи (название и описание) приводится к одному виду (normalize) и
+делится на триграммы символов. MinHash сжимает множество триграмм в
+SIGNATURE_SIZE чисел так, что доля совпавших чисел у двух задач
+приближает меру Жаккара их множеств. Подпись режется на BANDS полос по
+BAND_ROWS чисел; каждая полоса хешируется в одно число. Задачи с
+совпавшей хотя бы одной полосой - кандидаты в дубликаты: при BANDS = 8 и
+BAND_ROWS = 3 пара с мерой Жаккара 0,6 становится кандидатами с
+вероятностью около 0,86, 0,8 - почти наверняка, а 0,3 - лишь в каждом
+пятом случае. Кандидатов проверяет точная мера Жаккара (jaccard).
+
+Хеши полос хранит таблица task_minhash (Database.similar_tasks), поэтому
+поиск похожих - несколько запросов по индексу, а не сравнение со всеми
+задачами пользователя. Подписи считаются NumPy сразу для пачки задач:
+цикл Python идёт по задачам, а не по триграммам и хеш-функциям.
+"""
+
+import re
+
+import numpy as np
+
+# Длина подписи MinHash, число полос и чисел в полосе (SIGNATURE_SIZE = BANDS * BAND_ROWS)
+BANDS = 8
+BAND_ROWS = 3
+SIGNATURE_SIZE = BANDS * BAND_ROWS
+
+# С какой меры Жаккара триграмм задачи считаются похожими (предупреждение
+# при добавлении) и с какой объединяются: объединение удаляет текст
+# дубликатов, поэтому объединяются только почти одинаковые задачи
+DUPLICATE_THRESHOLD = 0.6
+MERGE_THRESHOLD = 0.8
+
+_NON_WORD_RE = re.compile(r"[\W_]+")
+
+_rng = np.random.default_rng(20250601)
+# Соли хеш-функций подписи и полос: постоянные, подписи в базе не зависят от процесса
+_SIGNATURE_SEEDS = _rng.integers(0, 2**63, SIGNATURE_SIZE, dtype=np.uint64)
+_BAND_SEEDS = _rng.integers(0, 2**63, BANDS, dtype=np.uint64)
+
+
+def normalize(title, description=""):
+    """Текст задачи для сравнения: нижний регистр, «ё» = «е», слова через пробел"""
+    text = f"{title} {description or ''}".lower().replace("ё", "е")
+    return " " + " ".join(_NON_WORD_RE.sub(" ", text).split()) + " "
+
+
+def trigrams(text):
+    """Множество триграмм нормализованного текста"""
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def jaccard(a, b):
+    """Мера Жаккара двух множеств триграмм"""
+    if not a or not b:
+        return 0.0
+    common = len(a & b)
+    return common / (len(a) + len(b) - common)
+
+
+def _mix(x):
+    # Финальное перемешивание splitmix64: соседние коды триграмм дают
+    # непохожие хеши. Переполнение uint64 здесь - умножение по модулю 2**64
+    x = x ^ (x >> np.uint64(30))
+    x = x * np.uint64(0xBF58476D1CE4E5B9)
+    x = x ^ (x >> np.uint64(27))
+    x = x * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def band_hashes(texts):
+    """Хеши полос для пачки нормализованных текстов.
+
+    Возвращает массив int64 формы (len(texts), BANDS) - числа помещаются в
+    INTEGER SQLite. У текста без триграмм (короче трёх символов) все
+    хеши полос равны 0: с другими задачами он не сравнивается.
+    """
+    count = len(texts)
+    bands = np.zeros((count, BANDS), dtype=np.int64)
+    if count == 0:
+        return bands
+    # Все тексты - один массив кодов символов; триграмма - три соседних кода
+    # в 21 бите каждый. Разделитель \0 не даёт триграммам склеить соседние тексты
+    joined = "\0".join(texts) + "\0"
+    codes = np.frombuffer(joined.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    lengths = np.fromiter((len(text) for text in texts), dtype=np.int64, count=count)
+    starts = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+    grams = (codes[:-2] << np.uint64(42)) | (codes[1:-1] << np.uint64(21)) | codes[2:]
+    # Триграмма с началом на позиции i принадлежит тексту, если не задевает разделитель
+    valid = np.ones(len(grams), dtype=bool)
+    separators = starts[1:] - 1
+    for shift in (0, 1, 2):
+        positions = separators - shift
+        valid[positions[positions >= 0]] = False
+    valid[len(codes) - 3 :] = False
+    owners = np.repeat(np.arange(count), lengths + 1)[: len(grams)][valid]
+    grams = _mix(grams[valid])
+    present = np.bincount(owners, minlength=count) > 0
+    if not present.any():
+        return bands
+    # Триграммы идут подряд по текстам: минимум по каждому тексту - reduceat
+    offsets = np.searchsorted(owners, np.flatnonzero(present))
+
+    signature = np.empty((int(present.sum()), SIGNATURE_SIZE), dtype=np.uint64)
+    for k, seed in enumerate(_SIGNATURE_SEEDS):
+        signature[:, k] = np.minimum.reduceat(_mix(grams ^ seed), offsets)
+    for band, seed in enumerate(_BAND_SEEDS):
+        h = seed
+        for value in signature[:, band * BAND_ROWS : (band + 1) * BAND_ROWS].T:
+            h = _mix(h ^ value)
+        bands[present, band] = h.view(np.int64)
+    return bands
@@ -0,0 +1,225 @@
+import sys
+from collections import OrderedDict
+
+# Сколько памяти по умолчанию могут занимать закэшированные задачи
+CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Ключ полного списка задач пользователя (get_tasks) среди его записей кэша
+_ALL_TASKS = ("get_tasks",)
+
+
+class _Entry:
+    """Закэшированный результат одного запроса задач"""
+
+    __slots__ = ("rows", "positions", "fields", "after_id", "size")
+
+    def __init__(self, rows, fields, after_id=None):
+        self.rows = list(rows)
+        self.positions = {row[0]: i for i, row in enumerate(self.rows)}
+        self.fields = fields  # поля, от которых зависят состав и порядок строк
+        # Задача-курсор keyset-страницы: от её полей зависит начало страницы
+        self.after_id = after_id
+        self.size = sum(_row_size(row) for row in self.rows)
+
+
+class TaskCache:
+    """Кэш задач в памяти перед Database.
+
+    Результаты get_tasks и query_tasks хранятся по пользователям: повторный
+    показ того же списка (например, после повторного входа) не выполняет
+    SQL. Запись идёт сквозь кэш (write-through): сначала в базу, затем
+    в закэшированные строки. Если правка может поменять состав или порядок
+    результата (например, статус при фильтре «скрыть выполненные»), такой
+    результат выбрасывается и при следующем запросе читается заново.
+
+    Пользователи вытесняются целиком, давно не использованные первыми (LRU),
+    когда оценка занятой памяти превышает max_bytes. Счётчики hits, misses и
+    evictions показывают эффективность кэша. Остальные методы Database
+    (вход, поиск и т.д.) вызываются напрямую, без кэша.
+
+    Кэш не видит изменений, сделанных в обход него (другим процессом или
+    другим объектом Database), пока их не запросят через changes_since:
+    тогда результаты пользователя выбрасываются. Кэш рассчитан на
+    использование из одного потока.
+    """
+
+    def __init__(self, db, max_bytes=CACHE_MAX_BYTES):
+        self.db = db
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._users = OrderedDict()  # {user_id: {ключ запроса: _Entry}}
+
+    def __getattr__(self, name):
+        return getattr(self.db, name)
+
+    def get_tasks(self, user_id):
+        return self._cached(user_id, _ALL_TASKS, frozenset(), None, self.db.get_tasks, user_id)
+
+    def query_tasks(self, query):
+        sql, params = query.compile()
+        return self._cached(
+            query.user_id,
+            (sql, tuple(params)),
+            query.fields(),
+            query.after_id,
+            self.db.query_tasks,
+            query,
+        )
+
+    def _cached(self, user_id, key, fields, after_id, load, *args):
+        entries = self._users.get(user_id)
+        entry = entries.get(key) if entries is not None else None
+        if entry is not None:
+            self.hits += 1
+            self._users.move_to_end(user_id)
+            return list(entry.rows)
+
+        self.misses += 1
+        rows = load(*args)
+        entry = _Entry(rows, fields, after_id)
+        self._users.setdefault(user_id, {})[key] = entry
+        self._users.move_to_end(user_id)
+        self.size += entry.size
+        self._evict()
+        return rows
+
+    def _evict(self):
+        while self.size > self.max_bytes and self._users:
+            _, entries = self._users.popitem(last=False)
+            self.size -= sum(entry.size for entry in entries.values())
+            self.evictions += 1
+
+    def invalidate(self, user_id=None):
+        """Забывает задачи пользователя (или всех, если user_id - None)"""
+        user_ids = list(self._users) if user_id is None else [user_id]
+        for user_id in user_ids:
+            entries = self._users.pop(user_id, None)
+            if entries is not None:
+                self.size -= sum(entry.size for entry in entries.values())
+
+    def changes_since(self, user_id, version):
+        # Изменения, сделанные в обход кэша (другим процессом): закэшированные
+        # результаты пользователя устарели
+        version, changes = self.db.changes_since(user_id, version)
+        if changes != []:
+            self.invalidate(user_id)
+        return version, changes
+
+    def add_task(self, user_id, title, description, due_date=None, priority=0):
+        task_id = self.db.add_task(user_id, title, description, due_date, priority)
+        # Новая задача может попасть в любой результат, кроме полного списка:
+        # у неё наибольший id, поэтому она просто дописывается в его конец
+        entries = self._users.get(user_id, {})
+        full = entries.get(_ALL_TASKS)
+        self._drop(user_id, [key for key in entries if key != _ALL_TASKS])
+        if full is not None:
+            row = (task_id, title, description, 0)
+            full.positions[task_id] = len(full.rows)
+            full.rows.append(row)
+            full.size += _row_size(row)
+            self.size += _row_size(row)
+            self._evict()
+        return task_id
+
+    def add_tasks(self, user_id, tasks):
+        count = self.db.add_tasks(user_id, tasks)
+        self.invalidate(user_id)
+        return count
+
+    def import_tasks(self, user_id, tasks, *args, **kwargs):
+        try:
+            return self.db.import_tasks(user_id, tasks, *args, **kwargs)
+        finally:
+            # Прерванный импорт тоже мог записать часть задач
+            self.invalidate(user_id)
+
+    def insert_tasks(self, rows, *args, **kwargs):
+        try:
+            return self.db.insert_tasks(rows, *args, **kwargs)
+        finally:
+            self.invalidate()
+
+    def merge_tasks(self, user_id, groups):
+        deleted = self.db.merge_tasks(user_id, groups)
+        self.invalidate(user_id)
+        return deleted
+
+    def update_tasks(self, updates):
+        self.db.update_tasks(updates)
+        self._apply(updates)
+
+    def update_task_status(self, task_id, is_done):
+        self.db.update_task_status(task_id, is_done)
+        self._apply({task_id: {"is_done": is_done}})
+
+    def update_task_title(self, task_id, new_title):
+        self.db.update_task_title(task_id, new_title)
+        self._apply({task_id: {"title": new_title}})
+
+    def update_task_description(self, task_id, new_description):
+        self.db.update_task_description(task_id, new_description)
+        self._apply({task_id: {"description": new_description}})
+
+    def toggle_task_status(self, task_id):
+        is_done = self.db.toggle_task_status(task_id)
+        if is_done is not None:
+            self._apply({task_id: {"is_done": is_done}})
+        return is_done
+
+    def _apply(self, updates):
+        """Переносит записанные в базу правки в закэшированные строки"""
+        for task_id, fields in updates.items():
+            owners = [
+                user_id
+                for user_id, entries in self._users.items()
+                if any(task_id in entry.positions for entry in entries.values())
+            ]
+            # Задачи нет ни в одном результате - владелец неизвестен, и правка
+            # могла добавить её в отфильтрованный результат любого пользователя
+            changed = set(fields)
+            for user_id in owners or list(self._users):
+                entries = self._users[user_id]
+                self._drop(
+                    user_id,
+                    [key for key, entry in entries.items() if entry.fields & changed],
+                )
+                for entry in entries.values():
+                    if task_id in entry.positions:
+                        self._patch(entry, task_id, fields)
+            # Страницы, которые начинаются после этой задачи, сдвигаются вместе с ней
+            for user_id, entries in self._users.items():
+                self._drop(
+                    user_id,
+                    [
+                        key
+                        for key, entry in entries.items()
+                        if entry.after_id == task_id and entry.fields & changed
+                    ],
+                )
+
+    def _patch(self, entry, task_id, fields):
+        position = entry.positions[task_id]
+        old = entry.rows[position]
+        task_id, title, description, is_done = old
+        new = (
+            task_id,
+            fields.get("title", title),
+            fields.get("description", description),
+            fields.get("is_done", is_done),
+        )
+        entry.rows[position] = new
+        delta = _row_size(new) - _row_size(old)
+        entry.size += delta
+        self.size += delta
+
+    def _drop(self, user_id, keys):
+        entries = self._users.get(user_id)
+        for key in keys:
+            self.size -= entries.pop(key).size
+
+
+def _row_size(row):
+    return sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
@@ -0,0 +1,122 @@
+"""Потоковый импорт и экспорт задач пользователя в CSV и JSONL.
+
+Запуск из папки src/smart_todo_list:
+
+    python task_io.py export --login user tasks.csv
+    python task_io.py export --login user history.csv --archived
+    python task_io.py import --login user tasks.jsonl --defer-indexes
+
+Формат определяется по расширению файла (.csv или .jsonl) или ключом
+--format. Строки читаются и пишутся генераторами, поэтому память не зависит
+от числа задач.
+"""
+
+import argparse
+import csv
+import json
+import sys
+
+from database import Database
+
+# Колонки файла в порядке, в котором их принимает Database.import_tasks
+FIELDS = ("title", "description", "is_done", "created_at")
+
+FORMATS = ("csv", "jsonl")
+
+
+def read_tasks(f, fmt):
+    """Задачи (title, description, is_done, created_at) из открытого файла"""
+    if fmt == "csv":
+        records = csv.DictReader(f)
+    else:
+        records = (json.loads(line) for line in f if line.strip())
+    for number, record in enumerate(records, 1):
+        title = record.get("title")
+        if not title:
+            raise ValueError(f"Запись {number}: не указано название задачи")
+        yield (
+            title,
+            record.get("description") or "",
+            _parse_done(record.get("is_done")),
+            record.get("created_at") or None,
+        )
+
+
+def write_tasks(f, fmt, tasks):
+    """Пишет задачи в открытый файл, возвращает их число"""
+    count = 0
+    if fmt == "csv":
+        writer = csv.writer(f)
+        writer.writerow(FIELDS)
+        for count, task in enumerate(tasks, 1):
+            writer.writerow(task)
+    else:
+        for count, task in enumerate(tasks, 1):
+            f.write(json.dumps(dict(zip(FIELDS, task)), ensure_ascii=False))
+            f.write("\n")
+    return count
+
+
+def _parse_done(value):
+    if isinstance(value, str):
+        return int(value.strip().lower() in ("1", "true", "да"))
+    return int(bool(value))
+
+
+def detect_format(path, fmt=None):
+    if fmt is not None:
+        return fmt
+    for candidate in FORMATS:
+        if path.lower().endswith("." + candidate):
+            return candidate
+    raise ValueError(f"Не удалось определить формат файла {path}, укажите --format")
+
+
+def import_file(db, user_id, path, fmt=None, defer_indexes=False):
+    fmt = detect_format(path, fmt)
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        return db.import_tasks(user_id, read_tasks(f, fmt), defer_indexes=defer_indexes)
+
+
+def export_file(db, user_id, path, fmt=None, include_archived=False):
+    fmt = detect_format(path, fmt)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        return write_tasks(f, fmt, db.export_tasks(user_id, include_archived))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Импорт и экспорт задач пользователя")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("path", help="файл .csv или .jsonl")
+    parser.add_argument("--login", required=True, help="логин пользователя")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--db", help="путь к базе (по умолчанию data/smart_todo_db.sqlite)")
+    parser.add_argument(
+        "--defer-indexes",
+        action="store_true",
+        help="импорт одной транзакцией с перестроением индексов в конце",
+    )
+    parser.add_argument(
+        "--archived", action="store_true", help="экспорт вместе с задачами из архива"
+    )
+    args = parser.parse_args(argv)
+
+    with Database(args.db) as db:
+        user_id = db.get_user_id(args.login)
+        if user_id is None:
+            parser.error(f"пользователь {args.login} не найден")
+        try:
+            if args.command == "import":
+                count = import_file(db, user_id, args.path, args.format, args.defer_indexes)
+                print(f"Импортировано задач: {count}")
+            else:
+                count = export_file(db, user_id, args.path, args.format, args.archived)
+                print(f"Экспортировано задач: {count}")
+        except (OSError, ValueError) as e:
+            print(f"Ошибка: {e}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
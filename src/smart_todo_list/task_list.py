@@ -0,0 +1,152 @@
+import sys
+from array import array
+from bisect import bisect_left
+
+# Поля задачи в порядке строки из базы (id, title, description, is_done)
+TASK_FIELDS = ("id", "title", "description", "is_done")
+
+
+class Task:
+    """Одна задача. Распаковывается как строка из базы:
+
+        task_id, title, description, is_done = task
+    """
+
+    __slots__ = TASK_FIELDS
+
+    def __init__(self, id, title, description="", is_done=0):
+        self.id = id
+        self.title = title
+        self.description = description
+        self.is_done = is_done
+
+    def __iter__(self):
+        return iter((self.id, self.title, self.description, self.is_done))
+
+    def __eq__(self, other):
+        if isinstance(other, (Task, tuple)):
+            return tuple(self) == tuple(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return (
+            f"Task(id={self.id!r}, title={self.title!r}, "
+            f"description={self.description!r}, is_done={self.is_done!r})"
+        )
+
+
+class TaskList:
+    """Список задач по колонкам: для больших списков в модели таблицы.
+
+    Вместо объекта на задачу хранятся параллельные колонки: id в array("q"),
+    статусы в array("b"), названия и описания - списки строк, одинаковые
+    строки (пустые описания, повторяющиеся названия) хранятся один раз
+    (sys.intern). Задача на строке row читается по индексу за O(1) без
+    создания объектов (ids[row], titles[row], ...), а tasks[row] собирает
+    из колонок Task.
+
+    row_of(task_id) находит строку задачи. Пока задачи идут по возрастанию
+    id (список по умолчанию), это двоичный поиск по колонке ids без
+    дополнительной памяти. При другом порядке строится словарь id -> строка:
+    при первом обращении, а после вставки или удаления в середине - только
+    для сдвинувшихся строк.
+    """
+
+    def __init__(self, rows=()):
+        self.ids = array("q")
+        self.done = array("b")
+        self.titles = []
+        self.descriptions = []
+        self._ascending = True  # ids возрастают - row_of ищет двоичным поиском
+        self._rows_by_id = None  # {id: строка}, None - ещё не нужен
+        self._indexed = 0  # строки до этой записаны в _rows_by_id верно
+        self.extend(rows)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, row):
+        return Task(self.ids[row], self.titles[row], self.descriptions[row], self.done[row])
+
+    def __iter__(self):
+        for row in range(len(self.ids)):
+            yield self[row]
+
+    def task_id(self, row):
+        return self.ids[row]
+
+    def insert(self, row, tasks):
+        """Вставляет задачи (Task или строки из базы) перед строкой row"""
+        ids, done, titles, descriptions = array("q"), array("b"), [], []
+        for task_id, title, description, is_done in tasks:
+            ids.append(task_id)
+            done.append(is_done)
+            titles.append(_intern(title))
+            descriptions.append(_intern(description))
+        if self._ascending and ids:
+            self._ascending = (
+                all(a < b for a, b in zip(ids, ids[1:]))
+                and (row == 0 or self.ids[row - 1] < ids[0])
+                and (row == len(self.ids) or ids[-1] < self.ids[row])
+            )
+        if row == len(self.ids):
+            self.ids.extend(ids)
+            self.done.extend(done)
+            self.titles.extend(titles)
+            self.descriptions.extend(descriptions)
+            return
+        self.ids[row:row] = ids
+        self.done[row:row] = done
+        self.titles[row:row] = titles
+        self.descriptions[row:row] = descriptions
+        self._indexed = min(self._indexed, row)
+
+    def extend(self, tasks):
+        self.insert(len(self.ids), tasks)
+
+    def append(self, task):
+        self.insert(len(self.ids), (task,))
+
+    def __delitem__(self, row):
+        if self._rows_by_id is not None:
+            self._rows_by_id.pop(self.ids[row], None)
+        del self.ids[row]
+        del self.done[row]
+        del self.titles[row]
+        del self.descriptions[row]
+        self._indexed = min(self._indexed, row)
+
+    def update(self, row, title=None, description=None, is_done=None):
+        """Меняет поля задачи на строке row (None - поле не меняется)"""
+        if title is not None:
+            self.titles[row] = _intern(title)
+        if description is not None:
+            self.descriptions[row] = _intern(description)
+        if is_done is not None:
+            self.done[row] = is_done
+
+    def row_of(self, task_id):
+        """Строка задачи с данным id или None, если её нет в списке"""
+        if self._ascending:
+            row = bisect_left(self.ids, task_id)
+            return row if row < len(self.ids) and self.ids[row] == task_id else None
+        if self._rows_by_id is None:
+            self._rows_by_id = {}
+        row = self._rows_by_id.get(task_id)
+        if row is not None and row < self._indexed:
+            return row
+        if self._indexed < len(self.ids):
+            ids = self.ids
+            self._rows_by_id.update(
+                (ids[row], row) for row in range(self._indexed, len(ids))
+            )
+            self._indexed = len(ids)
+            row = self._rows_by_id.get(task_id)
+        return row
+
+
+def _intern(text):
+    # None (описание без значения) хранится как есть
+    return sys.intern(text) if type(text) is str else text
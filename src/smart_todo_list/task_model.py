@@ -0,0 +1,368 @@
+from bisect import bisect_left
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt, pyqtSignal
+from PyQt6.QtGui import QFont
+
+from instrumentation import timed
+from task_list import Task, TaskList
+from task_query import TaskQuery
+
+
+# Колонки таблицы задач
+TITLE_COLUMN = 0
+DESCRIPTION_COLUMN = 1
+STATUS_COLUMN = 2
+
+HEADERS = ("Название", "Описание", "Статус")
+
+# Сколько задач подгружается за раз при прокрутке списка
+PAGE_SIZE = 200
+
+# Поле TaskQuery для сортировки по колонке; описание не сортируется - по нему
+# нет индекса
+SORT_FIELDS = {TITLE_COLUMN: "title", STATUS_COLUMN: "is_done"}
+
+
+class TaskTableModel(QAbstractTableModel):
+    """Модель списка задач пользователя.
+
+    Задачи хранятся по колонкам в TaskList: строка таблицы - индекс в
+    колонках, без объекта на задачу, а строка задачи по id - row_of. Фильтр
+    «скрыть выполненные» (set_hide_completed) и сортировка по колонке (sort)
+    выполняются в SQL через TaskQuery, поэтому из базы читаются только те
+    задачи, которые будут показаны. По умолчанию задачи идут в порядке
+    возрастания id, а в режиме поиска (load_search) - по релевантности.
+    С ranked=True порядок по умолчанию - умный (ranking.py): сначала
+    невыполненные задачи по оценке срочности, приоритета и возраста,
+    затем выполненные по id.
+    Задачи подгружаются страницами по мере прокрутки (canFetchMore /
+    fetchMore), поэтому открытие списка не зависит от его длины. Просмотренные
+    страницы из памяти не выгружаются: после прокрутки до конца в модели
+    лежит весь список пользователя. Правки пишутся в базу через write_queue
+    (TaskWriteQueue), если она передана, иначе сразу. Представлению
+    сообщается только об изменившейся строке (dataChanged / rowsInserted).
+    О каждой правке и новой задаче сообщает сигнал task_written - сразу,
+    даже если правка ещё в очереди записи (напоминания о сроках).
+    """
+
+    task_written = pyqtSignal(int, dict)  # id задачи, {поле: новое значение}
+
+    def __init__(self, db, parent=None, write_queue=None, ranked=False):
+        super().__init__(parent)
+        self.db = db
+        self.write_queue = write_queue
+        self.ranked = ranked
+        self.user_id = None
+        self.query = None  # строка поиска, None - обычный список задач
+        self.hide_completed = False
+        self.sort_field = None  # поле из SORT_FIELDS, None - порядок по умолчанию
+        self.descending = False
+        self.tasks = TaskList()
+        self._all_loaded = True
+        # id последней задачи, прочитанной постранично (keyset-курсор fetchMore)
+        self._after_id = None
+        # id задач, добавленных до загрузки всех страниц; они стоят в конце
+        # списка, а страницы вставляются перед ними
+        self._added_ids = []
+        # Умный порядок невыполненных задач (Ranking) и сколько из них прочитано
+        self._ranking = None
+        self._ranked_count = 0
+
+        # Один шрифт с зачёркиванием на все выполненные задачи
+        self._done_font = QFont()
+        self._done_font.setStrikeOut(True)
+
+    def set_tasks(self, tasks):
+        """Полная замена списка уже загруженными задачами"""
+        self.beginResetModel()
+        self.user_id = None
+        self.query = None
+        self.tasks = TaskList(tasks)
+        self._all_loaded = True
+        self.endResetModel()
+
+    def load_user(self, user_id):
+        """Сбрасывает модель на задачи пользователя и загружает первую страницу"""
+        self._reset(user_id, None)
+
+    def load_search(self, user_id, query):
+        """Сбрасывает модель на результаты поиска и загружает первую страницу"""
+        self._reset(user_id, query)
+
+    def set_hide_completed(self, hide):
+        hide = bool(hide)
+        if hide != self.hide_completed:
+            self.hide_completed = hide
+            self._reload()
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        if column != -1 and column not in SORT_FIELDS:
+            return
+        self.sort_field = SORT_FIELDS.get(column)
+        self.descending = order == Qt.SortOrder.DescendingOrder
+        self._reload()
+
+    def _reload(self):
+        if self.user_id is not None:
+            self._reset(self.user_id, self.query)
+
+    def _reset(self, user_id, query):
+        self.beginResetModel()
+        self.user_id = user_id
+        self.query = query
+        self.tasks = TaskList()
+        self._all_loaded = False
+        self._after_id = None
+        self._added_ids = []
+        self._ranking = None
+        self._ranked_count = 0
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return not self._all_loaded
+
+    @timed("ui.fetch_more")
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._all_loaded:
+            return
+        # Фильтр и сортировка выполняются в SQL - отложенные правки должны
+        # попасть в базу раньше, чем читается следующая страница
+        if self.write_queue is not None:
+            self.write_queue.flush()
+        page = self._fetch_page()
+        if len(page) < PAGE_SIZE:
+            self._all_loaded = True
+        # Задачи, добавленные через add_task, уже есть в модели
+        added = set(self._added_ids)
+        page = [task for task in page if task[0] not in added]
+        if self._all_loaded:
+            self._added_ids = []
+        if not page:
+            return
+        first = len(self.tasks) - len(added)
+        self.beginInsertRows(QModelIndex(), first, first + len(page) - 1)
+        self.tasks.insert(first, page)
+        self.endInsertRows()
+
+    def _in_rank_order(self):
+        return self.ranked and self.query is None and self.sort_field is None
+
+    def _fetch_page(self):
+        if self._in_rank_order():
+            return self._fetch_ranked_page()
+        is_done = 0 if self.hide_completed else None
+        if self.query is not None and self.sort_field is None:
+            # Результаты поиска упорядочены по релевантности - листаем по смещению
+            return self.db.search_tasks(
+                self.user_id, self.query, PAGE_SIZE, len(self.tasks), is_done
+            )
+        query = TaskQuery(self.user_id).order_by(
+            self.sort_field or "id", self.descending
+        )
+        if is_done is not None:
+            query = query.done(is_done)
+        if self.query is not None:
+            query = query.matching(self.query)
+        page = self.db.query_tasks(query.after(self._after_id).limit(PAGE_SIZE))
+        if page:
+            self._after_id = page[-1][0]
+        return page
+
+    def _fetch_ranked_page(self):
+        # Оценки считаются один раз на загрузку списка: первая страница -
+        # без полной сортировки (Ranking.top), следующие - по готовому порядку
+        if self._ranking is None:
+            # ranking импортирует NumPy (около 0,1 с) - не при запуске приложения
+            from ranking import rank_tasks
+
+            self._ranking = rank_tasks(self.db, self.user_id)
+        page = []
+        while len(page) < PAGE_SIZE and self._ranked_count < len(self._ranking):
+            count = PAGE_SIZE - len(page)
+            if self._ranked_count == 0:
+                ids = self._ranking.top(count)
+            else:
+                ids = self._ranking.page(self._ranked_count, count)
+            self._ranked_count += len(ids)
+            # Задачи, выполненные после ранжирования, придут в конце списка
+            page += [task for task in self.db.get_tasks_by_ids(ids.tolist()) if not task[3]]
+        if len(page) < PAGE_SIZE and not self.hide_completed:
+            query = TaskQuery(self.user_id).done(True).after(self._after_id)
+            done = self.db.query_tasks(query.limit(PAGE_SIZE - len(page)))
+            if done:
+                self._after_id = done[-1][0]
+            page += done
+        return page
+
+    def task_id(self, row):
+        return self.tasks.ids[row]
+
+    def row_of(self, task_id):
+        """Строка задачи в таблице или None, если задача не загружена"""
+        return self.tasks.row_of(task_id)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.tasks)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if (
+            orientation == Qt.Orientation.Horizontal
+            and role == Qt.ItemDataRole.DisplayRole
+        ):
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row, column = index.row(), index.column()
+
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            if column == TITLE_COLUMN:
+                return self.tasks.titles[row]
+            if column == DESCRIPTION_COLUMN:
+                return self.tasks.descriptions[row]
+        elif role == Qt.ItemDataRole.CheckStateRole and column == STATUS_COLUMN:
+            return Qt.CheckState.Checked if self.tasks.done[row] else Qt.CheckState.Unchecked
+        elif (
+            role == Qt.ItemDataRole.FontRole
+            and column != STATUS_COLUMN
+            and self.tasks.done[row]
+        ):
+            return self._done_font
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        flags = Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable
+        if index.column() in (TITLE_COLUMN, DESCRIPTION_COLUMN):
+            flags |= Qt.ItemFlag.ItemIsEditable
+        # Статус переключается кликом по ячейке (toggle_status), а не делегатом
+        return flags
+
+    @timed("ui.edit_cell")
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        row, column = index.row(), index.column()
+        task_id = self.tasks.ids[row]
+
+        if column == TITLE_COLUMN:
+            if value == self.tasks.titles[row]:
+                return False
+            self._write(task_id, "title", value)
+            self.tasks.update(row, title=value)
+        elif column == DESCRIPTION_COLUMN:
+            if value == self.tasks.descriptions[row]:
+                return False
+            self._write(task_id, "description", value)
+            self.tasks.update(row, description=value)
+        else:
+            return False
+
+        self.dataChanged.emit(index, index, [role, Qt.ItemDataRole.DisplayRole])
+        return True
+
+    def toggle_status(self, row):
+        task_id = self.tasks.ids[row]
+        is_done = int(not self.tasks.done[row])
+        self._write(task_id, "is_done", is_done)
+        if is_done and self.hide_completed:
+            # Выполненная задача сразу пропадает из отфильтрованного списка
+            self._remove_row(row)
+            return
+        self.tasks.update(row, is_done=is_done)
+        # Меняется и галочка, и зачёркивание - обновляем всю строку
+        self.dataChanged.emit(
+            self.index(row, TITLE_COLUMN),
+            self.index(row, STATUS_COLUMN),
+            [Qt.ItemDataRole.CheckStateRole, Qt.ItemDataRole.FontRole],
+        )
+
+    def _remove_row(self, row):
+        task_id = self.tasks.ids[row]
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.tasks[row]
+        if task_id in self._added_ids:
+            self._added_ids.remove(task_id)
+        self.endRemoveRows()
+
+    def apply_changes(self, changes):
+        """Переносит в таблицу изменения задач из Database.changes_since.
+
+        Меняются только строки изменённых задач, поэтому стоимость зависит от
+        числа изменений, а не от длины списка. Новая задача в порядке по id
+        встаёт на своё место, если эта часть списка уже загружена (иначе она
+        придёт со следующей страницей). В поиске и при сортировке по колонке
+        строки обновляются на месте, а если появилась новая подходящая
+        задача, результат перечитывается: её место определяет SQL.
+        """
+        if self.user_id is None:
+            return
+        # Несохранённая правка новее, чем строка из базы
+        if self.write_queue is not None:
+            self.write_queue.flush()
+        by_id = (
+            self.query is None
+            and self.sort_field is None
+            and not self.descending
+            and not self.ranked
+        )
+        for task_id, task in changes:
+            row = self.tasks.row_of(task_id)
+            visible = task is not None and not (self.hide_completed and task[3])
+            if row is not None:
+                if visible:
+                    self._replace_row(row, task)
+                else:
+                    self._remove_row(row)
+            elif visible:
+                if not by_id:
+                    self._reload()
+                    return
+                if self._all_loaded or (self._after_id is not None and task_id < self._after_id):
+                    row = bisect_left(self.tasks.ids, task_id)
+                    self.beginInsertRows(QModelIndex(), row, row)
+                    self.tasks.insert(row, (task,))
+                    self.endInsertRows()
+
+    def _replace_row(self, row, task):
+        _, title, description, is_done = task
+        self.tasks.update(row, title, description, is_done)
+        self.dataChanged.emit(self.index(row, TITLE_COLUMN), self.index(row, STATUS_COLUMN))
+
+    def _write(self, task_id, field, value):
+        if self.write_queue is not None:
+            self.write_queue.put(task_id, field, value)
+        else:
+            self.db.update_tasks({task_id: {field: value}})
+        self.task_written.emit(task_id, {field: value})
+
+    def add_task(self, user_id, title, description, due_date=None, priority=0):
+        task_id = self.db.add_task(user_id, title, description, due_date, priority)
+        self.task_written.emit(task_id, {"title": title, "due_date": due_date, "is_done": 0})
+        if self.query is not None or self.sort_field is not None or self.ranked:
+            # Подходит ли задача под поиск и на какое место встанет - решает
+            # SQL или оценка задачи
+            self._reload()
+            return task_id
+        if not self._all_loaded:
+            # Задача видна сразу; последняя страница её не продублирует
+            self._added_ids.append(task_id)
+        row = len(self.tasks)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.tasks.append(Task(task_id, title, description))
+        self.endInsertRows()
+        return task_id
+
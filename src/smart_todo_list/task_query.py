@@ -0,0 +1,148 @@
+from datetime import datetime
+
+from database import build_match_query
+
+# Поля, по которым можно сортировать задачи. Для каждого есть индекс
+# (user_id, поле, id), поэтому сортировка не требует временного B-дерева
+SORT_FIELDS = ("id", "created_at", "title", "is_done", "priority")
+
+
+class TaskQuery:
+    """Запрос списка задач пользователя, собираемый по частям.
+
+    Каждый метод возвращает новый запрос и не меняет исходный, поэтому общую
+    часть можно собрать один раз и дополнять по месту:
+
+        base = TaskQuery(user_id).done(False).order_by("title")
+        first_page = db.query_tasks(base.limit(50))
+        next_page = db.query_tasks(base.after(first_page[-1][0]).limit(50))
+
+    compile() превращает запрос в один SQL-запрос с параметрами: фильтры,
+    сортировка и страница выполняются в SQLite по индексам, а не в Python.
+    """
+
+    def __init__(self, user_id):
+        self._user_id = user_id
+        self._is_done = None
+        self._created_from = None
+        self._created_to = None
+        self._text = None
+        self._sort = "id"
+        self._descending = False
+        self._after_id = None
+        self._limit = None
+        self._offset = 0
+
+    @property
+    def user_id(self):
+        return self._user_id
+
+    @property
+    def after_id(self):
+        return self._after_id
+
+    def fields(self):
+        """Поля задачи, от которых зависят состав и порядок результата"""
+        fields = set()
+        if self._is_done is not None:
+            fields.add("is_done")
+        if self._created_from is not None or self._created_to is not None:
+            fields.add("created_at")
+        if self._text is not None:
+            fields.update(("title", "description"))
+        if self._sort != "id":
+            fields.add(self._sort)
+        return fields
+
+    def _with(self, **changes):
+        query = TaskQuery.__new__(TaskQuery)
+        query.__dict__.update(self.__dict__)
+        for name, value in changes.items():
+            setattr(query, "_" + name, value)
+        return query
+
+    def done(self, is_done):
+        """Только выполненные (True) или только невыполненные (False) задачи"""
+        return self._with(is_done=int(bool(is_done)))
+
+    def created_between(self, start=None, end=None):
+        """Задачи, созданные в полуинтервале [start, end).
+
+        Границы - datetime или строки вида «ГГГГ-ММ-ДД ЧЧ:ММ:СС» в UTC, как
+        их записывает CURRENT_TIMESTAMP; None - без ограничения.
+        """
+        return self._with(created_from=_timestamp(start), created_to=_timestamp(end))
+
+    def matching(self, text):
+        """Задачи, в которых встречаются все слова text (через индекс tasks_fts)"""
+        return self._with(text=text)
+
+    def order_by(self, field, descending=False):
+        if field not in SORT_FIELDS:
+            raise ValueError(f"Неизвестное поле сортировки: {field}")
+        return self._with(sort=field, descending=bool(descending))
+
+    def after(self, task_id):
+        """Задачи, идущие в выбранном порядке после задачи task_id.
+
+        Keyset-пагинация: следующая страница читается с места остановки по
+        индексу, а не пропуском offset строк. None - с начала списка.
+        """
+        return self._with(after_id=task_id)
+
+    def limit(self, limit):
+        return self._with(limit=limit)
+
+    def offset(self, offset):
+        return self._with(offset=offset)
+
+    def compile(self):
+        """Возвращает (sql, params) для выполнения запроса"""
+        where = ["t.user_id = ?"]
+        params = [self._user_id]
+        if self._is_done is not None:
+            where.append("t.is_done = ?")
+            params.append(self._is_done)
+        if self._created_from is not None:
+            where.append("t.created_at >= ?")
+            params.append(self._created_from)
+        if self._created_to is not None:
+            where.append("t.created_at < ?")
+            params.append(self._created_to)
+        if self._text is not None:
+            match = build_match_query(self._user_id, self._text)
+            if match is not None:
+                where.append("t.id IN (SELECT rowid FROM tasks_fts WHERE tasks_fts MATCH ?)")
+                params.append(match)
+
+        direction = " DESC" if self._descending else ""
+        if self._after_id is not None:
+            compare = "<" if self._descending else ">"
+            if self._sort == "id":
+                where.append(f"t.id {compare} ?")
+            else:
+                # Сравнение пар (поле, id) идёт по тому же индексу, что и сортировка
+                where.append(
+                    f"(t.{self._sort}, t.id) {compare}"
+                    f" (SELECT {self._sort}, id FROM tasks WHERE id = ?)"
+                )
+            params.append(self._after_id)
+
+        order = [f"t.{self._sort}{direction}"]
+        if self._sort != "id":
+            order.append(f"t.id{direction}")
+
+        sql = (
+            "SELECT t.id, t.title, t.description, t.is_done FROM tasks AS t"
+            f" WHERE {' AND '.join(where)} ORDER BY {', '.join(order)}"
+        )
+        if self._limit is not None or self._offset:
+            sql += " LIMIT ? OFFSET ?"
+            params.extend((-1 if self._limit is None else self._limit, self._offset))
+        return sql, params
+
+
+def _timestamp(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
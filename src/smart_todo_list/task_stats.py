@@ -0,0 +1,44 @@
+"""Сверка счётчиков задач пользователей (user_stats) с подсчётом по tasks.
+
+Запуск из папки src/smart_todo_list:
+
+    python task_stats.py            # только сверка
+    python task_stats.py --repair   # сверка и исправление расхождений
+
+Счётчики ведут триггеры в самой базе, поэтому разойтись с задачами они
+могут только после ручной правки схемы или данных. Шардированная база
+сверяется по всем файлам.
+"""
+
+import argparse
+import sys
+
+from sharding import open_database
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сверка счётчиков задач пользователей")
+    parser.add_argument("--db", help="путь к базе (по умолчанию data/smart_todo_db.sqlite)")
+    parser.add_argument(
+        "--repair", action="store_true", help="заменить неверные счётчики подсчётом"
+    )
+    args = parser.parse_args(argv)
+
+    with open_database(args.db) as db:
+        mismatches = db.check_stats(repair=args.repair)
+    for user_id, stored, actual in mismatches:
+        print(
+            f"Пользователь {user_id}: в счётчиках {stored}, по задачам {actual}"
+            " (всего, невыполненных, выполненных)"
+        )
+    if not mismatches:
+        print("Счётчики задач сходятся с подсчётом")
+        return 0
+    if args.repair:
+        print(f"Исправлено счётчиков: {len(mismatches)}")
+        return 0
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Загрузка окон из .ui-файлов через заранее скомпилированные модули Python.
+
+uic.loadUi разбирает XML при каждом запуске. load_ui вместо этого один раз
+компилирует ui/<name>.ui в модуль Python (uic.compileUi) и кладёт его в
+ui/__uicache__. Модуль перекомпилируется, только если .ui-файл новее него
+(по mtime). Байт-код модуля Python сам кэширует в __pycache__, поэтому при
+следующих запусках окно строится без разбора XML и без импорта PyQt6.uic.
+
+Скомпилировать все окна заранее (например, при сборке):
+
+    python ui_loader.py
+"""
+
+import importlib.util
+import os
+
+UI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "ui")
+
+CACHE_DIR = os.path.join(UI_DIR, "__uicache__")
+
+# False - разбирать .ui при каждой загрузке (uic.loadUi), как раньше
+PRECOMPILED = True
+
+# Загруженные модули окон: {путь к модулю: (mtime, модуль)}
+_modules = {}
+
+
+def load_ui(name, widget, cache_dir=None):
+    """Строит содержимое окна ui/<name>.ui в widget (как uic.loadUi)"""
+    ui_path = os.path.join(UI_DIR, name + ".ui")
+    if PRECOMPILED:
+        try:
+            module = _compiled_module(ui_path, cache_dir or CACHE_DIR)
+        except OSError:
+            module = None  # папка кэша недоступна для записи
+        if module is not None:
+            ui_class = next(
+                value for attr, value in vars(module).items() if attr.startswith("Ui_")
+            )
+            ui = ui_class()
+            ui.setupUi(widget)
+            # Как и loadUi: дочерние виджеты доступны как атрибуты окна
+            for attr, value in vars(ui).items():
+                setattr(widget, attr, value)
+            return widget
+
+    from PyQt6 import uic
+
+    return uic.loadUi(ui_path, widget)
+
+
+def compile_ui(ui_path, cache_dir=CACHE_DIR):
+    """Компилирует .ui в модуль Python, если модуля нет или он старше .ui.
+
+    Возвращает путь к модулю.
+    """
+    name = os.path.splitext(os.path.basename(ui_path))[0]
+    py_path = os.path.join(cache_dir, f"ui_{name}.py")
+    if os.path.exists(py_path) and os.stat(py_path).st_mtime_ns >= os.stat(ui_path).st_mtime_ns:
+        return py_path
+
+    from PyQt6 import uic
+
+    os.makedirs(cache_dir, exist_ok=True)
+    # Запись во временный файл: другой запущенный экземпляр не увидит половину модуля
+    tmp_path = f"{py_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        uic.compileUi(ui_path, f)
+    os.replace(tmp_path, py_path)
+    return py_path
+
+
+def _compiled_module(ui_path, cache_dir):
+    py_path = compile_ui(ui_path, cache_dir)
+    mtime = os.stat(py_path).st_mtime_ns
+    cached = _modules.get(py_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    spec = importlib.util.spec_from_file_location(
+        "_" + os.path.splitext(os.path.basename(py_path))[0], py_path
+    )
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    _modules[py_path] = (mtime, module)
+    return module
+
+
+def compile_all(cache_dir=CACHE_DIR):
+    """Компилирует все окна из папки ui, возвращает пути к модулям"""
+    return [
+        compile_ui(os.path.join(UI_DIR, file_name), cache_dir)
+        for file_name in sorted(os.listdir(UI_DIR))
+        if file_name.endswith(".ui")
+    ]
+
+
+if __name__ == "__main__":
+    for path in compile_all():
+        print(path)
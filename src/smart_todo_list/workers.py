@@ -0,0 +1,44 @@
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class WorkerSignals(QObject):
+    """Сигналы фоновой задачи (QRunnable сам не может объявлять сигналы)"""
+
+    finished = pyqtSignal(object)  # результат функции
+    failed = pyqtSignal(object)  # исключение
+
+
+class Worker(QRunnable):
+    """Выполняет func(*args) в пуле потоков и сообщает результат сигналами.
+
+    Объект signals создаётся в потоке интерфейса, поэтому слоты окон вызываются
+    в нём же (через очередь событий), а не в рабочем потоке.
+    """
+
+    def __init__(self, func, *args):
+        super().__init__()
+        self.func = func
+        self.args = args
+        self.signals = WorkerSignals()
+
+    def run(self):
+        try:
+            result = self.func(*self.args)
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(result)
+
+
+# Отдельный пул для bcrypt: проверка пароля не должна занимать все потоки
+auth_thread_pool = QThreadPool()
+auth_thread_pool.setMaxThreadCount(2)
+# Потоки пула не завершаются по простою: у каждого своё соединение с базой
+# в пуле Database, и завершённый поток оставлял бы его открытым до close()
+auth_thread_pool.setExpiryTimeout(-1)
+
+# Долгие операции с базой, которые не должны останавливать интерфейс (поиск
+# дубликатов): один поток, тоже без завершения по простою
+db_thread_pool = QThreadPool()
+db_thread_pool.setMaxThreadCount(1)
+db_thread_pool.setExpiryTimeout(-1)
@@ -0,0 +1,58 @@
+import sqlite3
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+# Через сколько миллисекунд после первой правки изменения пишутся в базу
+FLUSH_INTERVAL_MS = 500
+
+
+class TaskWriteQueue(QObject):
+    """Отложенная запись правок задач (write-behind).
+
+    Правки копятся в памяти и объединяются по задаче: если название задачи
+    поменяли пять раз подряд, в базу попадёт только последнее значение.
+    Через FLUSH_INTERVAL_MS после первой правки все накопленные изменения
+    записываются одной транзакцией (Database.update_tasks). Перед закрытием
+    приложения нужно вызвать flush() и проверить результат: при ошибке
+    записи правки остаются в очереди.
+    """
+
+    flush_failed = pyqtSignal(str)  # текст ошибки записи, правки остаются в очереди
+    flushed = pyqtSignal()  # правки записаны в базу
+
+    def __init__(self, db, interval_ms=FLUSH_INTERVAL_MS, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.pending = {}  # {task_id: {поле: значение}}
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+
+    def put(self, task_id, field, value):
+        self.pending.setdefault(task_id, {})[field] = value
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self):
+        """Записывает все накопленные правки одной транзакцией"""
+        self._timer.stop()
+        if not self.pending:
+            return True
+        pending, self.pending = self.pending, {}
+        try:
+            self.db.update_tasks(pending)
+        except sqlite3.Error as e:
+            # Возвращаем правки в очередь, не затирая более новые
+            for task_id, fields in pending.items():
+                self.pending[task_id] = {**fields, **self.pending.get(task_id, {})}
+            self.flush_failed.emit(str(e))
+            return False
+        self.flushed.emit()
+        return True
+
+    def discard(self):
+        """Отбрасывает несохранённые правки (пользователь отказался от них)"""
+        self._timer.stop()
+        self.pending = {}
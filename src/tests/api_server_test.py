@@ -0,0 +1,136 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from api_client import ApiClient  # noqa: E402
+from api_server import TaskApiServer  # noqa: E402
+from database import Database  # noqa: E402
+
+
+async def with_server(tmp, check):
+    db = Database(os.path.join(tmp, "t.sqlite"))
+    db.register_user("user", "user@example.com", "Passw0rd!")
+    db.register_user("other", "other@example.com", "Passw0rd!")
+    server = TaskApiServer(db, db_workers=4, auth_workers=1)
+    host, port = await server.start("127.0.0.1", 0)
+    try:
+        await check(db, lambda: ApiClient(host, port))
+    finally:
+        await server.close()
+
+
+async def check_api(db, make_client):
+    client = make_client()
+    assert (await client.request("GET", "/tasks"))[0] == 401
+    try:
+        await client.login("user", "wrong")
+    except PermissionError:
+        pass
+    else:
+        raise AssertionError("вход с неверным паролем должен быть отклонён")
+    user_id = await client.login("user", "Passw0rd!")
+    assert user_id == db.get_user_id("user")
+    # Токен - сессия в базе, он переживает перезапуск сервиса
+    assert db.check_session(client.token) == user_id
+
+    ids = []
+    for i in range(5):
+        status, payload = await client.request("POST", "/tasks", {"title": f"Задача {i}"})
+        assert status == 200
+        ids.append(payload["id"])
+    assert (await client.request("POST", "/tasks", {"title": " "}))[0] == 400
+
+    # Страницы по два: keyset-курсор next_after
+    seen, after = [], None
+    while True:
+        path = "/tasks?limit=2" + (f"&after={after}" if after else "")
+        status, page = await client.request("GET", path)
+        assert status == 200
+        seen += [task["id"] for task in page["tasks"]]
+        after = page["next_after"]
+        if after is None:
+            break
+    assert seen == ids
+
+    assert (await client.request("PATCH", f"/tasks/{ids[0]}", {"title": "Новое"}))[0] == 200
+    status, payload = await client.request("POST", f"/tasks/{ids[0]}/toggle")
+    assert (status, payload["is_done"]) == (200, 1)
+    assert db.get_tasks(user_id)[0][1:] == ("Новое", "", 1)
+    _, page = await client.request("GET", "/tasks?done=1")
+    assert [task["id"] for task in page["tasks"]] == [ids[0]]
+    assert (await client.request("PATCH", f"/tasks/{ids[0]}", {"owner": 2}))[0] == 400
+    # Срок и приоритет проверяются, а сортировка по приоритету ставит задачу первой
+    patch = {"due_date": "2026-03-01", "priority": 3}
+    assert (await client.request("PATCH", f"/tasks/{ids[2]}", patch))[0] == 200
+    assert (await client.request("PATCH", f"/tasks/{ids[2]}", {"priority": 9}))[0] == 400
+    assert (await client.request("PATCH", f"/tasks/{ids[2]}", {"due_date": "завтра"}))[0] == 400
+    status, payload = await client.request("POST", "/tasks", {"title": "Срочно", "priority": 2})
+    assert status == 200
+    _, page = await client.request("GET", "/tasks?sort=priority&desc=1&limit=2")
+    assert [task["id"] for task in page["tasks"]] == [ids[2], payload["id"]]
+    assert (await client.request("DELETE", f"/tasks/{ids[0]}"))[0] == 405
+    assert (await client.request("GET", "/nothing"))[0] == 404
+
+    # Чужие задачи недоступны
+    other = make_client()
+    await other.login("other", "Passw0rd!")
+    assert (await other.request("POST", f"/tasks/{ids[1]}/toggle"))[0] == 404
+    assert (await other.request("GET", "/tasks"))[1]["tasks"] == []
+    await other.close()
+    await client.close()
+
+
+async def check_concurrency(db, make_client):
+    client = make_client()
+    await client.login("user", "Passw0rd!")
+    await client.request("POST", "/tasks", {"title": "Задача"})
+
+    # Пока идут медленные входы (bcrypt в своём пуле из одного потока),
+    # список задач отвечает быстро
+    logins = [make_client() for _ in range(4)]
+    login_tasks = [asyncio.ensure_future(c.login("user", "Passw0rd!")) for c in logins]
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    status, _ = await client.request("GET", "/tasks")
+    assert status == 200
+    assert time.perf_counter() - start < 0.2
+    assert not all(task.done() for task in login_tasks)
+    await asyncio.gather(*login_tasks)
+
+    # Одновременные переключения одной задачи от многих клиентов не теряются
+    clients = [make_client() for _ in range(20)]
+    for c in clients:
+        c.token = client.token
+    task_id = (await client.request("GET", "/tasks"))[1]["tasks"][0]["id"]
+    results = await asyncio.gather(
+        *(c.request("POST", f"/tasks/{task_id}/toggle") for c in clients for _ in range(5))
+    )
+    assert all(status == 200 for status, _ in results)
+    assert db.get_tasks(db.get_user_id("user"))[0][3] == 0  # 100 переключений
+    for c in clients + logins + [client]:
+        await c.close()
+
+
+def test_api_login_list_add_update_toggle():
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(with_server(tmp, check_api))
+
+
+def test_api_serves_clients_concurrently():
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(with_server(tmp, check_concurrency))
+
+
+if __name__ == "__main__":
+    test_api_login_list_add_update_toggle()
+    test_api_serves_clients_concurrently()
+    print("HTTP-сервис задач работает корректно")
@@ -0,0 +1,111 @@
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from archive import TaskArchiver, archive_all  # noqa: E402
+from database import Database  # noqa: E402
+
+TASKS = 2000
+OLD = 1200  # столько задач выполнено 40 дней назад
+
+
+def make_db(tmp):
+    db = Database(os.path.join(tmp, "t.sqlite"))
+    conn = db._get_connection()
+    with conn:
+        conn.execute(
+            "INSERT INTO users (login, email, password_hash) VALUES ('u', 'u@example.com', '-')"
+        )
+    db.add_tasks(1, ((f"Задача {i}", "описание " * 20) for i in range(TASKS)))
+    with conn:
+        conn.execute("UPDATE tasks SET is_done = 1 WHERE id <= ?", (OLD + 100,))
+        conn.execute(
+            "UPDATE tasks SET done_at = datetime('now', '-40 days') WHERE id <= ?", (OLD,)
+        )
+    return db
+
+
+def count(conn, table):
+    return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_done_at_follows_status():
+    with tempfile.TemporaryDirectory() as tmp, Database(os.path.join(tmp, "t.sqlite")) as db:
+        conn = db._get_connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO users (login, email, password_hash) VALUES ('u', 'u@example.com', '-')"
+            )
+        task_id = db.add_task(1, "Задача", "")
+        done_at = "SELECT done_at FROM tasks WHERE id = ?"
+        assert conn.execute(done_at, (task_id,)).fetchone()[0] is None
+        db.toggle_task_status(task_id)
+        assert conn.execute(done_at, (task_id,)).fetchone()[0] is not None
+        db.update_tasks({task_id: {"is_done": 0}})
+        assert conn.execute(done_at, (task_id,)).fetchone()[0] is None
+
+
+def test_archive_moves_old_done_tasks_and_shrinks_main_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_db(tmp)
+        conn = db._get_connection()
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2  # INCREMENTAL
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id FROM tasks"
+            " WHERE is_done = 1 AND COALESCE(done_at, created_at) < datetime('now', '-30 days')"
+            " ORDER BY COALESCE(done_at, created_at) LIMIT 10"
+        ).fetchall()
+        assert "idx_tasks_done_at" in plan[0][-1]
+        before = list(db.export_tasks(1))
+        pages = conn.execute("PRAGMA page_count").fetchone()[0]
+
+        # Сбой после копирования пачки в архив: задача не теряется и не дублируется
+        db._copy_to_archive(db._archive_connection(), [1, 2, 3])
+        assert archive_all(db, days=30, batch_size=100) == OLD
+
+        assert count(conn, "main.tasks") == TASKS - OLD
+        assert count(conn, "archive.archived_tasks") == OLD
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
+        assert conn.execute("PRAGMA page_count").fetchone()[0] < pages * 0.6
+        # Без архива - только оперативные задачи, с архивом - все, как раньше
+        assert len(list(db.export_tasks(1))) == TASKS - OLD
+        assert list(db.export_tasks(1, include_archived=True)) == before
+        # Перенесённые задачи пропали и из полнотекстового поиска
+        found = db.search_tasks(1, "Задача", limit=TASKS)
+        assert len(found) == TASKS - OLD and min(row[0] for row in found) > OLD
+        assert archive_all(db, days=30) == 0
+        db.close()
+
+        # Архив - отдельный файл и подключается к новым соединениям
+        assert os.path.exists(db.archive_path)
+        with Database(db.db_path) as reopened:
+            assert len(list(reopened.export_tasks(1, include_archived=True))) == TASKS
+
+
+def test_archiver_thread_runs_in_background_and_stops():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_db(tmp)
+        archiver = TaskArchiver(db, start_delay=0, interval=3600, pause=0)
+        archiver.start()
+        deadline = time.monotonic() + 10
+        while archiver.moved < OLD and time.monotonic() < deadline:
+            time.sleep(0.01)
+        archiver.stop()
+        assert archiver.moved == OLD and archiver.error is None
+        assert count(db._get_connection(), "tasks") == TASKS - OLD
+        db.close()
+
+
+if __name__ == "__main__":
+    test_done_at_follows_status()
+    test_archive_moves_old_done_tasks_and_shrinks_main_file()
+    test_archiver_thread_runs_in_background_and_stops()
+    print("Архив выполненных задач работает корректно")
@@ -0,0 +1,103 @@
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+)
+sys.path.insert(0, APP_DIR)
+
+from PyQt6.QtCore import QEventLoop, QTimer  # noqa: E402
+from PyQt6.QtWidgets import QApplication, QMessageBox, QStackedWidget  # noqa: E402
+
+from database import Database  # noqa: E402
+from workers import Worker, auth_thread_pool  # noqa: E402
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+def wait_for(signal, timeout_ms=10000):
+    loop = QEventLoop()
+    signal.connect(loop.quit)
+    QTimer.singleShot(timeout_ms, loop.quit)
+    loop.exec()
+
+
+def test_event_loop_stays_responsive_during_bcrypt():
+    with tempfile.TemporaryDirectory() as tmp, Database(
+        os.path.join(tmp, "t.sqlite")
+    ) as db:
+        ticks = []
+        timer = QTimer()
+        timer.setInterval(10)
+        timer.timeout.connect(lambda: ticks.append(time.perf_counter()))
+        timer.start()
+
+        results = []
+        worker = Worker(db.register_user, "user", "user@example.com", "Passw0rd!")
+        worker.signals.finished.connect(results.append)
+        start = time.perf_counter()
+        auth_thread_pool.start(worker)
+        wait_for(worker.signals.finished)
+        elapsed = time.perf_counter() - start
+        timer.stop()
+
+        assert results == [None]
+        assert db.verify_user("user", "Passw0rd!")
+        # Потоки пула живут до выхода, так что соединений не больше, чем потоков
+        assert auth_thread_pool.expiryTimeout() == -1
+        assert len(db._connections) <= 1 + auth_thread_pool.maxThreadCount()
+        # Пока считался хеш, таймер продолжал срабатывать без больших пауз
+        assert len(ticks) >= elapsed / 0.010 / 2, (len(ticks), elapsed)
+        gaps = [b - a for a, b in zip(ticks, ticks[1:])]
+        assert max(gaps) < 0.1, max(gaps)
+
+
+def test_login_window_ignores_repeated_presses():
+    import main
+
+    warning, information = QMessageBox.warning, QMessageBox.information
+    QMessageBox.warning = QMessageBox.information = staticmethod(lambda *args: None)
+    cwd = os.getcwd()
+    os.chdir(APP_DIR)  # окна загружают .ui по относительным путям
+    try:
+        with tempfile.TemporaryDirectory() as tmp, Database(
+            os.path.join(tmp, "t.sqlite")
+        ) as db:
+            db.register_user("user", "user@example.com", "Passw0rd!")
+            window = main.LoginWindow(QStackedWidget(), db)
+            logged_in = []
+            window.login_success.connect(logged_in.append)
+
+            window.loginInput.setText("user")
+            window.passwordInput.setText("Passw0rd!")
+            window.loginButton.click()
+            assert not window.loginButton.isEnabled()
+            first_worker = window.worker
+            window.login()
+            assert window.worker is first_worker
+
+            wait_for(window.login_success)
+            assert logged_in == [db.get_user_id("user")]
+            assert window.loginButton.isEnabled()
+
+            failures = []
+            window.login_failed.connect(failures.append)
+            window.loginInput.setText("user")
+            window.passwordInput.setText("wrong")
+            window.login()
+            wait_for(window.login_failed)
+            assert failures == ["Неверный логин или пароль."]
+            assert logged_in == [db.get_user_id("user")]
+    finally:
+        os.chdir(cwd)
+        QMessageBox.warning, QMessageBox.information = warning, information
+
+
+if __name__ == "__main__":
+    test_event_loop_stays_responsive_during_bcrypt()
+    test_login_window_ignores_repeated_presses()
+    print("Проверка пароля не блокирует интерфейс")
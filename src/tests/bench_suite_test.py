@@ -0,0 +1,69 @@
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(
+    0,
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"),
+)
+
+import bench_suite  # noqa: E402
+import datagen  # noqa: E402
+from database import Database  # noqa: E402
+
+
+def dump(db):
+    return db._get_connection().execute(
+        "SELECT id, user_id, title, description, is_done, created_at FROM tasks ORDER BY id"
+    ).fetchall()
+
+
+def test_generator_is_deterministic_and_suite_restores_db():
+    assert list(datagen.generate_tasks(3, 5, seed=1)) == list(datagen.generate_tasks(3, 5, seed=1))
+    assert list(datagen.generate_tasks(3, 5, seed=1)) != list(datagen.generate_tasks(3, 5, seed=2))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "gen.sqlite")
+        datagen.generate_db(path, 3, 5, seed=1)
+        with Database(path) as db:
+            rows = dump(db)
+            assert len(rows) == 15
+            assert {row[1] for row in rows[:3]} == {1, 2, 3}  # пользователи перемешаны
+            assert db.verify_user(datagen.login(3), datagen.PASSWORD)
+            assert len(db.search_tasks(2, rows[1][2].split()[0])) > 0
+
+            # Замеры пишут в базу, но после них всё возвращается как было
+            bench_suite.ITERATIONS, bench_suite.VERIFY_ITERATIONS = 20, 1
+            timings = bench_suite.run_db_operations(db, 3, random.Random(1))
+            assert dump(db) == rows
+        assert set(timings) == {
+            "verify_user",
+            "check_session",
+            "get_tasks",
+            "add_task",
+            "update_task_status",
+            "update_task_title",
+            "update_task_description",
+        }
+        summary = bench_suite.summarize(timings["get_tasks"])
+        assert summary["count"] == 20
+        assert summary["p50_ms"] <= summary["p95_ms"] <= summary["p99_ms"] <= summary["max_ms"]
+
+
+def test_regressions_against_baseline():
+    def report(**p95):
+        return {"results": {name: {"p95_ms": value} for name, value in p95.items()}}
+
+    baseline = report(get_tasks=10.0, add_task=0.1, verify_user=300.0)
+    assert bench_suite.find_regressions(baseline, baseline) == []
+    # Медленнее на 50% - регрессия; на 10% или на доли миллисекунды - шум
+    current = report(get_tasks=15.0, add_task=0.3, verify_user=330.0, new_operation=1.0)
+    assert bench_suite.find_regressions(current, baseline) == [("get_tasks", 15.0, 10.0)]
+    assert bench_suite.find_regressions(current, baseline, tolerance=0.6) == []
+
+
+if __name__ == "__main__":
+    test_generator_is_deterministic_and_suite_restores_db()
+    test_regressions_against_baseline()
+    print("Генератор данных и набор замеров работают корректно")
@@ -0,0 +1,139 @@
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+from change_watcher import ChangeWatcher  # noqa: E402
+from database import Database  # noqa: E402
+from task_cache import TaskCache  # noqa: E402
+from task_model import TaskTableModel  # noqa: E402
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+def make_db(path, users=2):
+    db = Database(path)
+    conn = db._get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (login, email, password_hash) VALUES (?, ?, '-')",
+            ((f"u{i}", f"u{i}@example.com") for i in range(users)),
+        )
+    return db
+
+
+def test_changes_since_returns_current_rows_of_changed_tasks():
+    with tempfile.TemporaryDirectory() as tmp, make_db(os.path.join(tmp, "t.sqlite")) as db:
+        assert db.change_version() == 0
+        assert db.changes_since(1, 0) == (0, [])
+        first = db.add_task(1, "Первая", "")
+        second = db.add_task(1, "Вторая", "")
+        db.add_task(2, "Чужая", "")
+        version = db.change_version()
+
+        db.update_task_title(first, "Новое название")
+        db.toggle_task_status(first)
+        with db._get_connection() as conn:
+            conn.execute("DELETE FROM tasks WHERE id = ?", (second,))
+        third = db.add_task(1, "Третья", "")
+        latest, changes = db.changes_since(1, version)
+        assert latest == db.change_version()
+        # Каждая задача один раз, в текущем состоянии; чужих задач нет
+        assert changes == [
+            (first, (first, "Новое название", "", 1)),
+            (second, None),
+            (third, (third, "Третья", "", 0)),
+        ]
+        assert db.changes_since(1, latest) == (latest, [])
+
+        # Задача, переданная другому пользователю, для прежнего удалена
+        with db._get_connection() as conn:
+            conn.execute("UPDATE tasks SET user_id = 2 WHERE id = ?", (third,))
+        assert db.changes_since(1, latest)[1] == [(third, None)]
+        assert db.changes_since(2, latest)[1] == [(third, (third, "Третья", "", 0))]
+
+        # Импорт с отложенными индексами тоже попадает в журнал
+        latest = db.change_version()
+        db.import_tasks(1, [("Импорт", "", 0, None)], defer_indexes=True)
+        assert [task[1] for _, task in db.changes_since(1, latest)[1]] == ["Импорт"]
+
+        # Журнал обрезан дальше запрошенной версии - список перечитывается целиком
+        db.trim_changes(keep=1)
+        assert db.changes_since(1, latest - 1)[1] is None
+        assert db.changes_since(1, db.change_version() - 1)[1] is not None
+
+
+def test_watcher_applies_only_changed_rows_from_another_connection():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "t.sqlite")
+        db = make_db(path, users=1)
+        db.add_tasks(1, ((f"Задача {i}", "") for i in range(1000)))
+        cache = TaskCache(db)
+        model = TaskTableModel(cache)
+        watcher = ChangeWatcher(cache)
+        watcher.changed.connect(model.apply_changes)
+        watcher.watch(1)
+        model.load_user(1)
+        while model.canFetchMore():
+            model.fetchMore()
+        cache.get_tasks(1)
+        assert watcher.poll() is False
+
+        # Свои правки не считаются чужими изменениями
+        model.toggle_status(0)
+        assert watcher.poll() is False
+
+        # Другой процесс правит, удаляет и добавляет задачи
+        other = Database(path)
+        other.update_task_title(500, "Правка из другого окна")
+        other.update_task_status(2, 1)
+        with other._get_connection() as conn:
+            conn.execute("DELETE FROM tasks WHERE id = 10")
+        new_id = other.add_task(1, "Новая из другого окна", "")
+
+        statements = []
+        db._get_connection().set_trace_callback(statements.append)
+        changed_rows = []
+        model.dataChanged.connect(lambda first, last, roles=(): changed_rows.append(first.row()))
+        assert watcher.poll() is True
+        db._get_connection().set_trace_callback(None)
+        # Список из тысячи задач не перечитывается: data_version, версия,
+        # начало журнала и сами изменения
+        assert len(statements) == 4, statements
+
+        assert model.rowCount() == 1000
+        assert model.tasks[model.row_of(500)].title == "Правка из другого окна"
+        assert model.tasks[model.row_of(2)].is_done == 1
+        assert model.row_of(10) is None
+        assert model.row_of(new_id) == 999
+        # Строка 0 - своя правка из журнала: применяется повторно и ничего не меняет
+        assert sorted(changed_rows) == [0, 1, 498]
+        # Кэш списков пользователя устарел и выброшен
+        misses = cache.misses
+        assert cache.get_tasks(1) == db.get_tasks(1)
+        assert cache.misses == misses + 1
+
+        # Скрытые выполненные задачи пропадают и при чужой отметке
+        model.set_hide_completed(True)
+        rows = model.rowCount()
+        other.update_task_status(100, 1)
+        watcher.poll()
+        assert model.rowCount() == rows - 1 and model.row_of(100) is None
+        other.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    test_changes_since_returns_current_rows_of_changed_tasks()
+    test_watcher_applies_only_changed_rows_from_another_connection()
+    print("Журнал изменений и обновление списка по разнице работают корректно")
@@ -0,0 +1,121 @@
+import multiprocessing
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from database import Database  # noqa: E402
+
+WRITERS = 4
+READERS = 3
+TASKS_PER_WRITER = 100
+
+# spawn: дочерние процессы не наследуют соединения и Qt родительского процесса
+mp = multiprocessing.get_context("spawn")
+
+
+def make_db(path, users):
+    db = Database(path)
+    conn = db._get_connection()
+    with conn:
+        conn.executemany(
+            "INSERT INTO users (login, email, password_hash) VALUES (?, ?, '-')",
+            ((f"u{i}", f"u{i}@example.com") for i in range(users)),
+        )
+    return db
+
+
+def write_tasks(db_path, user_id, start):
+    start.wait()
+    with Database(db_path) as db:
+        task_id = db.add_task(user_id, "Переключатель", "")
+        for i in range(TASKS_PER_WRITER):
+            db.add_task(user_id, f"Задача {i}", "")
+            db.toggle_task_status(task_id)
+            db.update_tasks({task_id: {"description": str(i)}})
+
+
+def read_tasks(db_path, start, stop, reads):
+    start.wait()
+    with Database(db_path) as db:
+        while not stop.is_set():
+            for user_id in range(1, WRITERS + 1):
+                db.get_tasks(user_id)
+            with reads.get_lock():
+                reads.value += 1
+
+
+def test_concurrent_writer_processes_lose_no_updates():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "t.sqlite")
+        make_db(path, WRITERS).close()
+
+        start, stop = mp.Event(), mp.Event()
+        reads = mp.Value("q", 0)
+        writers = [
+            mp.Process(target=write_tasks, args=(path, user_id, start))
+            for user_id in range(1, WRITERS + 1)
+        ]
+        readers = [
+            mp.Process(target=read_tasks, args=(path, start, stop, reads))
+            for _ in range(READERS)
+        ]
+        for process in writers + readers:
+            process.start()
+        start.set()
+        for process in writers:
+            process.join(120)
+        stop.set()
+        for process in readers:
+            process.join(30)
+        # Ни один процесс не упал с «database is locked»
+        assert [process.exitcode for process in writers + readers] == [0] * (WRITERS + READERS)
+        assert reads.value > 0
+
+        with Database(path) as db:
+            for user_id in range(1, WRITERS + 1):
+                tasks = db.get_tasks(user_id)
+                assert len(tasks) == TASKS_PER_WRITER + 1
+                # Чётное число переключений возвращает статус, последняя правка на месте
+                assert tasks[0][2:] == (str(TASKS_PER_WRITER - 1), 0)
+
+
+def test_reads_proceed_and_writes_wait_while_another_process_writes():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "t.sqlite")
+        db = make_db(path, 1)
+        db.add_task(1, "Задача", "")
+
+        # Чужой процесс держит транзакцию записи
+        other = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        other.execute("BEGIN IMMEDIATE")
+        other.execute("UPDATE tasks SET title = 'Чужая правка'")
+
+        # Чтение не ждёт и видит последнее зафиксированное состояние
+        start = time.perf_counter()
+        assert db.get_tasks(1)[0][1] == "Задача"
+        assert time.perf_counter() - start < 0.1
+
+        # Запись ждёт освобождения базы, а не падает сразу
+        threading.Timer(0.3, other.commit).start()
+        start = time.perf_counter()
+        db.update_task_title(1, "Своя правка")
+        assert time.perf_counter() - start >= 0.25
+        assert db.get_tasks(1)[0][1] == "Своя правка"
+        other.close()
+        db.close()
+
+
+if __name__ == "__main__":
+    test_concurrent_writer_processes_lose_no_updates()
+    test_reads_proceed_and_writes_wait_while_another_process_writes()
+    print("Параллельная запись из нескольких процессов работает корректно")
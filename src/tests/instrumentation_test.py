@@ -0,0 +1,93 @@
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from database import Database  # noqa: E402
+from instrumentation import metrics, timed  # noqa: E402
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_database_operations_are_timed_and_logged():
+    handler = ListHandler()
+    logging.getLogger("smart_todo_list.slow").addHandler(handler)
+    metrics.reset()
+    metrics.enable(slow_threshold_ms=0)  # в журнал попадает каждая операция
+    try:
+        with tempfile.TemporaryDirectory() as tmp, Database(
+            os.path.join(tmp, "t.sqlite")
+        ) as db:
+            db.register_user("user", "user@example.com", "Passw0rd!")
+            user_id = db.get_user_id("user")
+            db.add_task(user_id, "Секретная задача", "")
+            db.get_tasks(user_id)
+            db.get_tasks(user_id)
+            assert len(list(db.export_tasks(user_id))) == 1
+            assert db.verify_user("user", "Passw0rd!")
+            with metrics.measure("ui.action"):
+                db.get_tasks(user_id)
+    finally:
+        metrics.disable()
+        logging.getLogger("smart_todo_list.slow").removeHandler(handler)
+
+    assert metrics.count("db.get_tasks") == 3
+    assert metrics.count("db.export_tasks") == 1  # генератор - одна операция
+    assert metrics.count("bcrypt.checkpw") == 1
+    assert metrics.counter("smart_todo_sqlite_statements_total", "db.get_tasks") == 3
+    assert metrics.counter("smart_todo_sqlite_statements_total", "db.add_task") >= 1
+
+    # В журнале видно, куда ушло время, и нет значений из запросов
+    verify = next(m for m in handler.messages if m.startswith("db.verify_user"))
+    assert "bcrypt" in verify and "SQL-запросов 1" in verify
+    action = next(m for m in handler.messages if m.startswith("ui.action"))
+    assert "db " in action and "FROM tasks" in action
+    assert not any("Секретная" in m or "$2b$" in m for m in handler.messages)
+
+    text = metrics.to_prometheus()
+    assert "# TYPE smart_todo_operation_seconds histogram" in text
+    assert 'smart_todo_operation_seconds_count{operation="db.get_tasks"} 3' in text
+    assert 'smart_todo_operation_seconds_bucket{operation="db.get_tasks",le="+Inf"} 3' in text
+    assert 'smart_todo_sqlite_statements_total{operation="db.get_tasks"} 3' in text
+
+
+def test_disabled_instrumentation_has_negligible_overhead():
+    metrics.reset()
+
+    def plain(x):
+        return x
+
+    wrapped = timed("test.plain")(plain)
+    calls = 200_000
+
+    def per_call(func):
+        start = time.perf_counter()
+        for i in range(calls):
+            func(i)
+        return (time.perf_counter() - start) / calls
+
+    overhead = min(per_call(wrapped) - per_call(plain) for _ in range(3))
+    assert metrics.count("test.plain") == 0
+    # Меньше микросекунды на вызов - на фоне запроса к SQLite (десятки мкс) незаметно
+    assert overhead < 1e-6, overhead
+
+
+if __name__ == "__main__":
+    test_database_operations_are_timed_and_logged()
+    test_disabled_instrumentation_has_negligible_overhead()
+    print("Замеры операций работают корректно")
@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from database import Database  # noqa: E402
+from migrations import get_version, load_migrations  # noqa: E402
+
+USERS = 1000
+TASKS = 1_000_000
+
+
+def create_old_db(db_path):
+    # База в том виде, в каком её создавала старая версия приложения: только schema.sql
+    conn = sqlite3.connect(db_path)
+    with open(Database._schema_path(), "r", encoding="utf-8") as f:
+        conn.executescript(f.read())
+    with conn:
+        conn.execute(
+            """
+            WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?)
+            INSERT INTO users (login, email, password_hash)
+            SELECT 'user' || n, 'user' || n || '@example.com', '-' FROM seq
+            """,
+            (USERS,),
+        )
+        conn.execute(
+            """
+            WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?)
+            INSERT INTO tasks (user_id, title, description, is_done)
+            SELECT n % ? + 1, 'Задача ' || n, 'Описание ' || n, n % 3 = 0 FROM seq
+            """,
+            (TASKS, USERS),
+        )
+    conn.close()
+
+
+def query_plan(conn, sql, params):
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+
+def test_migrations_upgrade_existing_db_and_use_indexes():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "old.sqlite")
+        create_old_db(db_path)
+
+        with Database(db_path) as db:
+            conn = db._get_connection()
+            latest = load_migrations()[-1][0]
+            assert get_version(conn) == latest
+
+            # ANALYZE после миграций заполнил статистику
+            assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+
+            # Постраничная загрузка идёт по индексу без сортировки во временном дереве
+            plan = query_plan(
+                conn,
+                "SELECT id, title, description, is_done FROM tasks"
+                " WHERE user_id = ? AND id > ? ORDER BY id LIMIT ?",
+                (42, 0, 200),
+            )
+            assert "USING INDEX idx_tasks_user_id" in plan, plan
+            assert "TEMP B-TREE" not in plan, plan
+
+            plan = query_plan(
+                conn, "SELECT id FROM tasks WHERE user_id = ? AND is_done = 0", (42,)
+            )
+            assert "USING COVERING INDEX idx_tasks_user_done" in plan, plan
+
+            # Вход ищет пользователя по уникальному индексу login, а не перебором
+            plan = query_plan(
+                conn, "SELECT password_hash FROM users WHERE login = ?", ("user42",)
+            )
+            assert plan.startswith("SEARCH users USING INDEX"), plan
+
+            assert len(db.get_tasks(42)) == TASKS // USERS
+            assert len(list(db.iter_tasks(42))) == TASKS // USERS
+            page = list(db.iter_tasks(42, after_id=0, limit=10))
+            next_page = list(db.iter_tasks(42, after_id=page[-1][0], limit=10))
+            assert len(page) == len(next_page) == 10
+            assert page[-1][0] < next_page[0][0]
+
+        # Повторное открытие не применяет миграции заново
+        with Database(db_path) as db:
+            assert get_version(db._get_connection()) == latest
+
+
+if __name__ == "__main__":
+    test_migrations_upgrade_existing_db_and_use_indexes()
+    print("Миграции применены, индексы используются")
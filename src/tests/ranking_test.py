@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+from database import Database  # noqa: E402
+from ranking import DAY, Ranking, parse_due_date, rank_tasks  # noqa: E402
+import task_model  # noqa: E402
+from task_model import TaskTableModel  # noqa: E402
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+def make_db(path):
+    db = Database(path)
+    with db._get_connection() as conn:
+        conn.execute(
+            "INSERT INTO users (login, email, password_hash) VALUES ('u', 'u@example.com', '-')"
+        )
+    return db
+
+
+def days_from_now(days):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(time.time() + days * DAY))
+
+
+def test_urgent_and_important_tasks_come_first():
+    with tempfile.TemporaryDirectory() as tmp, make_db(os.path.join(tmp, "t.sqlite")) as db:
+        plain = db.add_task(1, "Без срока", "")
+        later = db.add_task(1, "Через месяц", "", days_from_now(30))
+        high = db.add_task(1, "Важная", "", None, 3)
+        overdue = db.add_task(1, "Просрочена", "", days_from_now(-3))
+        tomorrow = db.add_task(1, "Завтра", "", days_from_now(1), 1)
+        done = db.add_task(1, "Выполнена", "", days_from_now(-10), 3)
+        db.toggle_task_status(done)
+        # Старая задача без срока поднимается выше новой
+        old = db.add_task(1, "Старая", "")
+        with db._get_connection() as conn:
+            conn.execute(
+                "UPDATE tasks SET created_at = datetime('now', '-60 days') WHERE id = ?", (old,)
+            )
+
+        ranking = rank_tasks(db, 1)
+        assert len(ranking) == 6
+        assert ranking.page(0, 10).tolist() == [overdue, tomorrow, high, old, later, plain]
+        assert ranking.top(3).tolist() == [overdue, tomorrow, high]
+
+        statements = []
+        db._get_connection().set_trace_callback(statements.append)
+        rank_tasks(db, 1)
+        db._get_connection().set_trace_callback(None)
+        plan = db._get_connection().execute("EXPLAIN QUERY PLAN " + statements[0]).fetchall()
+        assert "COVERING INDEX idx_tasks_user_open_rank" in plan[0][-1]
+
+
+def test_top_matches_full_order_with_ties():
+    rng = np.random.default_rng(1)
+    ids = np.arange(1, 5001)
+    # Много одинаковых задач (импорт одной пачкой) и немного со сроком
+    created = np.full(len(ids), 1_700_000_000)
+    priority = rng.integers(0, 2, len(ids))
+    due = np.zeros(len(ids), np.int64)
+    due[::50] = 1_700_000_000 + rng.integers(0, 10, 100) * DAY
+    columns = (ids, due, priority, created)
+    ranking = Ranking(*columns, now=1_700_000_000)
+    for count in (1, 7, 100, 2600):
+        top = Ranking(*columns, now=1_700_000_000).top(count)
+        assert top.tolist() == ranking.page(0, count).tolist()
+    # Равные оценки - по порядку строк, то есть по id
+    order = ranking.page(0, len(ids))
+    equal = order[(due[order - 1] == 0) & (priority[order - 1] == 0)]
+    assert (np.diff(equal) > 0).all()
+
+
+def test_million_tasks_are_ranked_without_python_loop():
+    rng = np.random.default_rng(2)
+    now = time.time()
+    count = 1_000_000
+    ids = np.arange(1, count + 1)
+    due = np.where(rng.random(count) < 0.5, int(now) + rng.integers(-10, 60, count) * DAY, 0)
+    priority = rng.integers(0, 4, count)
+    created = int(now) - rng.integers(0, 400, count) * DAY
+    started = time.perf_counter()
+    Ranking(ids, due, priority, created, now).top(200)
+    # Запас в несколько раз: на обычной машине - десятки миллисекунд
+    assert time.perf_counter() - started < 1.0
+
+
+def test_model_shows_open_tasks_ranked_then_done_tasks(monkeypatch):
+    monkeypatch.setattr(task_model, "PAGE_SIZE", 20)
+    with tempfile.TemporaryDirectory() as tmp, make_db(os.path.join(tmp, "t.sqlite")) as db:
+        db.add_tasks(1, ((f"Задача {i}", "") for i in range(50)))
+        db.update_tasks({i: {"priority": 3} for i in range(30, 36)})
+        db.update_tasks({i: {"is_done": 1} for i in range(1, 11)})
+        urgent = db.add_task(1, "Срочная", "", days_from_now(0.5))
+
+        model = TaskTableModel(db, ranked=True)
+        model.load_user(1)
+        while model.canFetchMore():
+            model.fetchMore()
+        ids = list(model.tasks.ids)
+        assert ids[:7] == [urgent, 30, 31, 32, 33, 34, 35]
+        assert ids[7:41] == [i for i in range(11, 51) if not 30 <= i <= 35]
+        assert ids[41:] == list(range(1, 11))
+
+        model.set_hide_completed(True)
+        while model.canFetchMore():
+            model.fetchMore()
+        assert list(model.tasks.ids) == ids[:41]
+
+        # Новая важная задача встаёт на своё место, а не в конец
+        important = model.add_task(1, "Ещё важная", "", None, 3)
+        assert model.row_of(important) == 7
+
+
+def test_due_date_and_priority_are_validated():
+    assert parse_due_date("") is None
+    assert parse_due_date(" 2026-03-01 ") == "2026-03-01"
+    assert parse_due_date("2026-03-01 9:05") == "2026-03-01 09:05:00"
+    with pytest.raises(ValueError):
+        parse_due_date("01.03.2026")
+    with tempfile.TemporaryDirectory() as tmp, make_db(os.path.join(tmp, "t.sqlite")) as db:
+        with pytest.raises(sqlite3.IntegrityError):
+            db.add_task(1, "Задача", "", None, 7)
+        task_id = db.add_task(1, "Задача", "")
+        db.update_tasks({task_id: {"due_date": "2026-03-01", "priority": 2}})
+        assert db._get_connection().execute(
+            "SELECT due_date, priority FROM tasks WHERE id = ?", (task_id,)
+        ).fetchone() == ("2026-03-01", 2)
+
+
+if __name__ == "__main__":
+    test_urgent_and_important_tasks_come_first()
+    test_top_matches_full_order_with_ties()
+    test_million_tasks_are_ranked_without_python_loop()
+    test_due_date_and_priority_are_validated()
+    print("Умный порядок задач работает корректно")
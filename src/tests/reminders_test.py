@@ -0,0 +1,236 @@
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from PyQt6.QtCore import QEventLoop, QTimer  # noqa: E402
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+from api_client import ApiClient  # noqa: E402
+from api_server import TaskApiServer  # noqa: E402
+from database import Database  # noqa: E402
+from reminder_notifier import ReminderNotifier  # noqa: E402
+from reminders import Reminder, ReminderQueue, ReminderScheduler, due_seconds  # noqa: E402
+from task_model import TaskTableModel  # noqa: E402
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+HOUR = 60 * 60
+
+# Начало часа: сроки в тестах - целые секунды, как в tasks.due_date
+NOW = 1_750_000_000 - 1_750_000_000 % HOUR
+
+
+def utc(seconds):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(seconds))
+
+
+def make_db(path):
+    db = Database(path)
+    with db._get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (login, email, password_hash) VALUES (?, ?, '-')",
+            (("u", "u@example.com"), ("v", "v@example.com")),
+        )
+    return db
+
+
+class FakeTimer:
+    """Часы и таймер для ReminderScheduler: время идёт только по advance"""
+
+    def __init__(self, now=NOW):
+        self.now = now
+        self.armed = []  # на какое время взводился таймер
+        self.fired = []
+
+    def clock(self):
+        return self.now
+
+    def arm(self, delay):
+        self.armed.append(self.now + delay)
+
+    def scheduler(self, db, **kwargs):
+        return ReminderScheduler(db, self.arm, self.fired.extend, clock=self.clock, **kwargs)
+
+    def advance(self, scheduler):
+        """Переводит часы на взведённый срок и срабатывает таймер"""
+        self.now = self.armed[-1]
+        scheduler.fire()
+
+
+def test_queue_pops_in_due_order_and_skips_cancelled():
+    queue = ReminderQueue()
+    for task_id, due in ((1, 50), (2, 10), (3, 30), (4, 20)):
+        queue.schedule(Reminder(task_id, 1, f"Задача {task_id}", due))
+    queue.schedule(Reminder(3, 1, "Задача 3", 5))  # перенос раньше
+    queue.schedule(Reminder(2, 1, "Задача 2", 40))  # перенос позже
+    queue.cancel(4)
+    assert len(queue) == 3 and 4 not in queue
+    assert queue.next_due() == 5
+    assert [r.task_id for r in queue.pop_due(40)] == [3, 2]
+    assert queue.pop_due(49) == []
+    assert [r.task_id for r in queue.pop_due(50)] == [1]
+    assert queue.next_due() is None
+
+    # Устаревшие записи не копятся: куча перестраивается
+    for i in range(10_000):
+        queue.schedule(Reminder(1, 1, "Задача 1", i))
+    assert len(queue._heap) < 100
+    assert queue.next_due() == 9_999
+
+
+def test_scheduler_loads_window_by_index_and_fires_in_order():
+    with tempfile.TemporaryDirectory() as tmp, make_db(os.path.join(tmp, "t.sqlite")) as db:
+        soon = db.add_task(1, "Скоро", "", utc(NOW + HOUR))
+        later = db.add_task(1, "Позже", "", utc(NOW + 2 * HOUR))
+        db.add_task(1, "Прошло", "", utc(NOW - HOUR))
+        tomorrow = db.add_task(1, "Завтра", "", utc(NOW + 30 * HOUR))
+        db.add_task(1, "Без срока", "")
+        done = db.add_task(1, "Выполнена", "", utc(NOW + HOUR))
+        db.toggle_task_status(done)
+        db.add_task(2, "Чужая", "", utc(NOW + HOUR))
+
+        timer = FakeTimer()
+        scheduler = timer.scheduler(db, user_id=1)
+        scheduler.start()
+        assert sorted(scheduler.queue._reminders) == [soon, later]
+        assert timer.armed == [NOW + HOUR]
+
+        timer.advance(scheduler)
+        assert [(r.task_id, r.title, r.due) for r in timer.fired] == [(soon, "Скоро", NOW + HOUR)]
+        timer.advance(scheduler)
+        assert [r.task_id for r in timer.fired] == [soon, later]
+        # Куча пуста - таймер взведён на конец горизонта, там читается следующий
+        assert timer.armed[-1] == NOW + 24 * HOUR
+        timer.advance(scheduler)
+        timer.advance(scheduler)
+        assert [r.task_id for r in timer.fired] == [soon, later, tomorrow]
+
+        conn = db._get_connection()
+        for user_id in (1, None):
+            statements = []
+            conn.set_trace_callback(statements.append)
+            db.due_tasks(NOW, NOW + HOUR, user_id)
+            conn.set_trace_callback(None)
+            plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + statements[0]))
+            assert "USING INDEX" in plan and "SCAN tasks" not in plan, plan
+            assert "TEMP B-TREE" not in plan, plan
+
+
+def test_changes_update_heap_without_rescanning():
+    with tempfile.TemporaryDirectory() as tmp, make_db(os.path.join(tmp, "t.sqlite")) as db:
+        first = db.add_task(1, "Первая", "", utc(NOW + 3 * HOUR))
+        second = db.add_task(1, "Вторая", "", utc(NOW + 5 * HOUR))
+        timer = FakeTimer()
+        scheduler = timer.scheduler(db, user_id=1)
+        scheduler.start()
+        assert timer.armed == [NOW + 3 * HOUR]
+
+        statements = []
+        db._get_connection().set_trace_callback(statements.append)
+        # Новая задача раньше всех - таймер перевзводится
+        new = db.add_task(1, "Новая", "", utc(NOW + HOUR))
+        scheduler.task_changed(new, {"title": "Новая", "due_date": utc(NOW + HOUR), "is_done": 0})
+        assert timer.armed[-1] == NOW + HOUR
+        # Правка ещё в очереди записи: значения из правки новее базы
+        scheduler.task_changed(first, {"due_date": utc(NOW + 30 * 60)})
+        assert timer.armed[-1] == NOW + 30 * 60
+        scheduler.task_changed(second, {"is_done": 1})
+        scheduler.task_changed(first, {"title": "Первая!"})
+        scheduler.task_changed(new, {"due_date": None})
+        db._get_connection().set_trace_callback(None)
+        reads = [sql for sql in statements if sql.lstrip().startswith("SELECT")]
+        # По одному чтению по первичному ключу на правку срока, без перебора задач
+        assert len(reads) == 3 and all("FROM tasks WHERE id = " in sql for sql in reads)
+
+        assert sorted(scheduler.queue._reminders) == [first]
+        timer.advance(scheduler)
+        assert [(r.task_id, r.title) for r in timer.fired] == [(first, "Первая!")]
+
+        # Срок дальше горизонта в кучу не попадает - его прочитает следующий запрос
+        scheduler.task_changed(second, {"is_done": 0, "due_date": utc(NOW + 48 * HOUR)})
+        assert second not in scheduler.queue
+
+
+def test_notifier_fires_qt_timer_for_task_added_in_window():
+    with tempfile.TemporaryDirectory() as tmp, make_db(os.path.join(tmp, "t.sqlite")) as db:
+        model = TaskTableModel(db)
+        model.load_user(1)
+        notifier = ReminderNotifier(db)
+        model.task_written.connect(notifier.task_changed)
+        fired = []
+        notifier.due.connect(fired.extend)
+        notifier.watch(1)
+
+        due = int(time.time()) + 1
+        task_id = model.add_task(1, "Позвонить", "", utc(due))
+        cancelled = model.add_task(1, "Отменится", "", utc(due))
+        model.toggle_status(model.row_of(cancelled))
+
+        loop = QEventLoop()
+        notifier.due.connect(loop.quit)
+        QTimer.singleShot(5000, loop.quit)
+        loop.exec()
+        assert [(r.task_id, r.title) for r in fired] == [(task_id, "Позвонить")]
+        assert time.time() >= due
+        notifier.stop()
+
+
+async def check_service_reminders(tmp):
+    db = Database(os.path.join(tmp, "t.sqlite"))
+    db.register_user("user", "user@example.com", "Passw0rd!")
+    server = TaskApiServer(db, db_workers=2, auth_workers=1, reminders=True)
+    host, port = await server.start("127.0.0.1", 0)
+    try:
+        client = ApiClient(host, port)
+        await client.login("user", "Passw0rd!")
+        due = int(time.time()) + 1
+        status, task = await client.request(
+            "POST", "/tasks", {"title": "Напомнить", "due_date": utc(due)}
+        )
+        assert status == 200
+        _, other = await client.request("POST", "/tasks", {"title": "Не напоминать"})
+        await client.request("PATCH", f"/tasks/{other['id']}", {"due_date": utc(due)})
+        await client.request("POST", f"/tasks/{other['id']}/toggle")
+        assert (await client.request("GET", "/reminders")) == (200, {"reminders": []})
+
+        await asyncio.sleep(due + 0.5 - time.time())
+        assert await client.request("GET", "/reminders") == (
+            200,
+            {"reminders": [{"id": task["id"], "title": "Напомнить", "due": due}]},
+        )
+        # Напоминание отдаётся один раз
+        assert (await client.request("GET", "/reminders")) == (200, {"reminders": []})
+    finally:
+        await server.close()
+
+
+def test_service_keeps_due_reminders_for_client():
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(check_service_reminders(tmp))
+
+
+def test_due_seconds_is_utc():
+    assert due_seconds(None) is None
+    assert due_seconds(utc(NOW)) == NOW
+    assert due_seconds("1970-01-02") == 24 * HOUR
+
+
+if __name__ == "__main__":
+    test_queue_pops_in_due_order_and_skips_cancelled()
+    test_scheduler_loads_window_by_index_and_fires_in_order()
+    test_changes_update_heap_without_rescanning()
+    test_notifier_fires_qt_timer_for_task_added_in_window()
+    test_service_keeps_due_reminders_for_client()
+    test_due_seconds_is_utc()
+    print("Напоминания о сроках работают корректно")
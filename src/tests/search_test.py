@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from database import Database  # noqa: E402
+
+USERS = 1000
+TASKS = 1_000_000
+SYLLABLES = "ба ве ги до жу зы ка ле ми но пу ро са ти фу хе цы ча ше щу эр юн як бор вал гор дан жен зим кот лун мир".split()
+
+
+def make_user(db):
+    conn = db._get_connection()
+    with conn:
+        conn.execute(
+            "INSERT INTO users (login, email, password_hash) VALUES ('u', 'u@example.com', '-')"
+        )
+
+
+def test_search_matches_prefixes_and_ranks_title_first():
+    with tempfile.TemporaryDirectory() as tmp, Database(
+        os.path.join(tmp, "t.sqlite")
+    ) as db:
+        make_user(db)
+        first = db.add_task(1, "Купить молоко", "")
+        second = db.add_task(1, "Позвонить маме", "и купить торт")
+        third = db.add_task(1, "Отчёт за квартал", "Отправить до пятницы")
+
+        assert [row[0] for row in db.search_tasks(1, "куп")] == [first, second]
+        assert [row[0] for row in db.search_tasks(1, "отчет")] == [third]
+        assert [row[0] for row in db.search_tasks(1, "КВАРТ пятн")] == [third]
+        assert db.search_tasks(1, "молоко торт") == []
+        assert db.search_tasks(2, "куп") == []
+        # Символы синтаксиса FTS5 в запросе не вызывают ошибок
+        assert db.search_tasks(1, '"AND* (NOT') == []
+        assert db.search_tasks(1, "   ") == []
+
+        # Индекс обновляется триггерами вместе с таблицей tasks
+        db.update_task_title(first, "Купить хлеб")
+        assert db.search_tasks(1, "молоко") == []
+        assert db.search_tasks(1, "хлеб")[0][:2] == (first, "Купить хлеб")
+        db._get_connection().execute("DELETE FROM tasks WHERE id = ?", (second,))
+        assert [row[0] for row in db.search_tasks(1, "куп")] == [first]
+
+
+def create_old_db(db_path):
+    # Старая база без FTS: индекс строится миграцией при первом открытии
+    conn = sqlite3.connect(db_path)
+    with open(Database._schema_path(), "r", encoding="utf-8") as f:
+        conn.executescript(f.read())
+    conn.execute("CREATE TEMP TABLE syllables (i INTEGER PRIMARY KEY, s TEXT)")
+    conn.executemany("INSERT INTO syllables VALUES (?, ?)", enumerate(SYLLABLES))
+    # Словарь из 32768 «слов» по три слога: каждое слово встречается примерно
+    # в сотне задач, как обычное слово в реальном списке дел
+    conn.execute(
+        """
+        CREATE TEMP TABLE words AS
+        SELECT a.i * 1024 + b.i * 32 + c.i AS i, a.s || b.s || c.s AS word
+        FROM syllables a, syllables b, syllables c
+        """
+    )
+    conn.execute("CREATE UNIQUE INDEX temp.words_i ON words (i)")
+    with conn:
+        conn.execute(
+            """
+            WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?)
+            INSERT INTO users (login, email, password_hash)
+            SELECT 'user' || n, 'user' || n || '@example.com', '-' FROM seq
+            """,
+            (USERS,),
+        )
+        conn.execute(
+            """
+            WITH RECURSIVE seq(n) AS (SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < ?)
+            INSERT INTO tasks (user_id, title, description)
+            SELECT n % ? + 1,
+                (SELECT word FROM words WHERE i = n * 7 % 32768) || ' '
+                    || (SELECT word FROM words WHERE i = n * 13 % 32768),
+                (SELECT word FROM words WHERE i = n * 31 % 32768) || ' '
+                    || (SELECT word FROM words WHERE i = n * 37 % 32768) || ' ' || n
+            FROM seq
+            """,
+            (TASKS, USERS),
+        )
+    conn.close()
+
+
+def make_queries(db, user_id):
+    # Запросы из слов задач самого пользователя: каждый что-то находит.
+    # Самые тяжёлые - короткие префиксы, которые набирает пользователь в
+    # начале ввода, в том числе по два слова сразу
+    title, description = db._get_connection().execute(
+        "SELECT title, description FROM tasks WHERE user_id = ? ORDER BY id LIMIT 1",
+        (user_id,),
+    ).fetchone()
+    first, second = title.split()
+    third = description.split()[0]
+    return [
+        first[:2],
+        first[:4],
+        first,
+        f"{first[:2]} {second[:2]}",
+        f"{first[:3]} {second[:4]}",
+        f"{first} {third[:3]}",
+        f"{first[:2]} {second[:2]} {third[:2]}",
+    ]
+
+
+def test_search_latency_on_million_tasks():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "big.sqlite")
+        create_old_db(db_path)
+        with Database(db_path) as db:
+            timings = []
+            for user_id in (1, 42, 500, 999):
+                for query in make_queries(db, user_id):
+                    db.search_tasks(user_id, query)  # прогрев кэша страниц
+                    start = time.perf_counter()
+                    rows = db.search_tasks(user_id, query)
+                    timings.append(time.perf_counter() - start)
+                    assert rows, query
+            timings.sort()
+            p95 = timings[int(len(timings) * 0.95)]
+            assert p95 < 0.010, f"p95 поиска {p95 * 1000:.1f} мс"
+            assert timings[-1] < 0.020, f"максимум поиска {timings[-1] * 1000:.1f} мс"
+
+
+if __name__ == "__main__":
+    test_search_matches_prefixes_and_ranks_title_first()
+    test_search_latency_on_million_tasks()
+    print("Полнотекстовый поиск работает корректно")
@@ -0,0 +1,133 @@
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+)
+sys.path.insert(0, APP_DIR)
+
+from PyQt6.QtCore import QEventLoop, QTimer  # noqa: E402
+from PyQt6.QtWidgets import QApplication, QMessageBox  # noqa: E402
+
+from database import Database  # noqa: E402
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+# Малая стоимость bcrypt, чтобы тест шёл быстро
+ROUNDS = 4
+
+
+def password_hash(db, login):
+    return db._get_connection().execute(
+        "SELECT password_hash FROM users WHERE login = ?", (login,)
+    ).fetchone()[0]
+
+
+def test_verify_user_returns_id_in_one_query_and_rehashes_on_cost_change():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "t.sqlite")
+        with Database(path, bcrypt_rounds=ROUNDS) as db:
+            db.register_user("user", "user@example.com", "Passw0rd!")
+            assert password_hash(db, "user").startswith(f"$2b$0{ROUNDS}$")
+
+            statements = []
+            db._get_connection().set_trace_callback(statements.append)
+            assert db.verify_user("user", "Passw0rd!") == db.get_user_id("user")
+            # Один запрос в verify_user и один - get_user_id для сравнения
+            assert len(statements) == 2
+            assert db.verify_user("user", "wrong") is None
+            assert db.verify_user("nobody", "Passw0rd!") is None
+            old_hash = password_hash(db, "user")
+
+        # Стоимость выросла: хеш пересчитывается только после верного пароля
+        with Database(path, bcrypt_rounds=ROUNDS + 1) as db:
+            assert db.verify_user("user", "wrong") is None
+            assert password_hash(db, "user") == old_hash
+            assert db.verify_user("user", "Passw0rd!") == 1
+            new_hash = password_hash(db, "user")
+            assert new_hash.startswith(f"$2b$0{ROUNDS + 1}$")
+            assert db.verify_user("user", "Passw0rd!") == 1
+            assert password_hash(db, "user") == new_hash
+
+
+def test_session_tokens_are_hashed_expire_and_can_be_deleted():
+    with tempfile.TemporaryDirectory() as tmp, Database(
+        os.path.join(tmp, "t.sqlite"), bcrypt_rounds=ROUNDS
+    ) as db:
+        db.register_user("user", "user@example.com", "Passw0rd!")
+        user_id = db.get_user_id("user")
+        token = db.create_session(user_id)
+        assert db.check_session(token) == user_id
+        assert db.check_session(token + "x") is None
+        stored = db._get_connection().execute("SELECT token_hash FROM sessions").fetchall()
+        assert len(stored) == 1 and token not in stored[0][0]
+
+        # Проверка токена - поиск по первичному ключу
+        plan = db._get_connection().execute(
+            "EXPLAIN QUERY PLAN SELECT user_id FROM sessions"
+            " WHERE token_hash = ? AND expires_at > ?",
+            ("", 0),
+        ).fetchall()
+        assert "PRIMARY KEY" in plan[0][-1]
+
+        expired = db.create_session(user_id, ttl=-1)
+        assert db.check_session(expired) is None
+        # Истёкшие сессии удаляются при создании новых
+        db.create_session(user_id)
+        assert db._get_connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0] == 2
+
+        db.delete_session(token)
+        assert db.check_session(token) is None
+
+
+def test_remembered_login_opens_tasks_on_next_launch():
+    import main
+
+    information = QMessageBox.information
+    QMessageBox.information = staticmethod(lambda *args: None)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "t.sqlite")
+            window = main.MainWindow(Database(path, bcrypt_rounds=ROUNDS))
+            window.db.register_user("user", "user@example.com", "Passw0rd!")
+            window.show_login()
+            login_window = window.login_window
+            login_window.loginInput.setText("user")
+            login_window.passwordInput.setText("Passw0rd!")
+            login_window.rememberCheckBox.setChecked(True)
+            loop = QEventLoop()
+            login_window.login_success.connect(loop.quit)
+            QTimer.singleShot(10000, loop.quit)
+            login_window.login()
+            loop.exec()
+            assert window.stackedWidget.currentWidget() is window.tasks_window
+            token = main.load_session_token(window.db)
+            assert token is not None
+            window.close_db()
+
+            # Новый запуск: задачи открываются без пароля
+            window = main.MainWindow(Database(path, bcrypt_rounds=ROUNDS))
+            start = time.perf_counter()
+            window.restore_session()
+            assert window.current_user_id == window.db.get_user_id("user")
+            assert window.stackedWidget.currentWidget() is window.tasks_window
+            assert time.perf_counter() - start < 1
+
+            # Вход без «Запомнить меня» забывает прежнюю сессию
+            main.save_session_token(window.db, None)
+            assert main.load_session_token(window.db) is None
+            assert window.db.check_session(token) is None
+            window.close_db()
+    finally:
+        QMessageBox.information = information
+
+
+if __name__ == "__main__":
+    test_verify_user_returns_id_in_one_query_and_rehashes_on_cost_change()
+    test_session_tokens_are_hashed_expire_and_can_be_deleted()
+    test_remembered_login_opens_tasks_on_next_launch()
+    print("Сессии и проверка паролей работают корректно")
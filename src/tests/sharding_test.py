@@ -0,0 +1,215 @@
+import asyncio
+import os
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+import sharding  # noqa: E402
+from api_client import ApiClient  # noqa: E402
+from api_server import TaskApiServer  # noqa: E402
+from change_watcher import ChangeWatcher  # noqa: E402
+from database import Database  # noqa: E402
+from sharding import SHARD_ID_SPAN, ShardedDatabase, open_database, rebalance  # noqa: E402
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+def make_legacy_db(path, users=6, tasks=20):
+    """Обычная база: пользователи 1..users по tasks задач, у первого часть в архиве"""
+    db = Database(path)
+    with db._get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (login, email, password_hash) VALUES (?, ?, '-')",
+            ((f"user{i}", f"user{i}@example.com") for i in range(1, users + 1)),
+        )
+    for user_id in range(1, users + 1):
+        db.add_tasks(user_id, ((f"Задача {user_id}-{i}", "") for i in range(tasks)))
+    with db._get_connection() as conn:
+        # done_at ставит триггер при смене is_done - сдвигается отдельно
+        conn.execute("UPDATE tasks SET is_done = 1 WHERE user_id = 1 AND id <= 5")
+        conn.execute(
+            "UPDATE tasks SET done_at = datetime('now', '-40 days') WHERE user_id = 1 AND id <= 5"
+        )
+    assert db.archive_tasks(30) == 5
+    db.close()
+
+
+def snapshot(db, user_id):
+    """Задачи пользователя без id (id меняются при переносе) и экспорт с архивом"""
+    return (
+        [task[1:] for task in db.get_tasks(user_id)],
+        list(db.export_tasks(user_id, include_archived=True)),
+    )
+
+
+def test_legacy_database_is_served_in_place_and_rebalanced():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "t.sqlite")
+        make_legacy_db(path)
+        with Database(path) as legacy:
+            before = {user_id: snapshot(legacy, user_id) for user_id in range(1, 7)}
+
+        with ShardedDatabase(path, 3) as db:
+            # До переноса задачи читаются из старого файла (шард 0)
+            assert all(db.shard_of_user(user_id) == 0 for user_id in range(1, 7))
+            assert snapshot(db, 2) == before[2]
+            assert db.toggle_task_status(db.get_tasks(2)[0][0]) == 1
+            before[2] = snapshot(db, 2)
+
+            # Новый пользователь сразу получает свой шард; id задачи - из его диапазона
+            db.register_user("new", "new@example.com", "Passw0rd!")
+            new_user = db.get_user_id("new")
+            assert db.shard_of_user(new_user) == db.home_shard(new_user) == 1 + new_user % 3
+            task_id = db.add_task(new_user, "Новая задача", "")
+            assert task_id // SHARD_ID_SPAN == db.shard_of_user(new_user)
+            assert db.get_task_owner(task_id) == new_user
+            db.update_tasks({task_id: {"title": "Новая задача!"}})
+            assert db.get_tasks_by_ids([task_id]) == [(task_id, "Новая задача!", "", 0)]
+
+            assert rebalance(db) == (6, 6 * 20 - 5)
+            for user_id in range(1, 7):
+                assert db.shard_of_user(user_id) == db.home_shard(user_id)
+                assert snapshot(db, user_id) == before[user_id]
+                assert all(
+                    task[0] // SHARD_ID_SPAN == db.home_shard(user_id)
+                    for task in db.get_tasks(user_id)
+                )
+            # Старый файл пуст, поиск и журнал изменений работают в шардах
+            assert db.directory.get_tasks(1) == []
+            assert list(db.directory.export_tasks(1, include_archived=True)) == []
+            assert [row[1] for row in db.search_tasks(3, "Задача 3-7")] == ["Задача 3-7"]
+            assert rebalance(db) == (0, 0)
+
+        # Шардированную базу узнают и без числа шардов
+        db = open_database(path)
+        assert isinstance(db, ShardedDatabase) and len(db.shards) == 3
+        assert snapshot(db, 4) == before[4]
+        db.close()
+
+
+def test_adding_shards_and_interrupted_move(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "t.sqlite")
+        make_legacy_db(path, users=8, tasks=10)
+        with ShardedDatabase(path, 2) as db:
+            rebalance(db)
+            before = {user_id: snapshot(db, user_id) for user_id in range(1, 9)}
+        with pytest.raises(ValueError):
+            ShardedDatabase(path, 1)
+
+        with ShardedDatabase(path, 4) as db:
+            # Сбой после записи нового шарда, до удаления задач из старого
+            delete = sharding._delete_user_tasks
+            calls = []
+
+            def crash_once(*args):
+                calls.append(args)
+                if len(calls) == 1:
+                    raise sqlite3.OperationalError("disk I/O error")
+                delete(*args)
+
+            monkeypatch.setattr(sharding, "_delete_user_tasks", crash_once)
+            with pytest.raises(sqlite3.OperationalError):
+                rebalance(db)
+            monkeypatch.setattr(sharding, "_delete_user_tasks", delete)
+            rebalance(db)
+
+            for user_id in range(1, 9):
+                assert db.shard_of_user(user_id) == 1 + user_id % 4
+                assert snapshot(db, user_id) == before[user_id]
+            # Ни в одном файле нет задач чужих пользователей
+            for shard, file_db in enumerate(db.files):
+                owners = {
+                    row[0]
+                    for row in file_db._get_connection().execute(
+                        "SELECT DISTINCT user_id FROM tasks"
+                    )
+                }
+                assert all(db.shard_of_user(user_id) == shard for user_id in owners)
+
+
+def test_writes_to_other_shards_do_not_wait_for_lock():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "t.sqlite")
+        with ShardedDatabase(path, 2) as db:
+            with db.directory._get_connection() as conn:
+                conn.executemany(
+                    "INSERT INTO users (login, email, password_hash) VALUES (?, ?, '-')",
+                    (("a", "a@example.com"), ("b", "b@example.com")),
+                )
+            assert db.shard_of_user(1) == 2 and db.shard_of_user(2) == 1
+            for file_db in db.files:
+                file_db._get_connection().execute("PRAGMA busy_timeout = 0")
+
+            # Другой процесс держит блокировку записи шарда пользователя 1
+            blocker = sqlite3.connect(sharding.shard_path(path, 2), timeout=0)
+            blocker.execute("BEGIN IMMEDIATE")
+            try:
+                add_once = sharding.Database.add_task.__wrapped__  # без повторов при занятой базе
+                with pytest.raises(sqlite3.OperationalError):
+                    add_once(db.for_user(1), 1, "Ждёт", "")
+                assert db.add_task(2, "Не ждёт", "") // SHARD_ID_SPAN == 1
+            finally:
+                blocker.rollback()
+                blocker.close()
+
+
+def test_change_watcher_and_api_work_over_shards():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "t.sqlite")
+        db = ShardedDatabase(path, 2)
+        db.register_user("user", "user@example.com", "Passw0rd!")
+        user_id = db.get_user_id("user")
+
+        # Изменение из другого процесса видно по data_version файла пользователя
+        watcher = ChangeWatcher(db)
+        changes = []
+        watcher.changed.connect(changes.extend)
+        watcher.watch(user_id)
+        with ShardedDatabase(path) as other:
+            task_id = other.add_task(user_id, "Из другого процесса", "")
+        assert watcher.poll()
+        assert changes == [(task_id, (task_id, "Из другого процесса", "", 0))]
+        watcher.stop()
+
+        async def check():
+            server = TaskApiServer(db, db_workers=2, auth_workers=1)
+            host, port = await server.start("127.0.0.1", 0)
+            try:
+                client = ApiClient(host, port)
+                await client.login("user", "Passw0rd!")
+                status, added = await client.request("POST", "/tasks", {"title": "Через HTTP"})
+                assert status == 200 and added["id"] // SHARD_ID_SPAN == db.shard_of_user(user_id)
+                assert await client.request("POST", f"/tasks/{added['id']}/toggle") == (
+                    200,
+                    {"id": added["id"], "is_done": 1},
+                )
+                status, page = await client.request("GET", "/tasks")
+                assert [task["title"] for task in page["tasks"]] == [
+                    "Из другого процесса",
+                    "Через HTTP",
+                ]
+            finally:
+                await server.close()
+
+        asyncio.run(check())
+
+
+if __name__ == "__main__":
+    test_legacy_database_is_served_in_place_and_rebalanced()
+    test_writes_to_other_shards_do_not_wait_for_lock()
+    test_change_watcher_and_api_work_over_shards()
+    print("Шардированная база работает корректно")
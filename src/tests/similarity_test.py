@@ -0,0 +1,251 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+)
+sys.path.insert(0, APP_DIR)
+
+from PyQt6.QtCore import QEventLoop, QTimer  # noqa: E402
+from PyQt6.QtWidgets import QApplication, QInputDialog, QMessageBox  # noqa: E402
+
+import database  # noqa: E402
+from database import Database  # noqa: E402
+from similarity import BANDS, band_hashes, jaccard, normalize, trigrams  # noqa: E402
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+WORDS = (
+    "купить позвонить написать отправить проверить подготовить прочитать оплатить"
+    " отчёт письмо молоко встреча проект договор счёт презентация задача план"
+    " маме врачу клиенту команде завтра срочно вечером понедельник квартал"
+).split()
+
+
+def make_db(path):
+    db = Database(path)
+    with db._get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (login, email, password_hash) VALUES (?, ?, '-')",
+            (("u", "u@example.com"), ("v", "v@example.com")),
+        )
+    return db
+
+
+def titles(db, rows):
+    return [row[1] for row in rows]
+
+
+def count_reindex(monkeypatch):
+    calls = []
+    reindex = Database._reindex_similarity
+
+    def counted(self, user_id):
+        calls.append(user_id)
+        reindex(self, user_id)
+
+    monkeypatch.setattr(Database, "_reindex_similarity", counted)
+    return calls
+
+
+def test_signature_does_not_depend_on_batch():
+    texts = [
+        normalize("Купить молоко"),
+        normalize("КУПИТЬ, молоко!"),
+        normalize("Отчёт", "за квартал"),
+    ]
+    bands = band_hashes(texts)
+    assert bands.shape == (3, BANDS)
+    assert (bands[0] == bands[1]).all() and not (bands[0] == bands[2]).any()
+    # Пачка из одной задачи и пачка из многих дают одни и те же хеши
+    for i, text in enumerate(texts):
+        assert (band_hashes([text])[0] == bands[i]).all()
+    assert not band_hashes([normalize("!!!")]).any()
+    assert normalize("Отчёт", "за  квартал") == " отчет за квартал "
+    milk = trigrams(normalize("Купить молоко"))
+    assert jaccard(milk, trigrams(normalize("купить молоко и хлеб"))) == 0.65
+
+
+def test_similar_tasks_follow_changes_without_reindex(monkeypatch):
+    with tempfile.TemporaryDirectory() as tmp, make_db(os.path.join(tmp, "t.sqlite")) as db:
+        milk = db.add_task(1, "Купить молоко", "")
+        call = db.add_task(1, "Позвонить маме", "вечером")
+        db.add_task(2, "Купить молоко", "")
+        reindex = count_reindex(monkeypatch)
+
+        found = db.similar_tasks(1, "купить  молоко!", "")
+        assert [(row[0], row[4]) for row in found] == [(milk, 1.0)]
+        assert db.similar_tasks(1, "Купить хлеб", "") == []
+        assert reindex == [1]
+
+        # Правки, удаления, импорт и задачи из другого соединения попадают в
+        # индекс по журналу изменений, без переиндексации всех задач
+        longer = db.add_task(1, "Купить молоко и хлеб", "")
+        db.update_tasks({call: {"title": "Купить молоко", "description": ""}})
+        db.toggle_task_status(milk)
+        db.import_tasks(1, [("Оплатить счёт", "", 0, None)], defer_indexes=True)
+        with Database(db.db_path) as other:
+            bill = other.add_task(1, "Оплатить счёт за свет", "")
+        assert titles(db, db.similar_tasks(1, "Купить молоко", "")) == [
+            "Купить молоко",
+            "Купить молоко",
+            "Купить молоко и хлеб",
+        ]
+        assert [row[0] for row in db.similar_tasks(1, "Купить молоко", "", is_done=0)] == [
+            call,
+            longer,
+        ]
+        assert db.similar_tasks(1, "Оплатить счёт за свет", "")[0][0] == bill
+        db._get_connection().execute("DELETE FROM tasks WHERE id = ?", (longer,))
+        assert longer not in [row[0] for row in db.similar_tasks(1, "Купить молоко", "")]
+        assert reindex == [1]
+
+        # Журнал обрезан дальше версии индекса - задачи индексируются заново
+        db.add_task(1, "Купить молоко", "")
+        db.trim_changes(keep=0)
+        assert len(db.similar_tasks(1, "Купить молоко", "")) == 3
+        assert reindex == [1, 1]
+
+
+def test_duplicates_are_merged_into_earliest_task():
+    slides = "Подготовить презентацию для клиента по итогам квартала"
+    with tempfile.TemporaryDirectory() as tmp, make_db(os.path.join(tmp, "t.sqlite")) as db:
+        first = db.add_task(1, "Купить молоко", "")
+        db.add_task(1, "купить  молоко!", "", "2025-03-01", 2)
+        done = db.add_task(1, "Купить молоко", "")
+        db.toggle_task_status(done)
+        db.add_task(1, "Купить молоко и хлеб", "")  # похожа, но не дубликат
+        report = db.add_task(1, slides, "")
+        db.add_task(1, slides.lower(), "срочно", "2025-01-01")
+        other = db.add_task(2, slides, "")
+
+        groups = db.duplicate_groups(1)
+        assert groups == [[first, first + 1], [report, report + 1]]
+        # Чужая задача в группе не удаляется
+        assert db.merge_tasks(1, [*groups, [report, other]]) == 2
+        assert db.get_tasks(1) == [
+            (first, "Купить молоко", "", 0),
+            (done, "Купить молоко", "", 1),
+            (done + 1, "Купить молоко и хлеб", "", 0),
+            (report, slides, "срочно", 0),
+        ]
+        schedule = "SELECT due_date, priority FROM tasks WHERE id = ?"
+        conn = db._get_connection()
+        assert conn.execute(schedule, (first,)).fetchone() == ("2025-03-01", 2)
+        assert conn.execute(schedule, (report,)).fetchone() == ("2025-01-01", 0)
+        assert db.get_task_owner(other) == 2
+        assert db.duplicate_groups(1) == []
+        # Выполненная задача объединяется с невыполненной - та остаётся невыполненной
+        assert db.duplicate_groups(1, is_done=None) == [[first, done]]
+        db.merge_tasks(1, [[done, first]])
+        assert db.get_tasks(1)[0] == (done, "Купить молоко", "", 0)
+        # Корзины, где все задачи выполнены, пропускаются
+        db.toggle_task_status(db.add_task(1, "Оплатить счёт", ""))
+        assert db.duplicate_groups(1) == []
+
+
+def test_lookup_reads_bounded_candidates_by_index():
+    count = 200_000
+    rng = random.Random(1)
+    with tempfile.TemporaryDirectory() as tmp, make_db(os.path.join(tmp, "t.sqlite")) as db:
+        db.import_tasks(
+            1,
+            (
+                (" ".join(rng.choices(WORDS, k=rng.randint(2, 4))).capitalize(), "", 0, None)
+                for _ in range(count)
+            ),
+            defer_indexes=True,
+        )
+        db.similar_tasks(1, "Купить молоко", "")  # индексация и прогрев кэша страниц
+        conn = db._get_connection()
+        statements = []
+        conn.set_trace_callback(statements.append)
+        db.similar_tasks(1, "Купить молоко", "")
+        conn.set_trace_callback(None)
+        for sql in statements:
+            if "task_minhash " in sql and sql.startswith("SELECT"):
+                plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + sql))
+                assert "USING PRIMARY KEY" in plan and "TEMP B-TREE" not in plan, plan
+
+        timings = []
+        for _ in range(50):
+            title = " ".join(rng.choices(WORDS, k=rng.randint(2, 4)))
+            start = time.perf_counter()
+            # Новая задача каждый раз: поиск догоняет журнал изменений
+            found = db.similar_tasks(1, title, "")
+            timings.append(time.perf_counter() - start)
+            assert len(found) == database.SIMILAR_LIMIT
+            db.add_task(1, title, "")
+        timings.sort()
+        p95 = timings[int(len(timings) * 0.95)]
+        assert p95 < 0.020, f"p95 поиска похожих {p95 * 1000:.1f} мс"
+
+
+def test_window_warns_about_duplicate_and_merges(monkeypatch):
+    import main
+
+    answers = {"Название задачи:": "купить молоко", "Описание задачи (необязательно):": ""}
+
+    def get_text(parent, title, label):
+        return answers.get(label, ""), label in answers
+
+    monkeypatch.setattr(QInputDialog, "getText", staticmethod(get_text))
+    monkeypatch.setattr(QInputDialog, "getItem", staticmethod(lambda *args: ("", False)))
+    monkeypatch.setattr(QMessageBox, "information", staticmethod(lambda *args: None))
+    questions = []
+    replies = []
+
+    def question(parent, title, text):
+        questions.append(text)
+        return replies.pop(0)
+
+    monkeypatch.setattr(QMessageBox, "question", staticmethod(question))
+    cwd = os.getcwd()
+    os.chdir(APP_DIR)  # окна загружают .ui по относительным путям
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = make_db(os.path.join(tmp, "t.sqlite"))
+            first = db.add_task(1, "Купить молоко", "")
+            window = main.MainWindow(db)
+            window.on_login_success(1)
+            tasks = window.tasks_window
+
+            # Пользователь отказался добавлять похожую задачу
+            replies.append(QMessageBox.StandardButton.No)
+            tasks.add_task_dialog()
+            assert "• Купить молоко" in questions[-1]
+            assert len(db.get_tasks(1)) == 1
+
+            replies.append(QMessageBox.StandardButton.Yes)
+            tasks.add_task_dialog()
+            assert len(db.get_tasks(1)) == 2
+
+            # Поиск дубликатов идёт в фоновом потоке, объединение - после подтверждения
+            replies.append(QMessageBox.StandardButton.Yes)
+            loop = QEventLoop()
+            tasks.pushButtonMergeDuplicates.click()
+            assert not tasks.pushButtonMergeDuplicates.isEnabled()
+            tasks.duplicates_worker.signals.finished.connect(
+                lambda _: QTimer.singleShot(0, loop.quit)
+            )
+            QTimer.singleShot(5000, loop.quit)
+            loop.exec()
+            assert "лишних будет удалено: 1" in questions[-1]
+            assert db.get_tasks(1) == [(first, "Купить молоко", "", 0)]
+            assert tasks.model.rowCount() == 1
+            assert tasks.pushButtonMergeDuplicates.isEnabled()
+            window.close_db()
+    finally:
+        os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    test_signature_does_not_depend_on_batch()
+    test_duplicates_are_merged_into_earliest_task()
+    test_lookup_reads_bounded_candidates_by_index()
+    print("Поиск похожих задач работает корректно")
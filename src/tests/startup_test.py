@@ -0,0 +1,88 @@
+import os
+import shutil
+import sys
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+)
+sys.path.insert(0, APP_DIR)
+
+from PyQt6 import uic  # noqa: E402
+from PyQt6.QtCore import QEventLoop, QTimer  # noqa: E402
+from PyQt6.QtWidgets import QApplication, QWidget  # noqa: E402
+
+import ui_loader  # noqa: E402
+from database import Database  # noqa: E402
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+def child_names(widget):
+    return sorted(child.objectName() for child in widget.findChildren(QWidget) if child.objectName())
+
+
+def test_precompiled_ui_matches_load_ui_and_is_cached_by_mtime():
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("login_window", "register_window", "tasks_window"):
+            compiled = ui_loader.load_ui(name, QWidget(), cache_dir=tmp)
+            parsed = uic.loadUi(os.path.join(ui_loader.UI_DIR, name + ".ui"), QWidget())
+            assert child_names(compiled) == child_names(parsed)
+            for child in child_names(parsed):
+                if hasattr(parsed, child):  # служебные виджеты Qt атрибутами не становятся
+                    assert getattr(compiled, child).objectName() == child
+
+        ui_path = os.path.join(tmp, "welcome_window.ui")
+        shutil.copy(os.path.join(ui_loader.UI_DIR, "welcome_window.ui"), ui_path)
+        py_path = ui_loader.compile_ui(ui_path, tmp)
+        compiled_at = os.stat(py_path).st_mtime_ns
+        # .ui не менялся - модуль не перекомпилируется
+        os.utime(py_path, ns=(compiled_at - 10**9, compiled_at - 10**9))
+        os.utime(ui_path, ns=(compiled_at - 2 * 10**9, compiled_at - 2 * 10**9))
+        assert ui_loader.compile_ui(ui_path, tmp) == py_path
+        assert os.stat(py_path).st_mtime_ns == compiled_at - 10**9
+        # .ui новее модуля - перекомпиляция
+        os.utime(ui_path, ns=(compiled_at, compiled_at))
+        ui_loader.compile_ui(ui_path, tmp)
+        assert os.stat(py_path).st_mtime_ns > compiled_at - 10**9
+
+
+def test_main_window_shows_welcome_page_first_and_builds_pages_lazily():
+    import main
+
+    with tempfile.TemporaryDirectory() as tmp:
+        window = main.MainWindow()
+        assert window.task_cache is None and window._db is None
+        assert window.stackedWidget.count() == 1
+
+        frames = []
+        window.first_frame.connect(lambda: frames.append(True))
+        window.show()
+        loop = QEventLoop()
+        window.first_frame.connect(loop.quit)
+        QTimer.singleShot(5000, loop.quit)
+        loop.exec()
+        assert frames == [True]
+        assert window._db is None  # база открывается только после первого кадра
+
+        window.open_db(Database(os.path.join(tmp, "t.sqlite")))
+        window.welcome_window.loginButton.click()
+        assert window.stackedWidget.currentWidget() is window.login_window
+        window.login_window.go_back()
+        assert window.stackedWidget.currentWidget() is window.welcome_window
+        login_window = window.login_window
+        window.welcome_window.loginButton.click()
+        window.welcome_window.registerButton.click()
+        assert window.login_window is login_window
+        assert window.stackedWidget.currentWidget() is window.register_window
+        assert window.stackedWidget.count() == 3
+        window.hide()
+        window.close_db()
+
+
+if __name__ == "__main__":
+    test_precompiled_ui_matches_load_ui_and_is_cached_by_mtime()
+    test_main_window_shows_welcome_page_first_and_builds_pages_lazily()
+    print("Окна создаются лениво, .ui загружаются из скомпилированных модулей")
@@ -0,0 +1,109 @@
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from database import Database  # noqa: E402
+from task_cache import TaskCache  # noqa: E402
+from task_query import TaskQuery  # noqa: E402
+
+
+def make_db(tmp, users=3, tasks=20):
+    db = Database(os.path.join(tmp, "t.sqlite"))
+    conn = db._get_connection()
+    with conn:
+        for user_id in range(1, users + 1):
+            conn.execute(
+                "INSERT INTO users (login, email, password_hash) VALUES (?, ?, '-')",
+                (f"u{user_id}", f"u{user_id}@example.com"),
+            )
+    for user_id in range(1, users + 1):
+        db.add_tasks(user_id, ((f"Задача {i}", "") for i in range(tasks)))
+    return db
+
+
+def test_repeated_views_do_no_sql():
+    with tempfile.TemporaryDirectory() as tmp, make_db(tmp) as db:
+        cache = TaskCache(db)
+        query = TaskQuery(1).done(False).order_by("title").limit(10)
+        first = cache.query_tasks(query)
+        all_tasks = cache.get_tasks(1)
+
+        statements = []
+        db._get_connection().set_trace_callback(statements.append)
+        assert cache.query_tasks(query) == first
+        assert cache.get_tasks(1) == all_tasks
+        assert statements == []
+        assert (cache.hits, cache.misses) == (2, 2)
+
+        # Правка названия переносится в кэш без повторного чтения
+        cache.update_task_title(all_tasks[0][0], "Новое название")
+        statements.clear()
+        assert cache.get_tasks(1)[0][1] == "Новое название"
+        assert statements == []
+
+
+def test_cache_never_serves_stale_rows():
+    with tempfile.TemporaryDirectory() as tmp, make_db(tmp) as db:
+        cache = TaskCache(db)
+        rng = random.Random(1)
+        queries = [
+            TaskQuery(user_id).done(False).limit(5)
+            for user_id in (1, 2)
+        ] + [
+            TaskQuery(1).order_by("title", descending=True).limit(8),
+            TaskQuery(2).order_by("is_done").after(3),
+            TaskQuery(1).matching("задача 1"),
+            TaskQuery(1).limit(5),
+        ]
+        for step in range(300):
+            action = rng.randrange(4)
+            user_id = rng.choice((1, 2))
+            if action == 0:
+                task_id = rng.choice(db.get_tasks(user_id))[0]
+                cache.update_task_status(task_id, rng.randint(0, 1))
+            elif action == 1:
+                task_id = rng.choice(db.get_tasks(user_id))[0]
+                cache.update_tasks({task_id: {"title": f"Задача {rng.randrange(30)}"}})
+            elif action == 2:
+                cache.add_task(user_id, f"Задача {step}", "")
+            for query in queries:
+                assert cache.query_tasks(query) == db.query_tasks(query), (step, query.compile())
+            assert cache.get_tasks(user_id) == db.get_tasks(user_id), step
+        assert cache.hits > 0
+
+
+def test_least_recently_used_users_are_evicted():
+    with tempfile.TemporaryDirectory() as tmp, make_db(tmp) as db:
+        probe = TaskCache(db)
+        probe.get_tasks(1)
+        # Бюджет на два пользователя
+        cache = TaskCache(db, max_bytes=probe.size * 2 + probe.size // 2)
+
+        cache.get_tasks(1)
+        cache.get_tasks(2)
+        cache.get_tasks(1)  # пользователь 1 использован позже пользователя 2
+        cache.get_tasks(3)
+        assert cache.evictions == 1
+        assert cache.size <= cache.max_bytes
+
+        misses = cache.misses
+        cache.get_tasks(1)
+        cache.get_tasks(3)
+        assert cache.misses == misses
+        cache.get_tasks(2)
+        assert cache.misses == misses + 1
+
+
+if __name__ == "__main__":
+    test_repeated_views_do_no_sql()
+    test_cache_never_serves_stale_rows()
+    test_least_recently_used_users_are_evicted()
+    print("Кэш задач работает корректно")
@@ -0,0 +1,91 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+import task_io  # noqa: E402
+from database import Database  # noqa: E402
+
+TASKS = [
+    ("Купить молоко", "", 0, "2024-01-01 10:00:00"),
+    ("Отчёт, квартал", 'с "кавычками"\nи переносом', 1, "2024-02-01 12:30:00"),
+    ("Позвонить маме", "", 0, "2024-03-01 08:15:00"),
+]
+
+
+def make_db(tmp):
+    db = Database(os.path.join(tmp, "t.sqlite"))
+    conn = db._get_connection()
+    with conn:
+        conn.execute(
+            "INSERT INTO users (login, email, password_hash) VALUES ('u', 'u@example.com', '-')"
+        )
+        conn.execute(
+            "INSERT INTO users (login, email, password_hash) VALUES ('v', 'v@example.com', '-')"
+        )
+    return db
+
+
+def schema(db):
+    return db._get_connection().execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE tbl_name = 'tasks' ORDER BY name"
+    ).fetchall()
+
+
+def test_round_trip_through_csv_and_jsonl():
+    with tempfile.TemporaryDirectory() as tmp, make_db(tmp) as db:
+        assert db.import_tasks(1, TASKS, batch_size=2) == 3
+        for fmt in task_io.FORMATS:
+            path = os.path.join(tmp, f"tasks.{fmt}")
+            assert task_io.export_file(db, 1, path) == 3
+            assert task_io.import_file(db, 2, path) == 3
+            assert list(db.export_tasks(2)) == TASKS
+            conn = db._get_connection()
+            with conn:
+                conn.execute("DELETE FROM tasks WHERE user_id = 2")
+
+        # Через командную строку, с отложенными индексами
+        path = os.path.join(tmp, "tasks.jsonl")
+        db_path = db.db_path
+        assert (
+            task_io.main(["import", path, "--login", "v", "--db", db_path, "--defer-indexes"])
+            == 0
+        )
+        assert list(db.export_tasks(2)) == TASKS
+        assert [row[0] for row in db.search_tasks(2, "отчет")] != []
+
+
+def test_deferred_import_restores_indexes_or_rolls_back():
+    with tempfile.TemporaryDirectory() as tmp, make_db(tmp) as db:
+        before = schema(db)
+        assert db.import_tasks(1, iter(TASKS * 100), batch_size=7, defer_indexes=True) == 300
+        assert schema(db) == before
+        assert len(db.search_tasks(1, "купить", limit=1000)) == 100
+        # Триггеры снова работают для обычных вставок
+        db.add_task(1, "Купить хлеб", "")
+        assert len(db.search_tasks(1, "купить", limit=1000)) == 101
+
+        def broken():
+            yield from TASKS
+            raise ValueError("битая строка")
+
+        try:
+            db.import_tasks(1, broken(), batch_size=2, defer_indexes=True)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("ошибка чтения должна прервать импорт")
+        assert schema(db) == before
+        assert db._get_connection().execute("SELECT COUNT(*) FROM tasks").fetchone()[0] == 301
+
+
+if __name__ == "__main__":
+    test_round_trip_through_csv_and_jsonl()
+    test_deferred_import_restores_indexes_or_rolls_back()
+    print("Импорт и экспорт задач работают корректно")
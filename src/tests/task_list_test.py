@@ -0,0 +1,87 @@
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from task_list import Task, TaskList  # noqa: E402
+
+
+def make_rows(count, first_id=1):
+    return [
+        (task_id, f"Задача {task_id % 100}", "", task_id % 3 == 0)
+        for task_id in range(first_id, first_id + count)
+    ]
+
+
+def test_task_list_matches_list_of_rows_and_finds_rows_by_id():
+    rng = random.Random(1)
+    rows = make_rows(100)
+    tasks = TaskList(rows)
+    # Задачи по возрастанию id: двоичный поиск, в том числе после удаления
+    del rows[10]
+    del tasks[10]
+    tasks.append(Task(500, "Последняя"))
+    rows.append((500, "Последняя", "", 0))
+    assert [tasks.row_of(row[0]) for row in rows] == list(range(len(rows)))
+    assert tasks.row_of(11) is None and tasks._rows_by_id is None
+
+    next_id = 1000
+    for step in range(500):
+        action = rng.random()
+        if action < 0.3 and rows:
+            row = rng.randrange(len(rows))
+            del rows[row]
+            del tasks[row]
+        elif action < 0.6:
+            row = rng.randint(0, len(rows))
+            page = make_rows(rng.randint(1, 5), next_id)
+            next_id += len(page)
+            rows[row:row] = page
+            tasks.insert(row, page)
+        elif rows:
+            row = rng.randrange(len(rows))
+            task_id, title, description, is_done = rows[row]
+            rows[row] = (task_id, f"Правка {step}", description, not is_done)
+            tasks.update(row, title=f"Правка {step}", is_done=not is_done)
+        if step % 7 == 0 and rows:
+            task_id = rng.choice(rows)[0]
+            assert tasks.row_of(task_id) == [row[0] for row in rows].index(task_id)
+
+    assert list(tasks) == rows
+    assert [tasks.row_of(row[0]) for row in rows] == list(range(len(rows)))
+    assert tasks.row_of(-1) is None
+    assert tasks[0] == Task(*rows[0])
+    task_id, title, _, _ = tasks[0]
+    assert (task_id, title) == rows[0][:2]
+
+
+def test_task_list_uses_less_memory_than_tuples():
+    count = 20_000
+
+    def allocated(build):
+        tracemalloc.start()
+        value = build()
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del value
+        return size
+
+    # Строки, как их возвращает sqlite3: у каждой задачи свои объекты str
+    tuples = allocated(lambda: [(i, f"Задача {i % 100}", "", i % 2) for i in range(count)])
+    columns = allocated(
+        lambda: TaskList((i, f"Задача {i % 100}", "", i % 2) for i in range(count))
+    )
+    assert columns < tuples / 2, (columns, tuples)
+
+
+if __name__ == "__main__":
+    test_task_list_matches_list_of_rows_and_finds_rows_by_id()
+    test_task_list_uses_less_memory_than_tuples()
+    print("Колоночный список задач работает корректно")
@@ -0,0 +1,233 @@
+import os
+import sys
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from PyQt6.QtCore import Qt  # noqa: E402
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+from database import Database  # noqa: E402
+from task_model import (  # noqa: E402
+    PAGE_SIZE,
+    TaskTableModel,
+    STATUS_COLUMN,
+    TITLE_COLUMN,
+)
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+def make_model(db):
+    conn = db._get_connection()
+    with conn:
+        conn.execute(
+            "INSERT INTO users (login, email, password_hash) VALUES ('u', 'u@example.com', '-')"
+        )
+    for i in range(5):
+        db.add_task(1, f"Задача {i}", f"Описание {i}")
+    model = TaskTableModel(db)
+    model.set_tasks(db.get_tasks(1))
+    return model
+
+
+def test_toggle_and_edit_update_only_one_row():
+    with tempfile.TemporaryDirectory() as tmp, Database(
+        os.path.join(tmp, "t.sqlite")
+    ) as db:
+        model = make_model(db)
+        changed = []
+        model.dataChanged.connect(
+            lambda top, bottom, roles: changed.append((top.row(), bottom.row()))
+        )
+        resets = []
+        model.modelReset.connect(lambda: resets.append(True))
+
+        model.toggle_status(2)
+        assert changed == [(2, 2)]
+        index = model.index(2, TITLE_COLUMN)
+        assert model.data(index, Qt.ItemDataRole.FontRole).strikeOut()
+        assert (
+            model.data(model.index(2, STATUS_COLUMN), Qt.ItemDataRole.CheckStateRole)
+            == Qt.CheckState.Checked
+        )
+
+        assert model.setData(index, "Новое название")
+        assert changed == [(2, 2), (2, 2)]
+        assert resets == []
+
+        task_id, title, _, is_done = db.get_tasks(1)[2]
+        assert (title, is_done) == ("Новое название", 1)
+
+
+def test_add_task_inserts_single_row_and_hide_completed_removes_rows():
+    with tempfile.TemporaryDirectory() as tmp, Database(
+        os.path.join(tmp, "t.sqlite")
+    ) as db:
+        model = make_model(db)
+        model.load_user(1)
+
+        inserted = []
+        model.rowsInserted.connect(lambda parent, first, last: inserted.append(first))
+        task_id = model.add_task(1, "Ещё задача", "")
+        assert inserted == [5]
+        assert model.task_id(5) == task_id
+
+        model.toggle_status(0)
+        model.set_hide_completed(True)
+        assert model.rowCount() == 5
+        # Первая видимая строка - вторая задача
+        assert model.task_id(0) == 2
+
+        # Отметка задачи выполненной сразу убирает только её строку
+        removed = []
+        model.rowsRemoved.connect(lambda parent, first, last: removed.append(first))
+        model.toggle_status(1)
+        assert removed == [1]
+        assert model.rowCount() == 4
+        # Строки и id задач после удаления соответствуют друг другу
+        for row in range(model.rowCount()):
+            assert model.row_of(model.task_id(row)) == row
+        assert model.row_of(3) is None
+
+
+def test_hide_completed_filters_in_sql_before_paging():
+    with tempfile.TemporaryDirectory() as tmp, Database(
+        os.path.join(tmp, "t.sqlite")
+    ) as db:
+        conn = db._get_connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO users (login, email, password_hash) VALUES ('u', 'u@example.com', '-')"
+            )
+            conn.executemany(
+                "INSERT INTO tasks (user_id, title, description, is_done) VALUES (1, ?, '', ?)",
+                ((f"Задача {i}", int(i < 995)) for i in range(1000)),
+            )
+        model = TaskTableModel(db)
+        model.set_hide_completed(True)
+        model.load_user(1)
+        # Первая же страница - пять невыполненных задач, хотя перед ними 995 выполненных
+        assert [model.tasks[row].title for row in range(model.rowCount())] == [
+            f"Задача {i}" for i in range(995, 1000)
+        ]
+        assert not model.canFetchMore()
+
+
+def test_sort_by_column_reads_pages_in_sql_order():
+    with tempfile.TemporaryDirectory() as tmp, Database(
+        os.path.join(tmp, "t.sqlite")
+    ) as db:
+        conn = db._get_connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO users (login, email, password_hash) VALUES ('u', 'u@example.com', '-')"
+            )
+        db.add_tasks(1, ((f"Задача {i % 7}", "") for i in range(PAGE_SIZE + 50)))
+        model = TaskTableModel(db)
+        model.load_user(1)
+        model.sort(TITLE_COLUMN, Qt.SortOrder.DescendingOrder)
+        while model.canFetchMore():
+            model.fetchMore()
+        rows = [(title, task_id) for task_id, title, _, _ in model.tasks]
+        assert rows == sorted(rows, reverse=True)
+        assert len(rows) == PAGE_SIZE + 50
+
+
+def test_fetch_more_loads_pages_on_demand():
+    with tempfile.TemporaryDirectory() as tmp, Database(
+        os.path.join(tmp, "t.sqlite")
+    ) as db:
+        conn = db._get_connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO users (login, email, password_hash) VALUES ('u', 'u@example.com', '-')"
+            )
+            conn.executemany(
+                "INSERT INTO tasks (user_id, title, description) VALUES (1, ?, '')",
+                ((f"Задача {i}",) for i in range(PAGE_SIZE * 2 + 10)),
+            )
+        model = TaskTableModel(db)
+        model.load_user(1)
+        assert model.rowCount() == PAGE_SIZE
+        assert model.canFetchMore()
+
+        model.fetchMore()
+        model.fetchMore()
+        assert model.rowCount() == PAGE_SIZE * 2 + 10
+        assert not model.canFetchMore()
+        ids = [model.task_id(row) for row in range(model.rowCount())]
+        assert ids == sorted(set(ids))
+
+
+def test_add_task_before_all_pages_loaded_is_shown_once():
+    with tempfile.TemporaryDirectory() as tmp, Database(
+        os.path.join(tmp, "t.sqlite")
+    ) as db:
+        conn = db._get_connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO users (login, email, password_hash) VALUES ('u', 'u@example.com', '-')"
+            )
+        db.add_tasks(1, ((f"Задача {i}", "") for i in range(PAGE_SIZE + 10)))
+        model = TaskTableModel(db)
+        model.load_user(1)
+        assert model.canFetchMore()
+
+        task_id = model.add_task(1, "Новая задача", "")
+        assert model.rowCount() == PAGE_SIZE + 1
+        assert model.task_id(PAGE_SIZE) == task_id
+
+        model.fetchMore()
+        assert not model.canFetchMore()
+        ids = [model.task_id(row) for row in range(model.rowCount())]
+        assert len(ids) == PAGE_SIZE + 11
+        assert ids == sorted(set(ids)) and ids[-1] == task_id
+
+
+def test_search_mode_pages_results_and_reruns_after_add():
+    with tempfile.TemporaryDirectory() as tmp, Database(
+        os.path.join(tmp, "t.sqlite")
+    ) as db:
+        conn = db._get_connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO users (login, email, password_hash) VALUES ('u', 'u@example.com', '-')"
+            )
+        db.add_tasks(1, ((f"Отчёт {i}", "") for i in range(PAGE_SIZE + 5)))
+        db.add_task(1, "Купить молоко", "")
+        model = TaskTableModel(db)
+        model.load_search(1, "отчет")
+        assert model.rowCount() == PAGE_SIZE
+        assert model.canFetchMore()
+        model.fetchMore()
+        assert model.rowCount() == PAGE_SIZE + 5
+        assert not model.canFetchMore()
+
+        # Задача, не подходящая под поиск, в результатах не появляется
+        other_id = model.add_task(1, "Позвонить маме", "")
+        while model.canFetchMore():
+            model.fetchMore()
+        assert model.rowCount() == PAGE_SIZE + 5
+        assert other_id not in [model.task_id(row) for row in range(model.rowCount())]
+        # А подходящая встаёт на своё место - новая задача выше остальных
+        task_id = model.add_task(1, "Отчёт за год", "")
+        assert model.task_id(0) == task_id
+
+
+if __name__ == "__main__":
+    test_toggle_and_edit_update_only_one_row()
+    test_add_task_inserts_single_row_and_hide_completed_removes_rows()
+    test_hide_completed_filters_in_sql_before_paging()
+    test_sort_by_column_reads_pages_in_sql_order()
+    test_fetch_more_loads_pages_on_demand()
+    test_add_task_before_all_pages_loaded_is_shown_once()
+    test_search_mode_pages_results_and_reruns_after_add()
+    print("Модель задач работает корректно")
@@ -0,0 +1,106 @@
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+sys.path.insert(
+    0,
+    os.path.join(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+    ),
+)
+
+from database import Database  # noqa: E402
+from task_query import SORT_FIELDS, TaskQuery  # noqa: E402
+
+
+def make_db(tmp):
+    db = Database(os.path.join(tmp, "t.sqlite"))
+    conn = db._get_connection()
+    with conn:
+        conn.execute(
+            "INSERT INTO users (login, email, password_hash) VALUES ('u', 'u@example.com', '-')"
+        )
+        conn.execute(
+            "INSERT INTO users (login, email, password_hash) VALUES ('v', 'v@example.com', '-')"
+        )
+        conn.executemany(
+            "INSERT INTO tasks (user_id, title, description, is_done, created_at)"
+            " VALUES (?, ?, '', ?, ?)",
+            (
+                (1, f"Задача {i % 5}", i % 3 == 0, f"2024-01-{i % 28 + 1:02d} 12:00:00")
+                for i in range(60)
+            ),
+        )
+        conn.execute(
+            "INSERT INTO tasks (user_id, title, description) VALUES (2, 'Чужая', '')"
+        )
+    return db
+
+
+def test_filters_and_sorting_match_python_reference():
+    with tempfile.TemporaryDirectory() as tmp, make_db(tmp) as db:
+        rows = db._get_connection().execute(
+            "SELECT id, title, description, is_done, created_at FROM tasks WHERE user_id = 1"
+        ).fetchall()
+
+        query = (
+            TaskQuery(1)
+            .done(False)
+            .created_between(datetime(2024, 1, 5), "2024-01-20 00:00:00")
+            .order_by("title", descending=True)
+        )
+        expected = sorted(
+            (
+                row
+                for row in rows
+                if not row[3] and "2024-01-05" <= row[4] < "2024-01-20"
+            ),
+            key=lambda row: (row[1], row[0]),
+            reverse=True,
+        )
+        assert db.query_tasks(query) == [row[:4] for row in expected]
+        assert db.query_tasks(query.limit(3).offset(2)) == [
+            row[:4] for row in expected[2:5]
+        ]
+
+        # Текстовый фильтр идёт через индекс tasks_fts
+        assert {row[1] for row in db.query_tasks(TaskQuery(1).matching("задача 3"))} == {
+            "Задача 3"
+        }
+        assert db.query_tasks(TaskQuery(2)) == [(61, "Чужая", "", 0)]
+
+        try:
+            TaskQuery(1).order_by("description")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("сортировка по полю без индекса должна быть запрещена")
+
+
+def test_keyset_pages_cover_whole_order_and_use_index():
+    with tempfile.TemporaryDirectory() as tmp, make_db(tmp) as db:
+        conn = db._get_connection()
+        for field in SORT_FIELDS:
+            for descending in (False, True):
+                base = TaskQuery(1).order_by(field, descending)
+                pages, after = [], None
+                while True:
+                    page = db.query_tasks(base.after(after).limit(7))
+                    if not page:
+                        break
+                    pages.extend(page)
+                    after = page[-1][0]
+                assert pages == db.query_tasks(base), (field, descending)
+
+                sql, params = base.after(10).limit(7).compile()
+                plan = " ".join(
+                    row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql, params)
+                )
+                assert "USING INDEX" in plan and "TEMP B-TREE" not in plan, plan
+
+
+if __name__ == "__main__":
+    test_filters_and_sorting_match_python_reference()
+    test_keyset_pages_cover_whole_order_and_use_index()
+    print("Запросы списка задач работают корректно")
@@ -0,0 +1,206 @@
+import os
+import random
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+)
+sys.path.insert(0, APP_DIR)
+
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+import task_stats  # noqa: E402
+from database import Database  # noqa: E402
+from sharding import ShardedDatabase, rebalance  # noqa: E402
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+def make_db(path, users=2):
+    db = Database(path)
+    with db._get_connection() as conn:
+        conn.executemany(
+            "INSERT INTO users (login, email, password_hash) VALUES (?, ?, '-')",
+            ((f"user{i}", f"user{i}@example.com") for i in range(1, users + 1)),
+        )
+    return db
+
+
+def recount(db, user_id):
+    """(всего, невыполненных, выполненных) полным подсчётом по tasks"""
+    total, done = db._get_connection().execute(
+        "SELECT COUNT(*), COALESCE(SUM(is_done), 0) FROM tasks WHERE user_id = ?", (user_id,)
+    ).fetchone()
+    return total, total - done, done
+
+
+def assert_counters(db, *user_ids):
+    for user_id in user_ids:
+        assert db.get_stats(user_id) == recount(db, user_id), user_id
+    assert db.check_stats() == []
+
+
+def test_counters_follow_every_write_path():
+    rng = random.Random(5)
+    with tempfile.TemporaryDirectory() as tmp, make_db(os.path.join(tmp, "t.sqlite")) as db:
+        assert db.get_stats(1) == (0, 0, 0)
+        first = db.add_task(1, "Купить молоко", "")
+        db.add_task(1, "Купить молоко", "")
+        db.add_tasks(1, ((f"Задача {i}", "") for i in range(20)))
+        db.import_tasks(1, ((f"Импорт {i}", "", i % 2, None) for i in range(10)))
+        db.import_tasks(
+            2, ((f"Импорт {i}", "", i % 3 == 0, None) for i in range(30)), defer_indexes=True
+        )
+        assert db.get_stats(1) == (32, 27, 5)
+        assert db.get_stats(2) == (30, 20, 10)
+        assert_counters(db, 1, 2)
+
+        # Правки статуса: повторная отметка того же статуса счётчики не меняет
+        ids = [task[0] for task in db.get_tasks(1)]
+        for task_id in rng.sample(ids, 10):
+            db.toggle_task_status(task_id)
+        db.update_tasks({task_id: {"is_done": 1} for task_id in ids[:5]})
+        db.update_task_status(ids[0], 1)
+        db.update_tasks({ids[1]: {"title": "Без смены статуса"}})
+        assert_counters(db, 1, 2)
+
+        # Объединение дубликатов, передача задачи и удаление в обход Database
+        assert db.merge_tasks(1, [[first, first + 1]]) == 1
+        conn = db._get_connection()
+        with conn:
+            conn.execute("UPDATE tasks SET user_id = 2, is_done = 1 WHERE id = ?", (ids[2],))
+            conn.execute("DELETE FROM tasks WHERE id IN (?, ?)", (ids[3], ids[4]))
+        assert_counters(db, 1, 2)
+
+        # Архив не входит в счётчики
+        with conn:
+            conn.execute("UPDATE tasks SET is_done = 1 WHERE user_id = 2")
+            conn.execute(
+                "UPDATE tasks SET done_at = datetime('now', '-40 days') WHERE user_id = 2"
+            )
+        assert db.archive_tasks(30) == 31
+        assert db.get_stats(2) == (0, 0, 0)
+        assert_counters(db, 1, 2)
+
+
+def test_stats_read_one_row_by_key():
+    with tempfile.TemporaryDirectory() as tmp, make_db(os.path.join(tmp, "t.sqlite")) as db:
+        db.import_tasks(1, (("Задача", "", i % 4 == 0, None) for i in range(200_000)))
+        conn = db._get_connection()
+        statements = []
+        conn.set_trace_callback(statements.append)
+        assert db.get_stats(1) == (200_000, 150_000, 50_000)
+        conn.set_trace_callback(None)
+        assert len(statements) == 1
+        plan = " ".join(row[-1] for row in conn.execute("EXPLAIN QUERY PLAN " + statements[0]))
+        assert "user_stats USING INTEGER PRIMARY KEY" in plan, plan
+
+        start = time.perf_counter()
+        for _ in range(1000):
+            db.get_stats(1)
+        assert (time.perf_counter() - start) / 1000 < 0.001
+
+
+def test_checker_finds_and_repairs_counters(capsys):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "t.sqlite")
+        with make_db(path, users=3) as db:
+            db.add_tasks(1, ((f"Задача {i}", "") for i in range(5)))
+            db.add_tasks(2, ((f"Задача {i}", "") for i in range(3)))
+            db.toggle_task_status(1)
+            conn = db._get_connection()
+            with conn:
+                conn.execute("UPDATE user_stats SET total = 100 WHERE user_id = 1")
+                conn.execute("DELETE FROM user_stats WHERE user_id = 2")
+                conn.execute("INSERT INTO user_stats (user_id, total, done) VALUES (3, 1, 1)")
+            assert db.check_stats() == [
+                (1, (100, 99, 1), (5, 4, 1)),
+                (2, (0, 0, 0), (3, 3, 0)),
+                (3, (1, 0, 1), (0, 0, 0)),
+            ]
+
+        assert task_stats.main(["--db", path]) == 1
+        out = capsys.readouterr().out
+        assert "Пользователь 2: в счётчиках (0, 0, 0), по задачам (3, 3, 0)" in out
+        assert task_stats.main(["--db", path, "--repair"]) == 0
+        assert task_stats.main(["--db", path]) == 0
+        assert "сходятся" in capsys.readouterr().out
+
+        with Database(path) as db:
+            stats = [db.get_stats(user_id) for user_id in (1, 2, 3)]
+            assert stats == [(5, 4, 1), (3, 3, 0), (0, 0, 0)]
+            # Миграция заполняет счётчики уже существующих задач
+            conn = db._get_connection()
+            with conn:
+                for name in ("user_stats_insert", "user_stats_update", "user_stats_delete"):
+                    conn.execute(f"DROP TRIGGER {name}")
+                conn.execute("DROP TABLE user_stats")
+                conn.execute("PRAGMA user_version = 10")
+        with Database(path) as db:
+            assert_counters(db, 1, 2, 3)
+            db.add_task(3, "После миграции", "")
+            assert db.get_stats(3) == (1, 1, 0)
+
+
+def test_sharded_counters_follow_moved_users():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "t.sqlite")
+        with make_db(path, users=4) as db:
+            for user_id in range(1, 5):
+                db.add_tasks(user_id, ((f"Задача {i}", "") for i in range(user_id * 3)))
+            db.toggle_task_status(1)
+        with ShardedDatabase(path, 2) as db:
+            assert db.get_stats(1) == (3, 2, 1)
+            rebalance(db)
+            assert all(db.shard_of_user(user_id) != 0 for user_id in range(1, 5))
+            assert [db.get_stats(user_id) for user_id in range(1, 5)] == [
+                (3, 2, 1),
+                (6, 6, 0),
+                (9, 9, 0),
+                (12, 12, 0),
+            ]
+            db.add_task(2, "В шарде", "")
+            assert db.get_stats(2) == (7, 7, 0)
+            assert db.check_stats() == []
+
+
+def test_window_shows_live_counters():
+    import main
+
+    cwd = os.getcwd()
+    os.chdir(APP_DIR)  # окна загружают .ui по относительным путям
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = make_db(os.path.join(tmp, "t.sqlite"))
+            db.add_tasks(1, ((f"Задача {i}", "") for i in range(4)))
+            window = main.MainWindow(db)
+            window.on_login_success(1)
+            tasks = window.tasks_window
+            assert tasks.statsLabel.text() == "Всего: 4, невыполненных: 4, выполненных: 0"
+            assert tasks.doneProgressBar.value() == 0
+
+            # Отметка о выполнении попадает в сводку после записи очереди правок
+            tasks.model.toggle_status(0)
+            tasks.write_queue.flush()
+            assert tasks.statsLabel.text() == "Всего: 4, невыполненных: 3, выполненных: 1"
+            assert (tasks.doneProgressBar.value(), tasks.doneProgressBar.maximum()) == (1, 4)
+
+            # Задача из другого процесса - через слежение за изменениями
+            with Database(db.db_path) as other:
+                other.add_task(1, "Из другого окна", "")
+            tasks.change_watcher.poll()
+            assert tasks.statsLabel.text() == "Всего: 5, невыполненных: 4, выполненных: 1"
+            window.close_db()
+    finally:
+        os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    test_counters_follow_every_write_path()
+    test_stats_read_one_row_by_key()
+    test_sharded_counters_follow_moved_users()
+    print("Счётчики задач пользователей работают корректно")
@@ -0,0 +1,138 @@
+import os
+import sqlite3
+import sys
+import tempfile
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+APP_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "smart_todo_list"
+)
+sys.path.insert(0, APP_DIR)
+
+from PyQt6.QtCore import QEventLoop, QTimer  # noqa: E402
+from PyQt6.QtGui import QCloseEvent  # noqa: E402
+from PyQt6.QtWidgets import QApplication, QMessageBox  # noqa: E402
+
+from database import Database  # noqa: E402
+from write_queue import TaskWriteQueue  # noqa: E402
+
+app = QApplication.instance() or QApplication(sys.argv)
+
+
+def make_db(tmp):
+    db = Database(os.path.join(tmp, "t.sqlite"))
+    conn = db._get_connection()
+    with conn:
+        conn.execute(
+            "INSERT INTO users (login, email, password_hash) VALUES ('u', 'u@example.com', '-')"
+        )
+    db.add_tasks(1, [(f"Задача {i}", "") for i in range(3)])
+    return db
+
+
+def test_edits_are_merged_and_written_in_one_transaction():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_db(tmp)
+        statements = []
+        db._get_connection().set_trace_callback(statements.append)
+
+        queue = TaskWriteQueue(db, interval_ms=20)
+        for i in range(10):
+            queue.put(1, "title", f"Черновик {i}")
+        queue.put(1, "is_done", 1)
+        queue.put(2, "description", "Новое описание")
+        assert queue.pending == {
+            1: {"title": "Черновик 9", "is_done": 1},
+            2: {"description": "Новое описание"},
+        }
+
+        # До срабатывания таймера база не трогается
+        assert statements == []
+        loop = QEventLoop()
+        QTimer.singleShot(200, loop.quit)
+        loop.exec()
+
+        assert queue.pending == {}
+        assert sum(1 for sql in statements if sql.startswith("COMMIT")) == 1
+        assert db.get_tasks(1) == [
+            (1, "Черновик 9", "", 1),
+            (2, "Задача 1", "Новое описание", 0),
+            (3, "Задача 2", "", 0),
+        ]
+        db.close()
+
+
+def test_flush_keeps_edits_when_write_fails():
+    with tempfile.TemporaryDirectory() as tmp:
+        db = make_db(tmp)
+        queue = TaskWriteQueue(db)
+        errors = []
+        queue.flush_failed.connect(errors.append)
+        queue.put(1, "title", "Не потеряется")
+
+        # Другое соединение держит блокировку записи
+        blocker = sqlite3.connect(db.db_path, timeout=0)
+        blocker.execute("BEGIN IMMEDIATE")
+        db._get_connection().execute("PRAGMA busy_timeout = 0")
+        assert not queue.flush()
+        assert errors and queue.pending == {1: {"title": "Не потеряется"}}
+
+        blocker.rollback()
+        blocker.close()
+        assert queue.flush()
+        assert db.get_tasks(1)[0][1] == "Не потеряется"
+        db.close()
+
+
+def test_close_is_cancelled_while_edits_cannot_be_saved():
+    import main
+
+    warning, question = QMessageBox.warning, QMessageBox.question
+    answers = []
+    QMessageBox.warning = staticmethod(lambda *args: None)
+    QMessageBox.question = staticmethod(lambda *args: answers.pop(0)())
+    cwd = os.getcwd()
+    os.chdir(APP_DIR)  # окна загружают .ui по относительным путям
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = make_db(tmp)
+            window = main.MainWindow(db)
+            window.on_login_success(1)
+            window.tasks_window.write_queue.put(1, "title", "Не потеряется")
+
+            blocker = sqlite3.connect(db.db_path, timeout=0)
+            blocker.execute("BEGIN IMMEDIATE")
+            db._get_connection().execute("PRAGMA busy_timeout = 0")
+
+            # Пользователь отменил выход - окно остаётся, правки в очереди
+            answers.append(lambda: QMessageBox.StandardButton.Cancel)
+            event = QCloseEvent()
+            window.closeEvent(event)
+            assert not event.isAccepted()
+            assert window.tasks_window.write_queue.pending == {
+                1: {"title": "Не потеряется"}
+            }
+
+            # Повтор после снятия блокировки сохраняет правки, и окно закрывается
+            def release():
+                blocker.rollback()
+                return QMessageBox.StandardButton.Retry
+
+            answers.extend([lambda: QMessageBox.StandardButton.Retry, release])
+            event = QCloseEvent()
+            window.closeEvent(event)
+            assert event.isAccepted() and answers == []
+            assert db.get_tasks(1)[0][1] == "Не потеряется"
+            blocker.close()
+            db.close()
+    finally:
+        os.chdir(cwd)
+        QMessageBox.warning, QMessageBox.question = warning, question
+
+
+if __name__ == "__main__":
+    test_edits_are_merged_and_written_in_one_transaction()
+    test_flush_keeps_edits_when_write_fails()
+    test_close_is_cancelled_while_edits_cannot_be_saved()
+    print("Отложенная запись правок работает корректно")